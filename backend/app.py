@@ -1,9 +1,27 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 from datetime import datetime, timedelta
-from pulp import LpProblem, LpVariable, LpMinimize, lpSum, LpInteger, LpStatusOptimal, LpStatusInfeasible, LpStatus # LpStatus 추가
+from pulp import LpProblem, LpVariable, LpMinimize, lpSum, LpInteger, LpStatusOptimal, LpStatusInfeasible, LpStatus, LpSolutionOptimal, value # LpStatus 추가
 import random
+import cProfile
+import tempfile
+import hashlib
+import json
+import os
+import time
+import threading
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np # numpy 추가 (분산 계산용)
+import heuristic
+import holiday_calendar
+import metrics
+import solvers
+from roster_history import PeriodOverlapError, RosterHistoryStore
+from schedule_cache import ScheduleResultCache, canonical_schedule_key
+from jobs import ScheduleJobManager, JobQueueFullError
 
 app = Flask(__name__)
 CLOUDFLARE_PAGES_URL = "https://fairduty-beta.pages.dev" 
@@ -21,22 +39,134 @@ CORS(app,
      allow_headers=["Content-Type", "Authorization"] # 허용할 요청 헤더 (필요에 따라 추가/수정)
 )
 
-# --- 기존 generate_dates_revised 함수 (주말 및 사용자 지정 공휴일만 처리) ---
-def generate_dates_revised(start_str, end_str, extra_holidays_set):
-    start_dt = datetime.strptime(start_str, "%Y-%m-%d").date()
-    end_dt = datetime.strptime(end_str, "%Y-%m-%d").date()
-    days = []
-    current_dt = start_dt
-    while current_dt <= end_dt:
-        is_extra_holiday = current_dt in extra_holidays_set
-        days.append({
-            "date": current_dt.strftime("%Y-%m-%d"),
-            "weekday": current_dt.weekday(),
-            "is_weekend": current_dt.weekday() >= 5,
-            "is_holiday": is_extra_holiday
-        })
-        current_dt += timedelta(days=1)
-    return days
+# 요청에 holidayRegion이 없을 때 쓰는 공휴일 지역 (빈 문자열이면 주말과 extraHolidays만 휴일로 처리)
+DEFAULT_HOLIDAY_REGION = os.environ.get('FAIRDUTY_DEFAULT_HOLIDAY_REGION', 'KR') or None
+
+
+def build_day_calendar(start_str, end_str, extra_holidays_str_list, holiday_region=None):
+    """기간의 달력(날짜, 요일, 주말·공휴일 여부 배열)을 (기간, 지역, 공휴일) 단위로 캐시해 반환합니다.
+
+    배치 요청처럼 같은 달의 여러 팀을 한 번에 풀 때 날짜/공휴일 계산을 한 번만 합니다.
+    반환된 달력은 여러 요청이 공유하므로 수정하면 안 됩니다.
+    """
+    day_calendar = holiday_calendar.build_day_calendar(start_str, end_str, extra_holidays_str_list, holiday_region)
+    for d_str in day_calendar.ignored_extra_holidays:
+        app.logger.warning(f"잘못된 추가 공휴일 날짜 형식 (무시됨): {d_str}")
+    if day_calendar.missing_holiday_years:
+        app.logger.warning(f"{holiday_region} 공휴일 데이터가 없는 연도 (주말과 추가 공휴일만 반영): "
+                           f"{', '.join(map(str, day_calendar.missing_holiday_years))}")
+    return day_calendar
+
+
+def with_holiday_coverage(result, params):
+    """공휴일 데이터가 없는 연도가 기간에 있으면 result의 stats.missingHolidayYears로 알립니다.
+
+    해당 연도는 주말과 extraHolidays만 휴일로 처리되었으므로, 사용자가 extraHolidays로 보완할 수 있게 응답에 남깁니다.
+    """
+    day_calendar = holiday_calendar.build_day_calendar(params['startDate'], params['endDate'], params['extraHolidays'],
+                                                       params['holidayRegion'])
+    if not day_calendar.missing_holiday_years:
+        return result
+    return dict(result, stats=dict(result.get('stats', {}), missingHolidayYears=list(day_calendar.missing_holiday_years)))
+
+
+def build_availability_arrays(day_calendar, people_data_input):
+    """(인원 x 날짜) 당직 가능 여부 행렬과 날짜별 주말·공휴일 여부 배열을 만듭니다."""
+    available = np.ones((len(people_data_input), len(day_calendar)), dtype=bool)
+    for p_idx, p_data in enumerate(people_data_input):
+        for un_date_str in p_data.get('unavailable', []):
+            d_idx = day_calendar.date_index.get(un_date_str)
+            if d_idx is not None:
+                available[p_idx, d_idx] = False
+    return available, day_calendar.is_off
+
+
+def build_capacity_arrays(people_data_input, num_days):
+    """개인별 FTE 비율, 최소/최대 당직 수 배열을 만듭니다 (지정하지 않으면 1.0, 0, num_days)."""
+    fte = np.array([1.0 if p.get('fte') is None else float(p['fte']) for p in people_data_input])
+    min_duties = np.array([p.get('minDuties') or 0 for p in people_data_input], dtype=np.int64)
+    max_duties = np.array([num_days if p.get('maxDuties') is None else p['maxDuties'] for p in people_data_input], dtype=np.int64)
+    return fte, min_duties, max_duties
+
+
+def presolve_capacity(person_upper_bounds, min_duties, max_duties, required, people_names):
+    """최소/최대 당직 수를 가용성 상한에 반영하고 불가능한 조합을 찾습니다.
+
+    (조정된 개인별 최대 당직 횟수 배열, 오류 메시지 또는 None)을 반환합니다.
+    """
+    person_upper_bounds = np.minimum(person_upper_bounds, max_duties)
+    short_people = np.flatnonzero(min_duties > person_upper_bounds)
+    if len(short_people):
+        p_idx = short_people[0]
+        return None, (f"{people_names[p_idx]}: 최소 당직 수(minDuties {int(min_duties[p_idx])}회)가 당직 불가일과 "
+                      f"최대 당직 수를 반영한 가능 횟수({int(person_upper_bounds[p_idx])}회)보다 많습니다.")
+    if person_upper_bounds.sum() < required:
+        return None, (f"최대 당직 수(maxDuties)를 반영한 전체 인원의 최대 당직 수({int(person_upper_bounds.sum())}회)가 "
+                      f"필요한 당직 수({required}회)보다 적습니다.")
+    if min_duties.sum() > required:
+        return None, f"최소 당직 수(minDuties)의 합({int(min_duties.sum())}회)이 필요한 당직 수({required}회)보다 많습니다."
+    return person_upper_bounds, None
+
+
+def presolve_availability(available, duty_per_day, allow_consecutive, day_calendar):
+    """모델을 만들기 전에 가용성 행렬만으로 알 수 있는 불가능 조건을 찾고, 개인별 최대 당직 횟수를 계산합니다.
+
+    (개인별 최대 당직 횟수 배열, 오류 메시지 또는 None)을 반환합니다.
+    """
+    num_people, num_days = available.shape
+    date_strings = day_calendar.dates
+
+    short_days = np.flatnonzero(available.sum(axis=0) < duty_per_day)
+    if len(short_days):
+        d_idx = short_days[0]
+        more = f" (그 외 {len(short_days) - 1}일도 부족)" if len(short_days) > 1 else ""
+        return None, (f"{date_strings[d_idx]}: 당직 가능 인원이 {int(available[:, d_idx].sum())}명으로 "
+                      f"하루 당직자 수({duty_per_day}명)보다 적습니다{more}. 당직 불가일을 확인해주세요.")
+
+    if allow_consecutive:
+        person_upper_bounds = available.sum(axis=1)
+    else:
+        # 연속 당직 금지: 이틀 동안 서로 다른 2 * duty_per_day명이 필요
+        if num_days > 1:
+            short_pairs = np.flatnonzero((available[:, :-1] | available[:, 1:]).sum(axis=0) < 2 * duty_per_day)
+            if len(short_pairs):
+                d_idx = short_pairs[0]
+                return None, (f"{date_strings[d_idx]} ~ {date_strings[d_idx + 1]}: 연속 당직 금지 조건에서 이틀 동안 필요한 "
+                              f"{2 * duty_per_day}명 중 {int((available[:, d_idx] | available[:, d_idx + 1]).sum())}명만 당직이 가능합니다.")
+        # 연속으로 가능한 L일 구간에서는 최대 ceil(L / 2)번만 당직 가능
+        edges = np.diff(np.pad(available.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+        person_upper_bounds = np.zeros(num_people, dtype=np.int64)
+        for p_idx in range(num_people):
+            run_lengths = np.flatnonzero(edges[p_idx] == -1) - np.flatnonzero(edges[p_idx] == 1)
+            person_upper_bounds[p_idx] = ((run_lengths + 1) // 2).sum()
+
+    required = num_days * duty_per_day
+    if person_upper_bounds.sum() < required:
+        return None, (f"전체 인원이 맡을 수 있는 최대 당직 수({int(person_upper_bounds.sum())}회)가 "
+                      f"필요한 당직 수({required}회)보다 적습니다. 당직 불가일을 확인해주세요.")
+    return person_upper_bounds, None
+
+
+def render_assignment_matrix(people_names, day_calendar, assignment_matrix):
+    """(인원 x 날짜) 0/1 배정 행렬을 API 응답 형식(dutyRoster, summary)으로 변환합니다."""
+    roster = []
+    for d_idx, date_str in enumerate(day_calendar.dates):
+        assigned_today = [people_names[p_idx] for p_idx in np.flatnonzero(assignment_matrix[:, d_idx])]
+        roster.append({"date": date_str, "weekday": int(day_calendar.weekdays[d_idx]), "duty": ", ".join(assigned_today)})
+
+    off_counts = assignment_matrix[:, day_calendar.is_off].sum(axis=1)
+    work_counts = assignment_matrix.sum(axis=1) - off_counts
+    summary = [{"person": pn,
+                "weekdayDuties": int(work_counts[p_idx]),
+                "weekendOrHolidayDuties": int(off_counts[p_idx])}
+               for p_idx, pn in enumerate(people_names)]
+    return {"dutyRoster": roster, "summary": summary}
+
+
+def render_compact_roster(assignment_matrix):
+    """날짜별 당직자 인원 인덱스 목록. 스트리밍 중간 결과처럼 자주 보내는 당직표에 사용합니다."""
+    return [np.flatnonzero(day_column).tolist() for day_column in assignment_matrix.T]
+
 
 # --- 분산 계산 함수 ---
 def calculate_variances(summary_data, people_names_list):
@@ -50,238 +180,2341 @@ def calculate_variances(summary_data, people_names_list):
     
     return var_weekday, var_weekend_holiday
 
-# --- 코어 LP 솔버 함수 (리팩토링됨) ---
-def _solve_single_schedule_lp(
-    start_date_str, end_date_str, people_data_input, duty_per_day_val, 
-    allow_consecutive_flag, extra_holidays_str_list,
-    objective_config=None # 예: {'type': 'PRIMARY_FAIRNESS'} 또는 {'type': 'RANDOMIZED_SECONDARY', 'target_range': X}
-):
-    people_names = [p['name'] for p in people_data_input]
-    
-    unavailable_dates_map = {p_data['name']: p_data.get('unavailable', []) for p_data in people_data_input}
 
-    user_extra_holidays_set = set()
-    for d_str in extra_holidays_str_list:
-        try:
-            date_obj = datetime.strptime(d_str, "%Y-%m-%d").date()
-            user_extra_holidays_set.add(date_obj)
-        except ValueError:
-            app.logger.warning(f"잘못된 추가 공휴일 날짜 형식 (무시됨): {d_str}")
+# 분산 비교 시 부동소수점 오차 허용치
+VARIANCE_TOLERANCE = 1e-9
 
-    # generate_dates_revised 함수 사용
-    date_info_list = generate_dates_revised(start_date_str, end_date_str, user_extra_holidays_set)
-    
-    # 실제 스케줄링 대상 날짜 문자열 리스트
-    schedule_date_strings = [d_info['date'] for d_info in date_info_list]
 
-    if not schedule_date_strings:
-        return None, "EmptyDateRange", None
+def _min_fill_variance(base_counts, total):
+    """base_counts(이전 누적)에 total회를 정수로 더 나눌 때 가능한 가장 작은 분산.
+
+    가장 적게 선 사람부터 채워 올리는 배분이 최적입니다. 누적이 모두 0이면 r = T mod n명이
+    한 번씩 더 서는 배분이 되어 분산은 r(n-r)/n^2입니다.
+    """
+    counts = np.sort(np.asarray(base_counts, dtype=np.int64))
+    if len(counts) <= 1:
+        return 0.0
+    # 모두를 level까지 채우는 데 드는 횟수가 total 이하인 가장 높은 level
+    low, high = int(counts[0]), int(counts[0]) + total
+    while low < high:
+        mid = (low + high + 1) // 2
+        if int(np.maximum(mid - counts, 0).sum()) <= total:
+            low = mid
+        else:
+            high = mid - 1
+    filled = np.maximum(counts, low)
+    # 남은 횟수는 level에 있는 사람(정렬되어 앞쪽)에게 한 번씩
+    filled[:total - int((filled - counts).sum())] += 1
+    return float(np.var(filled))
 
-    prob = LpProblem("DutyScheduling", LpMinimize) # 기본 sense, 목적 함수에서 재정의 가능
 
-    # 변수 정의
-    # x[person_name, date_string]
-    duty_vars = LpVariable.dicts("duty", [(pn, ds) for pn in people_names for ds in schedule_date_strings], 0, 1, LpInteger)
-    
-    # 개인별 총 근무일 변수
-    person_total_duties = LpVariable.dicts("person_total_duties", people_names, 0, cat=LpInteger)
-    # 전체 근무일 중 최대/최소값 변수
-    max_duties_across_people = LpVariable("max_duties_across_people", 0, cat=LpInteger)
-    min_duties_across_people = LpVariable("min_duties_across_people", 0, cat=LpInteger)
-
-    # 기본 제약조건
-    for pn in people_names:
-        # 각 개인의 총 근무일 계산
-        prob += person_total_duties[pn] == lpSum(duty_vars[(pn, ds)] for ds in schedule_date_strings)
-        # 최대/최소 근무일 제약
-        prob += max_duties_across_people >= person_total_duties[pn]
-        prob += min_duties_across_people <= person_total_duties[pn]
-
-    # 당직 불가일 제약
-    for pn, un_dates in unavailable_dates_map.items():
-        for un_date_str in un_dates:
-            if un_date_str in schedule_date_strings: # 스케줄 범위 내의 불가일만 처리
-                prob += duty_vars[(pn, un_date_str)] == 0, f"Unavailable_{pn}_{un_date_str.replace('-', '')}"
-
-    # 하루당 당직 인원 제약
-    for ds in schedule_date_strings:
-        prob += lpSum(duty_vars[(pn, ds)] for pn in people_names) == duty_per_day_val, f"DutyPerDay_{ds.replace('-', '')}"
-
-    # 연속 당직 금지 제약
-    if not allow_consecutive_flag:
+def combined_variance_lower_bound(is_off, num_people, duty_per_day, carry_counts=None):
+    """주중/주말·공휴일 분산 합의 하한: 각 유형의 총 당직 수를 정수로 가장 고르게 나눴을 때의 분산 합.
+
+    carry_counts(이전 기간 누적 (주중, 주말·공휴일) 배열)가 있으면 누적 횟수 기준 하한을 계산합니다.
+    """
+    if carry_counts is None:
+        carry_counts = (np.zeros(num_people, dtype=np.int64), np.zeros(num_people, dtype=np.int64))
+    totals = (int((~is_off).sum()) * duty_per_day, int(is_off.sum()) * duty_per_day)
+    return sum(_min_fill_variance(base_counts, total) for base_counts, total in zip(carry_counts, totals))
+
+
+def calculate_matrix_variances(assignment_matrix, is_off, carry_counts=None):
+    """(인원 x 날짜) 배정 행렬과 주말·공휴일 마스크로 주중/주말·공휴일 횟수 분산을 한 번에 계산합니다.
+
+    carry_counts(이전 기간 누적 (주중, 주말·공휴일) 배열)가 있으면 누적 횟수의 분산을 계산합니다.
+    """
+    if assignment_matrix.shape[0] <= 1:
+        return 0.0, 0.0
+    off_counts = assignment_matrix[:, is_off].sum(axis=1)
+    work_counts = assignment_matrix.sum(axis=1) - off_counts
+    if carry_counts is not None:
+        work_counts = work_counts + carry_counts[0]
+        off_counts = off_counts + carry_counts[1]
+    return np.var(work_counts), np.var(off_counts)
+
+# --- 솔버 풀이 설정 ---
+# 알려진 가능해(1단계 해, 지금까지의 최선 후보)를 MIP start로 넘겨 솔버가 처음부터 탐색하지 않도록 함
+MIP_WARM_START = os.environ.get('FAIRDUTY_MIP_WARM_START', '1') != '0'
+
+# --- 가중 목표 모드 ---
+# 당직 유형별 부담 가중치 기본값 (요청의 dutyWeights로 덮어씀)
+DEFAULT_DUTY_WEIGHTS = {"weekday": 1.0, "weekendOrHoliday": 1.0}
+# 가중 목표 모드에서 주중/주말·공휴일 횟수 각각의 목표 편차 제곱에 주는 가중치 (부담 편차가 같으면 유형별로도 고르게 나눔)
+WEIGHTED_TYPE_BALANCE_WEIGHT = 0.1
+# 가중 목표 모드 풀이 시간 제한 (초). 제한에 걸리면 그때까지의 최선 해를 반환
+WEIGHTED_TIME_LIMIT_SECONDS = float(os.environ.get('FAIRDUTY_WEIGHTED_TIME_LIMIT_SECONDS', 30))
+# 요청의 solver.gapRel이 없을 때 가중 목표 모드에 쓰는 상대 MIP gap. 주중/주말 횟수의 정수 결합 때문에 LP 하한이
+# 최적값보다 낮아 0 gap 증명은 인원이 많으면 오래 걸리지만, 최적 해 자체는 보통 몇 초 안에 찾음
+WEIGHTED_DEFAULT_GAP_REL = float(os.environ.get('FAIRDUTY_WEIGHTED_GAP_REL', 0.05))
+# 편차 제곱 근사에서 목표 양쪽으로 가능한 값을 모두 꺾이는 점으로 쓰는 개수 (그 밖은 간격을 두 배씩 늘림)
+SQUARE_EXACT_POINTS = 6
+
+
+def _square_chords(values, target):
+    """(v - target)^2을 정렬된 가능 값 values 위에서 잇는 선분들의 (기울기, 절편) 목록.
+
+    목표에 가까운 SQUARE_EXACT_POINTS개씩은 모든 값을, 그 밖은 간격을 두 배씩 늘린 값을 꺾이는 점으로 씁니다.
+    선분의 최댓값은 꺾이는 점에서 정확하고 그 사이에서는 제곱보다 크므로, 정수 횟수로만 도달할 수 있는 값 사이에
+    목표가 있어도 LP 완화가 0으로 떨어지지 않습니다 (정확 모드의 x^2 선형화와 같은 방식).
+    """
+    values = np.unique(np.round(np.asarray(values, dtype=float), 9))
+    split = int(np.searchsorted(values, target))
+    picked = set()
+    for start, step in ((split, 1), (split - 1, -1)):
+        offset, gap = 0, 1
+        while 0 <= start + step * offset < len(values):
+            picked.add(start + step * offset)
+            if offset >= SQUARE_EXACT_POINTS:
+                gap *= 2
+            offset += gap
+    points = values[sorted(picked | {0, len(values) - 1})]
+    squares = (points - target) ** 2
+    slopes = np.diff(squares) / np.diff(points)
+    return [(float(slope), float(square - slope * point)) for slope, square, point in zip(slopes, squares[:-1], points[:-1])]
+
+
+# --- 재사용 가능한 LP 모델 ---
+class DutyScheduleModel:
+    """변수와 제약조건을 한 번만 구성하고, 목적 함수만 바꿔가며 반복해서 푸는 스케줄 LP 모델.
+
+    2단계 후보 생성(RANDOMIZED_SECONDARY)은 무작위 계수만 다를 뿐 나머지 모델은 동일하므로,
+    날짜 파싱/변수 생성/제약조건 구성을 요청당 한 번만 수행합니다.
+    """
+
+    def __init__(self, start_date_str, end_date_str, people_data_input, duty_per_day_val,
+                 allow_consecutive_flag, extra_holidays_str_list, carry_in=None, solver_options=None, holiday_region=None):
+        self.people_names = [p['name'] for p in people_data_input]
+        self.duty_per_day = duty_per_day_val
+        self.allow_consecutive = allow_consecutive_flag
+        # 이전 기간에서 넘어온 개인별 누적 횟수와 마지막 당직일
+        # {이름: {"weekdayDuties": int, "weekendOrHolidayDuties": int, "lastDutyDate": "YYYY-MM-DD" 또는 None}}
+        # 공정성 목적 함수는 (이전 누적 + 이번 기간) 횟수 기준으로 계산됨
+        self.carry_in = carry_in or {}
+        # 후보 분산 평가용 이전 기간 누적 (주중, 주말·공휴일) 배열 (carry_in이 없으면 None)
+        self.carry_counts = None
+        if self.carry_in:
+            self.carry_counts = tuple(np.array([self._carry_count(pn, key) for pn in self.people_names], dtype=np.int64)
+                                      for key in ("weekdayDuties", "weekendOrHolidayDuties"))
+        # 풀이 백엔드/시간 제한/gap/스레드 설정 (solvers.resolve_solver_options 결과, 없으면 배포 기본값)
+        self.solver_options = solver_options or solvers.resolve_solver_options()
+
+        # 주말, holiday_region 공휴일, 사용자 지정 공휴일이 반영된 달력 (같은 기간/지역/공휴일이면 공유)
+        dates_started = time.perf_counter()
+        self.day_calendar = build_day_calendar(start_date_str, end_date_str, extra_holidays_str_list, holiday_region)
+
+        # 실제 스케줄링 대상 날짜 문자열 리스트
+        self.schedule_date_strings = self.day_calendar.dates
+        # 계측 구간에 붙이는 문제 크기 라벨
+        self.size_labels = metrics.problem_size_labels(len(self.people_names), len(self.schedule_date_strings), self.duty_per_day)
+        metrics.observe_span("dates", time.perf_counter() - dates_started, self.size_labels)
+
+        self.prob = None
+        self._enforce_range_constraint = None
+        self._squared_count_vars = None
+        self._count_var_groups = []
+        self._weighted_objective = None # (가중치, 목적 함수) - 가중 목표 모드에서 처음 풀 때 구성
+        self.last_matrix = None # 마지막 최적해의 (인원 x 날짜) 0/1 배정 행렬 (MIP start 재사용용)
+        self.last_solution_proven = False # 시간 제한 없이 최적성이 증명되었는지 여부
+        self.presolve_error = None # 모델 구성 전에 불가능이 확인된 경우의 오류 메시지
+        # 개인별 FTE 비율(가중 목표 모드의 목표 몫)과 이번 기간 최소/최대 당직 수 (모든 모드에서 하드 제약)
+        self.person_fte, self.min_duties, self.max_duties = build_capacity_arrays(people_data_input, len(self.schedule_date_strings))
+        if not self.schedule_date_strings:
+            return
+
+        with metrics.span("model_build", self.size_labels):
+            self._presolve_and_build(people_data_input)
+
+    def _presolve_and_build(self, people_data_input):
+        # 사전 처리: (인원 x 날짜) 가용성 행렬로 고정 0 변수를 미리 제거하고, 불가능한 입력은 CBC 호출 없이 바로 실패
+        available, self.is_off = build_availability_arrays(self.day_calendar, people_data_input)
+        if not self.allow_consecutive:
+            # 이전 기간의 마지막 날에 당직이었던 사람은 이번 기간 첫날에 배정하지 않음
+            first_date = datetime.strptime(self.schedule_date_strings[0], "%Y-%m-%d").date()
+            day_before_first = (first_date - timedelta(days=1)).strftime("%Y-%m-%d")
+            for p_idx, pn in enumerate(self.people_names):
+                if self.carry_in.get(pn, {}).get('lastDutyDate') == day_before_first:
+                    available[p_idx, 0] = False
+        person_upper_bounds, self.presolve_error = presolve_availability(
+            available, self.duty_per_day, self.allow_consecutive, self.day_calendar
+        )
+        if self.presolve_error is not None:
+            return
+        person_upper_bounds, self.presolve_error = presolve_capacity(
+            person_upper_bounds, self.min_duties, self.max_duties, len(self.schedule_date_strings) * self.duty_per_day, self.people_names
+        )
+        if self.presolve_error is not None:
+            return
+
+        self._build(available, person_upper_bounds)
+
+    @property
+    def is_empty(self):
+        return self.prob is None
+
+    def _unsolvable_status(self):
+        if self.presolve_error is not None:
+            return "PresolveInfeasible"
+        if self.is_empty:
+            return "EmptyDateRange"
+        return None
+
+    def _build(self, available, person_upper_bounds):
+        people_names = self.people_names
+        schedule_date_strings = self.schedule_date_strings
+
+        prob = LpProblem("DutyScheduling", LpMinimize) # 기본 sense, 목적 함수에서 재정의 가능
+
+        # 변수 정의: 당직 가능한 (인원, 날짜) 칸에만 x[person_name, date_string] 생성
+        var_rows, var_cols = np.nonzero(available)
+        available_cells = [(people_names[p_idx], schedule_date_strings[d_idx]) for p_idx, d_idx in zip(var_rows, var_cols)]
+        duty_vars = LpVariable.dicts("duty", available_cells, 0, 1, LpInteger)
+        # 해를 한 번에 행렬로 옮기기 위한 변수 목록과 (인원, 날짜) 인덱스 (같은 순서)
+        self._duty_var_list = list(duty_vars.values())
+        self._duty_var_rows, self._duty_var_cols = var_rows, var_cols
+        person_vars = {pn: [] for pn in people_names}
+        day_vars = {ds: [] for ds in schedule_date_strings}
+        for (pn, ds), var in duty_vars.items():
+            person_vars[pn].append(var)
+            day_vars[ds].append(var)
+
+        carry_totals = {pn: self._carry_count(pn, "weekdayDuties") + self._carry_count(pn, "weekendOrHolidayDuties") for pn in people_names}
+        # 누적 총 당직 수의 평균으로 최대/최소값의 범위를 미리 좁힘: min <= floor(평균) <= ceil(평균) <= max
+        cumulative_total = len(schedule_date_strings) * self.duty_per_day + sum(carry_totals.values())
+        min_upper_bound = min(cumulative_total // len(people_names),
+                              min(int(person_upper_bounds[p_idx]) + carry_totals[pn] for p_idx, pn in enumerate(people_names)))
+
+        # 개인별 총 근무일 변수 (하한: minDuties, 상한: 가용 날짜/연속 당직 금지/maxDuties로 가능한 최대 횟수)
+        person_total_duties = {
+            pn: LpVariable(f"person_total_duties_{pn}", int(self.min_duties[p_idx]), int(person_upper_bounds[p_idx]), LpInteger)
+            for p_idx, pn in enumerate(people_names)
+        }
+        # 전체 근무일 중 최대/최소값 변수
+        max_duties_across_people = LpVariable("max_duties_across_people", -(-cumulative_total // len(people_names)), cat=LpInteger)
+        min_duties_across_people = LpVariable("min_duties_across_people", 0, min_upper_bound, LpInteger)
+
+        # 기본 제약조건
         for pn in people_names:
-            for i in range(len(schedule_date_strings) - 1):
-                d1, d2 = schedule_date_strings[i], schedule_date_strings[i+1]
-                prob += duty_vars[(pn, d1)] + duty_vars[(pn, d2)] <= 1, f"NoConsecutive_{pn}_{d1.replace('-', '')}_{d2.replace('-', '')}"
-    
-    achieved_total_duty_range = None
-
-    # 목적 함수 및 관련 제약 설정
-    if objective_config and objective_config.get('type') == 'PRIMARY_FAIRNESS':
-        prob.objective = max_duties_across_people - min_duties_across_people
-        prob.sense = LpMinimize
-    elif objective_config and objective_config.get('type') == 'RANDOMIZED_SECONDARY':
-        target_range = objective_config.get('target_range')
+            # 각 개인의 총 근무일 계산
+            prob += person_total_duties[pn] == lpSum(person_vars[pn])
+            # 최대/최소 근무일 제약 (이전 기간 누적 횟수 포함)
+            prob += max_duties_across_people >= person_total_duties[pn] + carry_totals[pn]
+            prob += min_duties_across_people <= person_total_duties[pn] + carry_totals[pn]
+
+        # 하루당 당직 인원 제약
+        for ds in schedule_date_strings:
+            prob += lpSum(day_vars[ds]) == self.duty_per_day, f"DutyPerDay_{ds.replace('-', '')}"
+
+        # 연속 당직 금지 제약 (둘 다 가능한 날짜 쌍에만 필요)
+        if not self.allow_consecutive:
+            for pn in people_names:
+                for i in range(len(schedule_date_strings) - 1):
+                    d1, d2 = schedule_date_strings[i], schedule_date_strings[i+1]
+                    if (pn, d1) in duty_vars and (pn, d2) in duty_vars:
+                        prob += duty_vars[(pn, d1)] + duty_vars[(pn, d2)] <= 1, f"NoConsecutive_{pn}_{d1.replace('-', '')}_{d2.replace('-', '')}"
+
+        self.prob = prob
+        self.duty_vars = duty_vars
+        self.person_total_duties = person_total_duties
+        self.max_duties_across_people = max_duties_across_people
+        self.min_duties_across_people = min_duties_across_people
+
+    def _carry_count(self, person_name, key):
+        return int(self.carry_in.get(person_name, {}).get(key, 0))
+
+    def solve_primary_fairness(self, mip_start=None, time_limit=None):
+        """1단계: 개인별 총 당직 횟수의 최대-최소 차이를 최소화합니다."""
+        unsolvable_status = self._unsolvable_status()
+        if unsolvable_status:
+            return None, unsolvable_status, None
+
+        self.prob.objective = self.max_duties_across_people - self.min_duties_across_people
+        self.prob.sense = LpMinimize
+
+        result_payload, status = self._solve(mip_start, time_limit)
+        if status != "Optimal":
+            return None, status, None
+        achieved_total_duty_range = self.max_duties_across_people.varValue - self.min_duties_across_people.varValue
+        return result_payload, status, achieved_total_duty_range
+
+    def solve_randomized_secondary(self, target_range, rng=random, mip_start=None):
+        """2단계: 총 당직일 차이를 target_range로 고정한 채 무작위 목적 함수로 다른 해를 탐색합니다."""
+        unsolvable_status = self._unsolvable_status()
+        if unsolvable_status:
+            return None, unsolvable_status, None
         if target_range is None:
             return None, "MissingTargetRangeForSecondary", None
-        
-        # 1단계에서 찾은 최적의 '총 근무일 차이'를 강제하는 제약 추가
-        prob += (max_duties_across_people - min_duties_across_people) == target_range, "EnforcePrimaryFairness"
-        
+
+        self._enforce_target_range(target_range)
+
         # 무작위 계수를 가진 부차적 목적 함수 (탐색 다양성 확보용)
-        random_coeffs = {(pn, ds): random.uniform(0.01, 0.5) for pn in people_names for ds in schedule_date_strings}
-        prob.objective = lpSum(random_coeffs[(pn, ds)] * duty_vars[(pn, ds)] for pn in people_names for ds in schedule_date_strings)
-        prob.sense = LpMinimize # 또는 LpMaximize, tie-breaking 용도
-    else: # 기본값 또는 잘못된 설정 시: PRIMARY_FAIRNESS로 동작
-        prob.objective = max_duties_across_people - min_duties_across_people
-        prob.sense = LpMinimize
-
-    prob.solve() # CBC 기본 솔버 사용
-
-    if prob.status == LpStatusOptimal:
-        roster = []
-        counts = {pn: {"weekday": 0, "weekend_or_holiday": 0} for pn in people_names}
-        for d_info in date_info_list:
-            ds = d_info['date']
-            assigned_today = [pn for pn in people_names if duty_vars[(pn, ds)].varValue == 1]
-            roster.append({"date": ds, "weekday": d_info['weekday'], "duty": ", ".join(assigned_today)})
-            for pn_assigned in assigned_today:
-                if d_info['is_weekend'] or d_info['is_holiday']:
-                    counts[pn_assigned]["weekend_or_holiday"] += 1
-                else:
-                    counts[pn_assigned]["weekday"] += 1
-        
-        summary = [{"person": pn, 
-                      "weekdayDuties": counts[pn]["weekday"], 
-                      "weekendOrHolidayDuties": counts[pn]["weekend_or_holiday"]} 
-                     for pn in people_names]
-        
-        result_payload = {"dutyRoster": roster, "summary": summary}
-        
-        if objective_config and objective_config.get('type') == 'PRIMARY_FAIRNESS':
-            achieved_total_duty_range = max_duties_across_people.varValue - min_duties_across_people.varValue
-
-        return result_payload, "Optimal", achieved_total_duty_range
-    
-    status_map = {LpStatusInfeasible: "Infeasible"}
-    return None, status_map.get(prob.status, f"SolverError_{LpStatus[prob.status]}"), None
+        self.prob.objective = lpSum(rng.uniform(0.01, 0.5) * var for var in self.duty_vars.values())
+        self.prob.sense = LpMinimize # 또는 LpMaximize, tie-breaking 용도
+
+        result_payload, status = self._solve(mip_start)
+        return result_payload, status, None
+
+    def solve_exact_variance(self, target_range, mip_start=None, time_limit=None):
+        """2단계(정확 모드): 총 당직일 차이를 고정한 채 주중/주말·공휴일 분산의 합을 직접 최소화합니다.
+
+        하루 당직 인원이 고정이므로 주중 총합과 주말·공휴일 총합은 상수이고,
+        분산의 합은 개인별 횟수 제곱합(sum w^2 + sum h^2)에 대한 단조 함수입니다.
+        정수 x에서 x^2를 정확히 표현하는 접선 x^2 >= (2k+1)x - k(k+1) 들로 제곱을 선형화하므로
+        한 번의 풀이로 무작위 샘플링이 근사하던 최적해를 얻습니다.
+        """
+        unsolvable_status = self._unsolvable_status()
+        if unsolvable_status:
+            return None, unsolvable_status, None
+        if target_range is None:
+            return None, "MissingTargetRangeForSecondary", None
+
+        self._enforce_target_range(target_range)
+        if self._squared_count_vars is None:
+            self._add_squared_count_vars()
+
+        self.prob.objective = lpSum(self._squared_count_vars)
+        self.prob.sense = LpMinimize
+
+        result_payload, status = self._solve(mip_start, time_limit)
+        return result_payload, status, None
+
+    def solve_weighted_targets(self, duty_weights, time_limit=None):
+        """가중 목표 모드: 개인별 가중 부담이 FTE 비율 목표에서 벗어난 정도를 한 번의 풀이로 최소화합니다.
+
+        부담 = weekday 가중치 x 주중 횟수 + weekendOrHoliday 가중치 x 주말·공휴일 횟수 (이전 기간 누적 포함),
+        목표 = 전체 부담 x (개인 FTE / FTE 합). 하루 당직 인원이 고정이므로 전체 부담과 목표는 상수입니다.
+        (부담 - 목표)^2 / FTE의 합과, 주중/주말·공휴일 횟수 각각의 FTE 비율 목표 편차 제곱(WEIGHTED_TYPE_BALANCE_WEIGHT배)을
+        최소화합니다. 제곱은 가능한 값 위의 선분으로 선형화하므로 0/1 보조 변수 없이 풀립니다.
+        time_limit(기본 WEIGHTED_TIME_LIMIT_SECONDS)에 걸리면 그때까지의 최선 해를 반환하고,
+        solver.gapRel을 지정하지 않았으면 WEIGHTED_DEFAULT_GAP_REL 이내로 증명되면 멈춥니다.
+        모델당 한 가지 가중치로만 풀 수 있습니다.
+        """
+        unsolvable_status = self._unsolvable_status()
+        if unsolvable_status:
+            return None, unsolvable_status, None
+
+        weights_key = (float(duty_weights["weekday"]), float(duty_weights["weekendOrHoliday"]))
+        if self._weighted_objective is None:
+            self._weighted_objective = (weights_key, self._add_weighted_deviation_vars(*weights_key))
+        elif self._weighted_objective[0] != weights_key:
+            raise ValueError("이미 다른 dutyWeights로 구성된 모델입니다.")
+
+        self.prob.objective = self._weighted_objective[1]
+        self.prob.sense = LpMinimize
+
+        solver_options = self.solver_options
+        if solver_options["gapRel"] is None:
+            solver_options = dict(solver_options, gapRel=WEIGHTED_DEFAULT_GAP_REL)
+        result_payload, status = self._solve(None, WEIGHTED_TIME_LIMIT_SECONDS if time_limit is None else time_limit,
+                                             solver_options=solver_options)
+        return result_payload, status, None
+
+    def weighted_loads(self, assignment_matrix, weekday_weight, off_weight):
+        """배정 행렬의 개인별 (가중 부담, 목표 부담) 배열을 이전 기간 누적을 포함해 계산합니다."""
+        off_counts = assignment_matrix[:, self.is_off].sum(axis=1) + [self._carry_count(pn, "weekendOrHolidayDuties") for pn in self.people_names]
+        work_counts = assignment_matrix[:, ~self.is_off].sum(axis=1) + [self._carry_count(pn, "weekdayDuties") for pn in self.people_names]
+        loads = weekday_weight * work_counts + off_weight * off_counts
+        return loads, loads.sum() * self.person_fte / self.person_fte.sum()
+
+    def _add_weighted_deviation_vars(self, weekday_weight, off_weight):
+        """가중 목표 목적 함수 식을 만듭니다. 각 제곱 항은 누적 주중 횟수 W와 주말·공휴일 횟수 H의 선형식
+        alpha x W + beta x H가 목표에서 벗어난 정도의 제곱입니다.
+        """
+        fte_share = self.person_fte / self.person_fte.sum()
+        off_dates = [self.schedule_date_strings[d_idx] for d_idx in np.flatnonzero(self.is_off)]
+        num_work_days = len(self.schedule_date_strings) - len(off_dates)
+        carry_work = {pn: self._carry_count(pn, "weekdayDuties") for pn in self.people_names}
+        carry_off = {pn: self._carry_count(pn, "weekendOrHolidayDuties") for pn in self.people_names}
+        total_off = len(off_dates) * self.duty_per_day + sum(carry_off.values())
+        total_work = num_work_days * self.duty_per_day + sum(carry_work.values())
+        total_load = weekday_weight * total_work + off_weight * total_off
+
+        objective_terms = []
+        for p_idx, pn in enumerate(self.people_names):
+            # 이번 기간 횟수 식 (주중 횟수 = 총 횟수 - 주말·공휴일 횟수)
+            off_count = lpSum(self.duty_vars[(pn, ds)] for ds in off_dates if (pn, ds) in self.duty_vars)
+            work_count = self.person_total_duties[pn] - off_count
+            work_values = np.arange(carry_work[pn], carry_work[pn] + num_work_days + 1)
+            off_values = np.arange(carry_off[pn], carry_off[pn] + len(off_dates) + 1)
+            load_values = (weekday_weight * work_values[:, None] + off_weight * off_values[None, :]).ravel()
+            for name, alpha, beta, values, target, weight in (
+                (f"load_{p_idx}", weekday_weight, off_weight, load_values, total_load * fte_share[p_idx], 1.0),
+                (f"work_{p_idx}", 1.0, 0.0, work_values, total_work * fte_share[p_idx], WEIGHTED_TYPE_BALANCE_WEIGHT),
+                (f"off_{p_idx}", 0.0, 1.0, off_values, total_off * fte_share[p_idx], WEIGHTED_TYPE_BALANCE_WEIGHT),
+            ):
+                chords = _square_chords(values, target)
+                square = LpVariable(f"weighted_sq_{name}", 0)
+                cumulative = alpha * (work_count + carry_work[pn]) + beta * (off_count + carry_off[pn])
+                for slope, intercept in chords:
+                    self.prob += square >= slope * cumulative + intercept
+                # 편차 제곱을 FTE로 나눠 시간제 인원의 1회 차이를 더 크게 봄
+                objective_terms.append(square * (weight / self.person_fte[p_idx]))
+        return lpSum(objective_terms)
+
+    def _enforce_target_range(self, target_range):
+        # 1단계에서 찾은 최적의 '총 근무일 차이'를 강제하는 제약은 한 번만 추가하고, 이후에는 우변만 갱신
+        if self._enforce_range_constraint is None:
+            self.prob += (self.max_duties_across_people - self.min_duties_across_people) == target_range, "EnforcePrimaryFairness"
+            self._enforce_range_constraint = self.prob.constraints["EnforcePrimaryFairness"]
+        else:
+            self._enforce_range_constraint.constant = -target_range
+
+    def _add_squared_count_vars(self):
+        squared_vars = []
+        for label, carry_key, day_mask in (("weekday", "weekdayDuties", ~self.is_off),
+                                           ("weekend_holiday", "weekendOrHolidayDuties", self.is_off)):
+            dates = [self.schedule_date_strings[d_idx] for d_idx in np.flatnonzero(day_mask)]
+            if not dates:
+                continue
+            count_vars = LpVariable.dicts(f"{label}_duties", self.people_names, 0, len(dates), LpInteger)
+            square_vars = LpVariable.dicts(f"{label}_duties_sq", self.people_names, 0)
+            carry_counts = {pn: self._carry_count(pn, carry_key) for pn in self.people_names}
+            for pn in self.people_names:
+                self.prob += count_vars[pn] == lpSum(self.duty_vars[(pn, ds)] for ds in dates if (pn, ds) in self.duty_vars)
+                # 누적 횟수 x = (이전 기간 횟수 + 이번 기간 횟수)의 제곱을 정수 k, k+1 사이의 접선으로 표현:
+                # x^2 >= (2k+1)x - k(k+1)  (정수점에서 등호)
+                carry = carry_counts[pn]
+                for k in range(carry, carry + len(dates)):
+                    self.prob += square_vars[pn] >= (2 * k + 1) * (count_vars[pn] + carry) - k * (k + 1)
+                squared_vars.append(square_vars[pn])
+            self._count_var_groups.append((day_mask, count_vars, square_vars, carry_counts))
+        self._squared_count_vars = squared_vars
+
+    def _apply_mip_start(self, assignment_matrix):
+        """(인원 x 날짜) 배정 행렬로부터 모든 변수의 초기값을 채워 MIP start로 사용합니다."""
+        for var, assigned in zip(self._duty_var_list, assignment_matrix[self._duty_var_rows, self._duty_var_cols].tolist()):
+            var.setInitialValue(assigned)
+
+        totals = assignment_matrix.sum(axis=1).tolist()
+        for pn, total in zip(self.people_names, totals):
+            self.person_total_duties[pn].setInitialValue(total)
+        cumulative_totals = [total + self._carry_count(pn, "weekdayDuties") + self._carry_count(pn, "weekendOrHolidayDuties")
+                             for pn, total in zip(self.people_names, totals)]
+        self.max_duties_across_people.setInitialValue(max(cumulative_totals))
+        self.min_duties_across_people.setInitialValue(min(cumulative_totals))
+
+        for day_mask, count_vars, square_vars, carry_counts in self._count_var_groups:
+            for pn, count in zip(self.people_names, assignment_matrix[:, day_mask].sum(axis=1).tolist()):
+                count_vars[pn].setInitialValue(count)
+                square_vars[pn].setInitialValue((count + carry_counts[pn]) ** 2)
+
+    def _solve(self, mip_start=None, time_limit=None, solver_options=None):
+        prob = self.prob
+        warm_start = MIP_WARM_START and mip_start is not None
+        if warm_start:
+            self._apply_mip_start(mip_start)
+
+        with metrics.span("solve", self.size_labels):
+            solve_info = solvers.solve_problem(prob, solver_options or self.solver_options, warm_start=warm_start, time_limit=time_limit)
+
+        first_incumbent = solve_info["firstIncumbentSeconds"]
+        first_incumbent_text = f"{first_incumbent:.2f}s" if first_incumbent is not None else "-"
+        # 후보마다 호출되므로 DEBUG로만 기록
+        app.logger.debug(f"  {solve_info['backend']} 풀이 {solve_info['seconds']:.2f}s, 첫 정수해까지 {first_incumbent_text} (MIP start: {'사용' if warm_start else '없음'})")
+
+        # 시간 제한으로 중단되었더라도 정수해가 있으면 status는 Optimal, sol_status로 최적성 증명 여부를 구분
+        self.last_solution_proven = prob.sol_status == LpSolutionOptimal
+        if prob.status == LpStatusOptimal:
+            return self._extract_solution(), "Optimal"
+
+        status_map = {LpStatusInfeasible: "Infeasible"}
+        return None, status_map.get(prob.status, f"SolverError_{LpStatus[prob.status]}")
+
+    def _extract_solution(self):
+        """변수 값을 한 번에 읽어 (인원 x 날짜) 0/1 배정 행렬로 반환합니다. JSON 변환은 최종 해에 대해서만 수행합니다."""
+        with metrics.span("extract", self.size_labels):
+            values = np.fromiter((var.varValue or 0.0 for var in self._duty_var_list), dtype=float, count=len(self._duty_var_list))
+            assignment_matrix = np.zeros((len(self.people_names), len(self.schedule_date_strings)), dtype=np.int8)
+            assignment_matrix[self._duty_var_rows, self._duty_var_cols] = values > 0.5
+        self.last_matrix = assignment_matrix
+        return assignment_matrix
+
+
+# --- 코어 LP 솔버 함수 (단일 풀이용, DutyScheduleModel 래퍼) ---
+def _solve_single_schedule_lp(
+    start_date_str, end_date_str, people_data_input, duty_per_day_val, 
+    allow_consecutive_flag, extra_holidays_str_list,
+    objective_config=None # 예: {'type': 'PRIMARY_FAIRNESS'}, {'type': 'RANDOMIZED_SECONDARY', 'target_range': X}, {'type': 'WEIGHTED_TARGETS', 'duty_weights': {...}}
+):
+    model = DutyScheduleModel(
+        start_date_str, end_date_str, people_data_input, duty_per_day_val,
+        allow_consecutive_flag, extra_holidays_str_list
+    )
+
+    if objective_config and objective_config.get('type') == 'RANDOMIZED_SECONDARY':
+        assignment_matrix, status, achieved_range = model.solve_randomized_secondary(objective_config.get('target_range'))
+    elif objective_config and objective_config.get('type') == 'WEIGHTED_TARGETS':
+        assignment_matrix, status, achieved_range = model.solve_weighted_targets(objective_config.get('duty_weights', DEFAULT_DUTY_WEIGHTS))
+    else:
+        # 기본값 또는 잘못된 설정 시: PRIMARY_FAIRNESS로 동작
+        assignment_matrix, status, achieved_range = model.solve_primary_fairness()
+    if assignment_matrix is None:
+        return None, status, achieved_range
+    return render_assignment_matrix(model.people_names, model.day_calendar, assignment_matrix), status, achieved_range
+
+
+# --- 2단계 후보 병렬 풀이 (프로세스 풀) ---
+# 전역 상한: 동시에 여러 요청이 들어와도 전체 CBC 프로세스 수가 이 값을 넘지 않음
+MAX_SOLVER_WORKERS = max(1, int(os.environ.get('FAIRDUTY_MAX_WORKERS', os.cpu_count() or 1)))
+# 요청에서 parallelism을 지정하지 않았을 때의 기본 병렬도
+DEFAULT_PARALLELISM = max(1, int(os.environ.get('FAIRDUTY_DEFAULT_PARALLELISM', MAX_SOLVER_WORKERS)))
+# 워커에 한 번에 넘기는 후보 수 (작을수록 진행 상황/취소가 촘촘해지고, 클수록 전송 비용이 줄어듦)
+CANDIDATE_CHUNK_SIZE = max(1, int(os.environ.get('FAIRDUTY_CANDIDATE_CHUNK_SIZE', 5)))
+# 2단계 샘플링 기본값: 최대 시도 수, 그리고 최선 후보가 연속으로 개선되지 않으면 멈추는 시도 수
+SAMPLING_DEFAULT_MAX_ATTEMPTS = int(os.environ.get('FAIRDUTY_SAMPLING_MAX_ATTEMPTS', 100))
+SAMPLING_DEFAULT_STALL_ATTEMPTS = int(os.environ.get('FAIRDUTY_SAMPLING_STALL_ATTEMPTS', 20))
+# 요청의 maxAttempts 상한
+SAMPLING_MAX_ATTEMPTS_LIMIT = int(os.environ.get('FAIRDUTY_SAMPLING_MAX_ATTEMPTS_LIMIT', 500))
+
+_solver_pool = None
+_solver_pool_lock = threading.Lock()
+
+
+def _get_solver_pool():
+    """요청 간에 공유되는 프로세스 풀을 (처음 사용할 때) 생성합니다."""
+    global _solver_pool
+    with _solver_pool_lock:
+        if _solver_pool is None:
+            # Flask/gunicorn 스레드 안에서 fork 하지 않도록 spawn 컨텍스트 사용
+            _solver_pool = ProcessPoolExecutor(
+                max_workers=MAX_SOLVER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _solver_pool
+
+
+def _reset_solver_pool():
+    global _solver_pool
+    with _solver_pool_lock:
+        if _solver_pool is not None:
+            _solver_pool.shutdown(wait=False, cancel_futures=True)
+        _solver_pool = None
+
+
+def resolve_parallelism(requested):
+    """요청별 병렬도를 1 ~ MAX_SOLVER_WORKERS 범위로 맞춥니다."""
+    if requested is None:
+        requested = DEFAULT_PARALLELISM
+    return max(1, min(int(requested), MAX_SOLVER_WORKERS))
+
+
+def _solve_candidates_sequential(model, target_range, indexed_seeds, mip_start=None, on_results=None, should_stop=None):
+    """(시도 번호, 시드) 목록을 순서대로 풀어 (시도 번호, 배정 행렬, status) 리스트를 반환합니다.
+
+    MIP start는 주어진 해(1단계 해)에서 시작해 최선 후보로 갱신됩니다.
+    should_stop이 True를 반환하면 남은 시도를 건너뜁니다.
+    """
+    results = []
+    best_combined_variance = None
+    for attempt_index, seed in indexed_seeds:
+        if should_stop is not None and should_stop():
+            break
+        assignment_matrix, status, _ = model.solve_randomized_secondary(target_range, rng=random.Random(seed), mip_start=mip_start)
+        results.append((attempt_index, assignment_matrix, status))
+        if on_results is not None:
+            on_results(results[-1:])
+        if status == "Optimal" and assignment_matrix is not None:
+            combined_variance = sum(calculate_matrix_variances(assignment_matrix, model.is_off, model.carry_counts))
+            if best_combined_variance is None or combined_variance < best_combined_variance:
+                best_combined_variance = combined_variance
+                mip_start = assignment_matrix
+    return results
+
+
+# 워커 프로세스별로 마지막에 구성한 모델 (같은 요청의 다음 묶음에서 재사용)
+_worker_model_cache = {}
+
+
+def _solve_candidate_chunk(model_args, target_range, indexed_seeds, mip_start=None):
+    """워커 프로세스에서 실행: 모델을 (필요할 때만) 구성한 뒤 시드별 후보를 순서대로 풉니다.
+
+    (결과 리스트, 계측 값 목록)을 반환하며, 계측 값은 요청 프로세스에서 metrics.replay()로 다시 기록합니다.
+    """
+    with metrics.collect() as metric_events:
+        cache_key = hashlib.sha256(json.dumps(model_args, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        model = _worker_model_cache.get(cache_key)
+        if model is None:
+            _worker_model_cache.clear()
+            model = _worker_model_cache[cache_key] = DutyScheduleModel(*model_args)
+        results = _solve_candidates_sequential(model, target_range, indexed_seeds, mip_start)
+    return results, metric_events
+
+
+def _solve_candidates(model, model_args, target_range, candidate_seeds, parallelism, mip_start=None,
+                      on_results=None, should_stop=None):
+    """후보 시드 목록을 풀어 (시도 번호, 배정 행렬, status) 리스트를 시도 번호 순서대로 반환합니다.
+
+    후보는 CANDIDATE_CHUNK_SIZE개씩 묶어 풀고, 묶음마다 같은 mip_start에서 시작합니다. 각 후보의 목적 함수 계수는
+    자신의 시드로만 결정되므로 병렬도와 무관하게 결과가 같습니다. 병렬 풀이는 동시에 최대 parallelism개 묶음만
+    제출하므로, 묶음이 끝날 때마다 진행 상황을 알리고 should_stop으로 남은 묶음을 취소할 수 있습니다.
+    on_results는 묶음이 끝난 순서대로 호출되므로, 순서가 필요한 쪽에서 시도 번호로 정렬해야 합니다.
+    """
+    indexed_seeds = list(enumerate(candidate_seeds))
+    chunks = [indexed_seeds[i:i + CANDIDATE_CHUNK_SIZE] for i in range(0, len(indexed_seeds), CANDIDATE_CHUNK_SIZE)]
+    results = []
+    if parallelism <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            if should_stop is not None and should_stop():
+                break
+            results.extend(_solve_candidates_sequential(model, target_range, chunk, mip_start, on_results, should_stop))
+        return results
+
+    pending = {}
+    try:
+        pool = _get_solver_pool()
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            stopping = should_stop is not None and should_stop()
+            while not stopping and next_chunk < len(chunks) and len(pending) < parallelism:
+                future = pool.submit(_solve_candidate_chunk, model_args, target_range, chunks[next_chunk], mip_start)
+                pending[future] = next_chunk
+                next_chunk += 1
+            if stopping:
+                next_chunk = len(chunks)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                chunk_results, metric_events = future.result()
+                metrics.replay(metric_events)
+                results.extend(chunk_results)
+                if on_results is not None:
+                    on_results(chunk_results)
+    except BrokenProcessPool:
+        app.logger.exception("프로세스 풀 오류: 남은 후보를 현재 프로세스에서 순차적으로 풉니다.")
+        _reset_solver_pool()
+        solved = {attempt_index for attempt_index, _, _ in results}
+        for chunk in chunks:
+            remaining = [item for item in chunk if item[0] not in solved]
+            if remaining and not (should_stop is not None and should_stop()):
+                results.extend(_solve_candidates_sequential(model, target_range, remaining, mip_start, on_results, should_stop))
+    return sorted(results, key=lambda result: result[0])
+
+
+def _make_candidate(assignment_matrix, is_off, carry_counts=None):
+    """후보 점수 계산 (carry_counts가 있으면 이전 기간 누적을 더한 횟수의 분산)."""
+    num_people, num_days = assignment_matrix.shape
+    # 모든 날짜의 당직자 수가 같으므로 첫날 배정 수가 dutyPerDay
+    size_labels = metrics.problem_size_labels(num_people, num_days, int(assignment_matrix[:, 0].sum()) if num_days else 0)
+    with metrics.span("score", size_labels):
+        var_weekday, var_weekend_holiday = calculate_matrix_variances(assignment_matrix, is_off, carry_counts)
+    return {
+        "matrix": assignment_matrix, # (인원 x 날짜) 배정 행렬, dutyRoster/summary는 최종 선택 후에만 생성
+        "var_weekday": var_weekday,
+        "var_weekend_holiday": var_weekend_holiday,
+        "combined_variance": var_weekday + var_weekend_holiday # 이 값을 기준으로 최종 선택
+    }
+
+
+def _sample_candidates(model, model_args, target_range, num_attempts, parallelism, seed, mip_start=None,
+                       progress_callback=None, should_stop=None, on_new_best=None, stall_attempts=None, incumbent=None,
+                       time_budget_seconds=None):
+    """2단계(샘플링 모드): 무작위 목적 함수로 최대 num_attempts개의 후보를 풀고 분산을 계산합니다.
+
+    다음 중 하나가 되면 남은 시도를 건너뜁니다.
+      - 최선 후보의 분산 합이 하한(combined_variance_lower_bound)에 도달 ("lowerBound")
+      - 최선 후보가 stall_attempts번 연속 개선되지 않음 ("stalled")
+      - time_budget_seconds가 지남 ("timeBudget")
+      - should_stop이 True를 반환 ("cancelled")
+    끝까지 풀었으면 중단 사유는 "maxAttempts"입니다. 이미 나온 당직표와 같은 해는 해시로 걸러 다시 평가하지 않습니다.
+    결과는 끝난 순서와 무관하게 시도 번호 순서로 평가하고 멈춘 시도 이후의 결과는 버리므로,
+    seed가 같으면 (시간 예산/취소로 멈추지 않는 한) 병렬도와 무관하게 같은 시도에서 멈추고 같은 결과가 나옵니다.
+
+    (후보 목록, {"attemptsUsed", "stopReason", "duplicates"})를 반환합니다. 후보는 시도 번호 순서이므로,
+    같은 분산이면 앞선 시도가 선택됩니다. on_new_best는 최선 후보가 바뀔 때마다 그 후보로 호출되며,
+    incumbent(예: 1단계 해 후보)가 있으면 그보다 나은 후보부터 최선으로 봅니다.
+    """
+    started = time.monotonic()
+    candidate_solutions = []
+    completed = 0
+    duplicates = 0
+    seen_rosters = set()
+    best_combined_variance = incumbent['combined_variance'] if incumbent is not None else None
+    attempts_since_improvement = 0
+    variance_lower_bound = combined_variance_lower_bound(model.is_off, len(model.people_names), model.duty_per_day, model.carry_counts)
+    parallelism = resolve_parallelism(parallelism)
+    app.logger.info(f"2단계: 다양한 후보군 생성 시작 (최대 {num_attempts}개, 병렬도 {parallelism}, 분산 하한 {variance_lower_bound:.4f})")
+
+    def evaluate_attempt(attempt_index, attempt_matrix, attempt_status):
+        nonlocal completed, duplicates, best_combined_variance, attempts_since_improvement
+        completed += 1
+        attempts_since_improvement += 1
+        if attempt_status != "Optimal" or attempt_matrix is None:
+            app.logger.warning(f"  시도 {attempt_index+1}/{num_attempts} 실패 또는 최적해 없음: {attempt_status}")
+            return
+        roster_hash = hashlib.blake2b(attempt_matrix.tobytes(), digest_size=16).digest()
+        if roster_hash in seen_rosters:
+            duplicates += 1
+            app.logger.debug(f"  시도 {attempt_index+1}/{num_attempts}: 이전 후보와 같은 당직표 (건너뜀)")
+            return
+        seen_rosters.add(roster_hash)
+        candidate = _make_candidate(attempt_matrix, model.is_off, model.carry_counts)
+        candidate["attempt"] = attempt_index
+        candidate_solutions.append(candidate)
+        app.logger.debug(f"  후보 {len(candidate_solutions)} 생성됨 (시도 {attempt_index+1}/{num_attempts}) - 주중분산: {candidate['var_weekday']:.4f}, 주말분산: {candidate['var_weekend_holiday']:.4f}")
+        if best_combined_variance is None or candidate['combined_variance'] < best_combined_variance:
+            best_combined_variance = candidate['combined_variance']
+            attempts_since_improvement = 0
+            if on_new_best is not None:
+                on_new_best(candidate)
+
+    # 병렬 풀이에서 앞선 시도보다 먼저 끝난 결과 (시도 번호 -> (배정 행렬, status))
+    unprocessed_results = {}
+
+    def on_results(batch):
+        for attempt_index, attempt_matrix, attempt_status in batch:
+            unprocessed_results[attempt_index] = (attempt_matrix, attempt_status)
+        # 시도 번호가 이어지는 결과만 순서대로 평가하고, 멈춘 시도 이후의 결과는 버림
+        while stop_reason is None and completed in unprocessed_results:
+            evaluate_attempt(completed, *unprocessed_results.pop(completed))
+            stop_sampling()
+        if progress_callback is not None:
+            progress_callback({
+                "stage": 2,
+                "completed": completed,
+                "total": num_attempts,
+                "bestCombinedVariance": min((float(c['combined_variance']) for c in candidate_solutions), default=None),
+            })
+
+    # 후보별 시드를 미리 정해 두면 seed가 주어졌을 때 병렬도와 무관하게 같은 결과가 나옴
+    seed_rng = random.Random(seed)
+    candidate_seeds = [seed_rng.getrandbits(64) for _ in range(num_attempts)]
+
+    def current_stop_reason():
+        if should_stop is not None and should_stop():
+            return "cancelled"
+        if best_combined_variance is not None and best_combined_variance <= variance_lower_bound + VARIANCE_TOLERANCE:
+            return "lowerBound"
+        if completed >= num_attempts:
+            return "maxAttempts"
+        if time_budget_seconds is not None and time.monotonic() - started >= time_budget_seconds:
+            return "timeBudget"
+        if stall_attempts is not None and attempts_since_improvement >= stall_attempts:
+            return "stalled"
+        return None
+
+    # 처음 멈춘 사유 (이후 들어오는 결과는 평가하지 않음)
+    stop_reason = None
+
+    def stop_sampling():
+        nonlocal stop_reason
+        if stop_reason is None:
+            stop_reason = current_stop_reason()
+        return stop_reason is not None
+
+    _solve_candidates(model, model_args, target_range, candidate_seeds, parallelism, mip_start, on_results, stop_sampling)
+    stop_reason = stop_reason or current_stop_reason() or "maxAttempts"
+    app.logger.info(f"2단계 종료: {stop_reason} (시도 {completed}/{num_attempts}, 중복 {duplicates})")
+    sampling_info = {"attemptsUsed": completed, "stopReason": stop_reason, "duplicates": duplicates}
+    return sorted(candidate_solutions, key=lambda c: c['attempt']), sampling_info
 
 
 # --- 다단계 최적화 실행 함수 ---
 def generate_schedule_multi_stage(
     start_date, end_date, people_list_input, duties_per_day, 
-    no_consecutive, extra_holidays, num_attempts=50 # 시도 횟수 기본 50
+    no_consecutive, extra_holidays, num_attempts=50, # 2단계 최대 시도 횟수 (하한 도달/개선 정체/시간 예산으로 더 일찍 끝날 수 있음)
+    parallelism=None, seed=None,
+    optimization_mode='sampling', # 'sampling': 무작위 후보 샘플링, 'exact': 분산 직접 최소화, 'weighted': 가중 부담의 FTE 목표 편차 최소화
+    compare_with_sampling=False,
+    progress_callback=None, # 진행 상황 dict를 받는 콜백 (비동기 작업 API 등에서 사용)
+    should_stop=None, # True를 반환하면 남은 후보 시도를 중단 (취소)
+    solver_options=None, # 풀이 백엔드 설정 (solvers.resolve_solver_options 결과)
+    on_new_best=None, # 지금까지의 최선 후보가 바뀔 때마다 간단한 당직표 dict를 받는 콜백 (SSE 스트리밍용)
+    stall_attempts=None, # 최선 후보가 이 횟수만큼 연속으로 개선되지 않으면 남은 시도를 건너뜀
+    sampling_budget_seconds=None, # 2단계 샘플링에 쓸 최대 시간 (초)
+    holiday_region=None, # 공휴일 지역 (예: "KR", None이면 주말과 extra_holidays만 휴일)
+    duty_weights=None, # 가중 목표 모드의 당직 유형별 부담 가중치 {"weekday", "weekendOrHoliday"}
+    carry_in=None # 이전 기간 누적 {이름: {"weekdayDuties", "weekendOrHolidayDuties", "lastDutyDate"}}
 ):
     people_names_list = [p['name'] for p in people_list_input]
 
-    # 1단계: 개인별 총 당직 횟수 차이의 최적값 결정
-    app.logger.info("1단계: 최적의 총 당직일 차이 계산 시작")
-    initial_solution_data, initial_status, optimal_total_duty_range = _solve_single_schedule_lp(
+    def report(stage, **extra):
+        if progress_callback is not None:
+            progress_callback(dict(stage=stage, **extra))
+
+    def publish_best(candidate, source):
+        if on_new_best is not None:
+            on_new_best({
+                "source": source, # "stage1", "sampling", "exact", "weighted"
+                "attempt": candidate.get("attempt"),
+                "varWeekday": float(candidate['var_weekday']),
+                "varWeekendHoliday": float(candidate['var_weekend_holiday']),
+                "combinedVariance": float(candidate['combined_variance']),
+                "people": people_names_list,
+                "duty": render_compact_roster(candidate['matrix']),
+            })
+
+    # 모델(변수 + 제약조건)은 한 번만 구성하고, 이후 단계에서는 목적 함수만 교체하여 재사용
+    model_args = (
         start_date, end_date, people_list_input, duties_per_day,
         not no_consecutive, # allow_consecutive_flag 로 변환
         extra_holidays,
-        objective_config={'type': 'PRIMARY_FAIRNESS'}
+        carry_in,
+        solver_options or solvers.resolve_solver_options(), # 워커 프로세스에서도 같은 설정을 쓰도록 모델 인자에 포함
+        holiday_region
     )
+    model = DutyScheduleModel(*model_args)
+
+    if optimization_mode == 'weighted':
+        return _generate_weighted_schedule(model, duty_weights or DEFAULT_DUTY_WEIGHTS, report, publish_best)
+
+    # 1단계: 개인별 총 당직 횟수 차이의 최적값 결정
+    app.logger.info("1단계: 최적의 총 당직일 차이 계산 시작")
+    report(1)
+    initial_matrix, initial_status, optimal_total_duty_range = model.solve_primary_fairness()
 
     if initial_status != "Optimal" or optimal_total_duty_range is None:
         app.logger.error(f"1단계 실패: {initial_status}")
         error_message_map = {
             "Infeasible": "초기 조건으로 스케줄 생성이 불가능합니다 (1단계). 당직 불가일 등을 확인해주세요.",
-            "EmptyDateRange": "선택된 기간에 날짜가 없습니다."
+            "EmptyDateRange": "선택된 기간에 날짜가 없습니다.",
+            "PresolveInfeasible": model.presolve_error,
         }
         return None, error_message_map.get(initial_status, f"1단계 스케줄 생성 실패: {initial_status}")
 
     app.logger.info(f"1단계 완료: 최적 총 당직일 차이 = {optimal_total_duty_range}")
+    # 1단계 해는 이후 모든 단계의 제약(총 당직일 차이 고정 포함)을 만족하므로 MIP start로 재사용
+    stage1_matrix = initial_matrix
+    # 1단계 해도 그대로 쓸 수 있는 당직표이므로 2단계를 기다리지 않고 먼저 알리고, 3단계 선택 후보에도 포함
+    stage1_candidate = _make_candidate(initial_matrix, model.is_off, model.carry_counts)
+    publish_best(stage1_candidate, "stage1")
 
-    candidate_solutions = []
-    app.logger.info(f"2단계: 다양한 후보군 생성 시작 (목표 {num_attempts}개)")
-
-    for i in range(num_attempts):
-        attempt_solution_data, attempt_status, _ = _solve_single_schedule_lp(
-            start_date, end_date, people_list_input, duties_per_day,
-            not no_consecutive, # allow_consecutive_flag
-            extra_holidays,
-            objective_config={'type': 'RANDOMIZED_SECONDARY', 'target_range': optimal_total_duty_range}
+    sampling_info = None
+    if optimization_mode == 'exact':
+        # 2단계(정확 모드): 분산을 직접 최소화하는 모델 한 번으로 2·3단계를 대체
+        app.logger.info("2단계(정확 모드): 주중/주말 분산 최소화 모델 풀이 시작")
+        report(2, completed=0, total=1)
+        exact_matrix, exact_status, _ = model.solve_exact_variance(optimal_total_duty_range, mip_start=stage1_matrix)
+        if exact_status != "Optimal" or exact_matrix is None:
+            app.logger.error(f"2단계(정확 모드) 실패: {exact_status}")
+            return None, f"2단계(정확 모드) 스케줄 생성 실패: {exact_status}"
+        best_candidate = _make_candidate(exact_matrix, model.is_off, model.carry_counts)
+        publish_best(best_candidate, "exact")
+        solver_calls = 2
+    else:
+        report(2, completed=0, total=num_attempts)
+        candidate_solutions, sampling_info = _sample_candidates(
+            model, model_args, optimal_total_duty_range, num_attempts, parallelism, seed,
+            mip_start=stage1_matrix, progress_callback=progress_callback, should_stop=should_stop,
+            on_new_best=lambda candidate: publish_best(candidate, "sampling"), stall_attempts=stall_attempts,
+            incumbent=stage1_candidate, time_budget_seconds=sampling_budget_seconds
         )
 
-        if attempt_status == "Optimal" and attempt_solution_data:
-            var_weekday, var_weekend_holiday = calculate_variances(attempt_solution_data['summary'], people_names_list)
-            candidate_solutions.append({
-                "data": attempt_solution_data, # dutyRoster, summary 포함
-                "var_weekday": var_weekday,
-                "var_weekend_holiday": var_weekend_holiday,
-                "combined_variance": var_weekday + var_weekend_holiday # 이 값을 기준으로 최종 선택
-            })
-            app.logger.info(f"  후보 {len(candidate_solutions)} 생성됨 (시도 {i+1}/{num_attempts}) - 주중분산: {var_weekday:.4f}, 주말분산: {var_weekend_holiday:.4f}")
-        else:
-             app.logger.warning(f"  시도 {i+1}/{num_attempts} 실패 또는 최적해 없음: {attempt_status}")
+        # 일찍 멈춘 경우에는 후보가 없어도 1단계 해를 반환하고, 끝까지 풀었는데 후보가 없을 때만 실패로 처리
+        if not candidate_solutions and sampling_info["stopReason"] == "maxAttempts":
+            app.logger.error("2단계 실패: 유효한 후보 스케줄을 하나도 생성하지 못했습니다.")
+            return None, "2단계에서 유효한 후보 스케줄을 찾지 못했습니다. 초기 조건이 너무 엄격할 수 있습니다."
 
+        app.logger.info(f"2단계 완료: 총 {len(candidate_solutions)}개의 후보 스케줄 생성됨")
+        app.logger.info("3단계: 최종 스케줄 선택 시작")
 
-    if not candidate_solutions:
-        app.logger.error("2단계 실패: 유효한 후보 스케줄을 하나도 생성하지 못했습니다.")
-        return None, "2단계에서 유효한 후보 스케줄을 찾지 못했습니다. 초기 조건이 너무 엄격할 수 있습니다."
-    
-    app.logger.info(f"2단계 완료: 총 {len(candidate_solutions)}개의 후보 스케줄 생성됨")
-    app.logger.info("3단계: 최종 스케줄 선택 시작")
+        # 3단계: 분산이 가장 낮은 스케줄 선택
+        report(3)
+        # 1단계 해는 마지막에 두어, 분산이 같으면 샘플링 후보가 선택되도록 함
+        best_candidate = min(candidate_solutions + [stage1_candidate], key=lambda s: s['combined_variance'])
+        solver_calls = 1 + sampling_info["attemptsUsed"]
 
-    # 3단계: 분산이 가장 낮은 스케줄 선택
-    best_candidate = min(candidate_solutions, key=lambda s: s['combined_variance'])
-    
     app.logger.info(f"3단계 완료: 최종 스케줄 선택됨 (주중분산: {best_candidate['var_weekday']:.4f}, 주말분산: {best_candidate['var_weekend_holiday']:.4f})")
-    
-    return best_candidate['data'], "OptimalMultiStage"
 
+    stats = {
+        "mode": optimization_mode,
+        "solverCalls": solver_calls,
+        "varWeekday": float(best_candidate['var_weekday']),
+        "varWeekendHoliday": float(best_candidate['var_weekend_holiday']),
+        "combinedVariance": float(best_candidate['combined_variance']),
+    }
+    if sampling_info is not None:
+        stats.update(sampling_info)
 
-# --- Flask API 엔드포인트 ---
-@app.route('/api/schedule', methods=['POST'])
-def create_schedule_route():
-    data = request.get_json()
-    start_date = data.get('startDate')
-    end_date = data.get('endDate')
-    people_data_input = data.get('people', [])
-    no_consecutive_frontend = data.get('noConsecutive', True) # 프론트엔드: true=연속당직금지
-    duty_per_day = data.get('dutyPerDay', 1)
-    extra_holidays_list_input = data.get('extraHolidays', [])
-
-    if not start_date or not end_date or not people_data_input or duty_per_day < 0:
-        return jsonify({"error": "필수 정보가 부족합니다. 시작일, 종료일, 인원 목록, 일일 당직자 수를 확인해주세요."}), 400
-    
-    if len(people_data_input) < duty_per_day :
-        return jsonify({"error": f"전체 인원({len(people_data_input)}명)이 하루 당직자 수({duty_per_day}명)보다 적습니다."}), 400
+    if optimization_mode == 'exact' and compare_with_sampling:
+        # 품질 비교용: 같은 모델로 기존 샘플링 방식을 실행해 분산 차이를 함께 보고
+        sampled, compared_info = _sample_candidates(
+            model, model_args, optimal_total_duty_range, num_attempts, parallelism, seed,
+            mip_start=stage1_matrix
+        )
+        if sampled:
+            sampled_best = min(sampled, key=lambda s: s['combined_variance'])
+            stats["samplingComparison"] = {
+                "solverCalls": 1 + compared_info["attemptsUsed"],
+                "varWeekday": float(sampled_best['var_weekday']),
+                "varWeekendHoliday": float(sampled_best['var_weekend_holiday']),
+                "combinedVariance": float(sampled_best['combined_variance']),
+                "combinedVarianceImprovement": float(sampled_best['combined_variance'] - best_candidate['combined_variance']),
+            }
+
+    # 후보 비교는 행렬로만 하고, JSON 당직표는 최종 선택된 해에 대해서만 생성
+    result = render_assignment_matrix(people_names_list, model.day_calendar, best_candidate['matrix'])
+    return dict(result, stats=stats), "OptimalMultiStage"
+
+
+def _generate_weighted_schedule(model, duty_weights, report, publish_best):
+    """가중 목표 모드: 단계 구분 없이 가중 부담의 FTE 목표 편차를 최소화하는 모델을 한 번 풉니다."""
+    app.logger.info("가중 목표 모드: 가중 부담 목표 편차 최소화 모델 풀이 시작")
+    report(1)
+    matrix, status, _ = model.solve_weighted_targets(duty_weights)
+    if status != "Optimal" or matrix is None:
+        app.logger.error(f"가중 목표 모드 실패: {status}")
+        error_message_map = {
+            "Infeasible": "주어진 조건으로 스케줄 생성이 불가능합니다. 당직 불가일과 최소/최대 당직 수(minDuties, maxDuties)를 확인해주세요.",
+            "EmptyDateRange": "선택된 기간에 날짜가 없습니다.",
+            "PresolveInfeasible": model.presolve_error,
+        }
+        return None, error_message_map.get(status, f"가중 목표 스케줄 생성 실패: {status}")
+
+    candidate = _make_candidate(matrix, model.is_off, model.carry_counts)
+    publish_best(candidate, "weighted")
+    loads, targets = model.weighted_loads(matrix, duty_weights["weekday"], duty_weights["weekendOrHoliday"])
+    deviations = np.abs(loads - targets)
+
+    result = render_assignment_matrix(model.people_names, model.day_calendar, matrix)
+    result["summary"] = [dict(item, fte=float(model.person_fte[p_idx]), weightedLoad=float(loads[p_idx]),
+                              targetLoad=round(float(targets[p_idx]), 4))
+                         for p_idx, item in enumerate(result["summary"])]
+    result["stats"] = {
+        "mode": "weighted",
+        "solverCalls": 1,
+        "dutyWeights": duty_weights,
+        "weightedDeviation": round(float(deviations.sum()), 4),
+        "maxWeightedDeviation": round(float(deviations.max()), 4),
+        "optimalityProven": model.last_solution_proven, # gapRel 이내로 증명되었는지 (시간 제한에 걸렸으면 False)
+        "varWeekday": float(candidate['var_weekday']),
+        "varWeekendHoliday": float(candidate['var_weekend_holiday']),
+        "combinedVariance": float(candidate['combined_variance']),
+    }
+    return result, "OptimalWeighted"
+
+
+# --- 지연 시간 예산 내 스케줄 생성 (휴리스틱 우선, MILP 보완) ---
+# 예산 중 휴리스틱(탐욕 배정 + 지역 탐색)에 쓰는 비율. 나머지는 필요할 때 MILP에 사용
+HEURISTIC_BUDGET_FRACTION = float(os.environ.get('FAIRDUTY_HEURISTIC_BUDGET_FRACTION', 0.3))
+# 남은 시간이 이보다 적으면 MILP를 시작하지 않음 (모델 구성 + CBC 기동 비용)
+MIN_MILP_SECONDS = 0.5
+
+
+def generate_schedule_within_budget(
+    start_date, end_date, people_list_input, duties_per_day,
+    no_consecutive, extra_holidays, latency_budget_ms, seed=None, solver_options=None, holiday_region=None
+):
+    """latency_budget_ms 안에서 찾은 최선의 스케줄을 반환합니다.
+
+    휴리스틱이 1단계 하한(총 당직일 차이)에 도달하면 MILP 없이 바로 반환하고,
+    그렇지 않으면 남은 시간 동안 휴리스틱 해를 MIP start로 삼아 MILP(1단계 → 정확 모드 2단계)를 풉니다.
+    """
+    started = time.monotonic()
+    deadline = started + latency_budget_ms / 1000.0
+    people_names_list = [p['name'] for p in people_list_input]
+    allow_consecutive = not no_consecutive
+
+    day_calendar = build_day_calendar(start_date, end_date, extra_holidays, holiday_region)
+    if not len(day_calendar):
+        return None, "선택된 기간에 날짜가 없습니다."
+    available, is_off = build_availability_arrays(day_calendar, people_list_input)
+    _, presolve_error = presolve_availability(available, duties_per_day, allow_consecutive, day_calendar)
+    if presolve_error is not None:
+        return None, presolve_error
+    range_lower_bound = heuristic.total_range_lower_bound(len(people_names_list), len(day_calendar), duties_per_day)
+
+    heuristic_deadline = started + (deadline - started) * HEURISTIC_BUDGET_FRACTION
+    best_matrix = heuristic.solve_heuristic(available, is_off, duties_per_day, allow_consecutive, heuristic_deadline, seed=seed)
+    best_score = heuristic.evaluate(best_matrix, is_off) if best_matrix is not None else None
+    mode = "heuristic"
+    app.logger.info(f"휴리스틱 완료: {best_score} (하한 {range_lower_bound}, {time.monotonic() - started:.2f}s)")
+
+    if best_score is None or best_score[0] > range_lower_bound:
+        # 휴리스틱이 하한에 도달하지 못한 경우에만 남은 예산으로 MILP 실행
+        model = None
+        if deadline - time.monotonic() > MIN_MILP_SECONDS:
+            model = DutyScheduleModel(start_date, end_date, people_list_input, duties_per_day, allow_consecutive, extra_holidays,
+                                      solver_options=solver_options, holiday_region=holiday_region)
+        mip_start = best_matrix
+
+        stage1_range = None
+        remaining = deadline - time.monotonic()
+        if model is not None and remaining > MIN_MILP_SECONDS:
+            _, status, stage1_range = model.solve_primary_fairness(mip_start=mip_start, time_limit=remaining)
+            if status == "Optimal" and model.last_solution_proven:
+                # MILP가 증명한 1단계 최적값이 자명한 하한보다 정확한 하한
+                range_lower_bound = max(range_lower_bound, int(stage1_range))
+            if status == "Optimal":
+                candidate = model.last_matrix
+                candidate_score = heuristic.evaluate(candidate, is_off)
+                if best_score is None or candidate_score < best_score:
+                    best_matrix, best_score, mode = candidate, candidate_score, "heuristic+milp"
+                mip_start = model.last_matrix
+
+        remaining = deadline - time.monotonic()
+        if stage1_range is not None and model.last_solution_proven and remaining > MIN_MILP_SECONDS:
+            _, status, _ = model.solve_exact_variance(stage1_range, mip_start=mip_start, time_limit=remaining)
+            if status == "Optimal":
+                candidate = model.last_matrix
+                candidate_score = heuristic.evaluate(candidate, is_off)
+                if candidate_score < best_score:
+                    best_matrix, best_score, mode = candidate, candidate_score, "heuristic+milp"
+
+    if best_matrix is None:
+        app.logger.error("예산 내 스케줄 생성 실패: 가능한 배정을 찾지 못했습니다.")
+        return None, "주어진 시간 안에 가능한 스케줄을 찾지 못했습니다. 당직 불가일 등을 확인하거나 시간 예산을 늘려주세요."
+
+    result = render_assignment_matrix(people_names_list, day_calendar, best_matrix)
+    var_weekday, var_weekend_holiday = calculate_matrix_variances(best_matrix, is_off)
+    result["stats"] = {
+        "mode": mode,
+        "latencyBudgetMs": latency_budget_ms,
+        "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+        "totalDutyRange": best_score[0],
+        "totalDutyRangeLowerBound": range_lower_bound,
+        "varWeekday": float(var_weekday),
+        "varWeekendHoliday": float(var_weekend_holiday),
+        "combinedVariance": float(var_weekday + var_weekend_holiday),
+    }
+    return result, "OptimalWithinBudget" if best_score[0] <= range_lower_bound else "BestWithinBudget"
+
+
+# --- 롤링 호라이즌 (긴 기간을 겹치는 구간으로 나눠 순차 풀이) ---
+# 구간 사이 겹침 일수 기본값: 다음 구간의 첫 며칠을 미리 고려해 경계에서 무리한 배정을 피함
+HORIZON_DEFAULT_OVERLAP_DAYS = 7
+
+
+def generate_schedule_rolling_horizon(
+    start_date, end_date, people_list_input, duties_per_day,
+    no_consecutive, extra_holidays, window_days, overlap_days=HORIZON_DEFAULT_OVERLAP_DAYS,
+    progress_callback=None, should_stop=None, solver_options=None, holiday_region=None, carry_in=None
+):
+    """기간을 window_days일 구간으로 나눠 앞에서부터 차례로 풀고 하나의 당직표로 잇습니다.
+
+    각 구간은 (window_days + overlap_days)일을 풀되 앞의 window_days일만 확정하고,
+    확정된 배정으로 개인별 누적 주중/주말·공휴일 횟수와 마지막 당직일을 다음 구간에 넘깁니다.
+    구간마다 1단계(누적 총 당직일 차이) → 정확 모드 2단계(누적 횟수 제곱합)를 풀므로
+    기간 전체의 공정성이 단일 모델과 가깝게 유지됩니다.
+    """
+    people_names_list = [p['name'] for p in people_list_input]
+    allow_consecutive = not no_consecutive
+    day_calendar = build_day_calendar(start_date, end_date, extra_holidays, holiday_region)
+    if not len(day_calendar):
+        return None, "선택된 기간에 날짜가 없습니다."
+
+    num_days = len(day_calendar)
+    window_starts = list(range(0, num_days, window_days))
+    is_off = day_calendar.is_off
+    # 첫 구간은 이전 기간 누적(carry_in)에서 시작
+    initial_carry_in = carry_in or {}
+    carry_in = {pn: dict({"weekdayDuties": 0, "weekendOrHolidayDuties": 0, "lastDutyDate": None}, **initial_carry_in.get(pn, {}))
+                for pn in people_names_list}
+    assignment_matrix = np.zeros((len(people_names_list), num_days), dtype=np.int8)
+
+    for window_index, window_start in enumerate(window_starts):
+        if should_stop is not None and should_stop():
+            return None, "스케줄 생성이 취소되었습니다."
+        if progress_callback is not None:
+            progress_callback({"stage": "horizon", "window": window_index + 1, "windows": len(window_starts)})
+
+        commit_end = min(window_start + window_days, num_days)
+        solve_end = min(commit_end + overlap_days, num_days)
+        window_first, window_last = day_calendar.dates[window_start], day_calendar.dates[solve_end - 1]
+        app.logger.info(f"구간 {window_index + 1}/{len(window_starts)}: {window_first} ~ {window_last}")
+
+        model = DutyScheduleModel(window_first, window_last, people_list_input, duties_per_day,
+                                  allow_consecutive, extra_holidays, carry_in=carry_in, solver_options=solver_options,
+                                  holiday_region=holiday_region)
+        _, status, window_range = model.solve_primary_fairness()
+        if status == "Optimal":
+            _, status, _ = model.solve_exact_variance(window_range, mip_start=model.last_matrix)
+        if status != "Optimal":
+            app.logger.error(f"구간 {window_index + 1} 실패: {status}")
+            if model.presolve_error is not None:
+                return None, model.presolve_error
+            return None, f"{window_first} ~ {window_last} 구간의 스케줄을 만들 수 없습니다 ({status}). 당직 불가일 등을 확인해주세요."
+
+        # 겹치는 날짜는 다음 구간에서 다시 풀도록 버리고, 확정 구간의 배정만 누적
+        committed = model.last_matrix[:, :commit_end - window_start]
+        assignment_matrix[:, window_start:commit_end] = committed
+        committed_off = committed[:, is_off[window_start:commit_end]].sum(axis=1)
+        committed_work = committed.sum(axis=1) - committed_off
+        for p_idx, pn in enumerate(people_names_list):
+            carry_in[pn]["weekdayDuties"] += int(committed_work[p_idx])
+            carry_in[pn]["weekendOrHolidayDuties"] += int(committed_off[p_idx])
+            duty_days = np.flatnonzero(committed[p_idx])
+            if len(duty_days):
+                carry_in[pn]["lastDutyDate"] = day_calendar.dates[window_start + duty_days[-1]]
+
+    result = render_assignment_matrix(people_names_list, day_calendar, assignment_matrix)
+    var_weekday, var_weekend_holiday = calculate_matrix_variances(assignment_matrix, is_off)
+    totals = assignment_matrix.sum(axis=1)
+    result["stats"] = {
+        "mode": "horizon",
+        "windows": len(window_starts),
+        "windowDays": window_days,
+        "overlapDays": overlap_days,
+        "solverCalls": 2 * len(window_starts),
+        "totalDutyRange": int(totals.max() - totals.min()),
+        "varWeekday": float(var_weekday),
+        "varWeekendHoliday": float(var_weekend_holiday),
+        "combinedVariance": float(var_weekday + var_weekend_holiday),
+    }
+    return result, "OptimalRollingHorizon"
+
+
+# --- 부분 재스케줄링 (가용성 변경 시 기존 당직표 수리) ---
+# 우선순위별 풀이 한 번에 허용하는 시간 (부분 문제는 작으므로 보통 1초 미만)
+REPAIR_STAGE_TIME_LIMIT_SECONDS = float(os.environ.get('FAIRDUTY_REPAIR_STAGE_TIME_LIMIT_SECONDS', 10))
+
+
+def _roster_to_matrix(duty_roster, people_names, day_calendar):
+    """기존 dutyRoster를 (인원 x 날짜) 배정 행렬로 변환합니다. 현재 인원 목록에 없는 이름은 무시됩니다."""
+    person_index = {pn: i for i, pn in enumerate(people_names)}
+    matrix = np.zeros((len(people_names), len(day_calendar)), dtype=np.int8)
+    for entry in duty_roster:
+        d_idx = day_calendar.date_index.get(entry.get('date'))
+        if d_idx is None:
+            continue
+        for pn in (name.strip() for name in (entry.get('duty') or '').split(',')):
+            if pn in person_index:
+                matrix[person_index[pn], d_idx] = 1
+    return matrix
+
+
+def _roster_people(duty_roster):
+    """기존 dutyRoster에 한 번이라도 배정된 이름 집합."""
+    return {pn for entry in duty_roster for pn in (name.strip() for name in (entry.get('duty') or '').split(',')) if pn}
+
+
+def _solve_repair_lp(prior, available, is_off, free_days, duty_per_day, allow_consecutive, max_moves, solver_options,
+                     min_duties=None, max_duties=None):
+    """free_days 밖의 배정은 고정하고, free_days 안에서만 다시 배정하는 작은 LP를 풉니다.
+
+    min_duties/max_duties(개인별 배열)가 주어지면 개인별 총 당직 수를 그 범위로 제한합니다.
+    우선순위: 총 당직일 차이 → 주말·공휴일 당직 차이 → 바뀌는 배정 수.
+    성공 시 새 배정 행렬, 실패 시 None을 반환합니다.
+    """
+    num_people, num_days = prior.shape
+    free_mask = np.zeros(num_days, dtype=bool)
+    free_mask[free_days] = True
+    fixed = prior * ~free_mask # 고정되는 배정
+
+    prob = LpProblem("DutyRepair", LpMinimize)
+    x = {}
+    for p_idx in range(num_people):
+        for d_idx in free_days:
+            if not available[p_idx, d_idx]:
+                continue
+            # 고정된 이웃 날짜에 당직이 있으면 연속 당직이 되므로 변수 자체를 만들지 않음
+            if not allow_consecutive and any(
+                0 <= n_idx < num_days and not free_mask[n_idx] and fixed[p_idx, n_idx]
+                for n_idx in (d_idx - 1, d_idx + 1)
+            ):
+                continue
+            x[(p_idx, d_idx)] = LpVariable(f"x_{p_idx}_{d_idx}", 0, 1, LpInteger)
+
+    for d_idx in free_days:
+        prob += lpSum(x[(p_idx, d_idx)] for p_idx in range(num_people) if (p_idx, d_idx) in x) == duty_per_day
+
+    if not allow_consecutive:
+        for p_idx in range(num_people):
+            for d_idx in free_days:
+                if (p_idx, d_idx) in x and (p_idx, d_idx + 1) in x:
+                    prob += x[(p_idx, d_idx)] + x[(p_idx, d_idx + 1)] <= 1
+
+    fixed_totals = fixed.sum(axis=1)
+    fixed_off = fixed[:, is_off].sum(axis=1)
+    # 최대/최소 변수를 정수로 두어야 CBC가 하한을 올림해 최적성을 빨리 증명함
+    max_total = LpVariable("max_total", 0, cat=LpInteger)
+    min_total = LpVariable("min_total", 0, cat=LpInteger)
+    max_off = LpVariable("max_off", 0, cat=LpInteger)
+    min_off = LpVariable("min_off", 0, cat=LpInteger)
+    for p_idx in range(num_people):
+        person_vars = [var for (vp, _), var in x.items() if vp == p_idx]
+        person_off_vars = [var for (vp, vd), var in x.items() if vp == p_idx and is_off[vd]]
+        total = int(fixed_totals[p_idx]) + lpSum(person_vars)
+        off_total = int(fixed_off[p_idx]) + lpSum(person_off_vars)
+        prob += max_total >= total
+        prob += min_total <= total
+        prob += max_off >= off_total
+        prob += min_off <= off_total
+        if min_duties is not None:
+            prob += total >= int(min_duties[p_idx])
+            prob += total <= int(max_duties[p_idx])
+
+    # 기존 배정 중 유지 가능한데 빠지는 것의 수 (불가능해진 배정은 어차피 바뀌므로 제외)
+    moves = lpSum(1 - var for key, var in x.items() if prior[key])
+    if max_moves is not None:
+        prob += moves <= max_moves
+
+    # 큰 가중치를 섞은 단일 목적 함수는 솔버가 잘 풀지 못하므로, 우선순위대로 풀고 각 최적값을 제약으로 고정
+    for name, objective in (("TotalRange", max_total - min_total), ("OffRange", max_off - min_off), ("Moves", moves)):
+        prob.objective = objective
+        solvers.solve_problem(prob, solver_options, time_limit=REPAIR_STAGE_TIME_LIMIT_SECONDS)
+        if prob.status != LpStatusOptimal:
+            return None
+        prob += objective <= round(value(objective)), f"Fix{name}"
+
+    repaired = fixed.copy()
+    for (p_idx, d_idx), var in x.items():
+        if var.varValue is not None and var.varValue > 0.5:
+            repaired[p_idx, d_idx] = 1
+    return repaired
+
+
+def repair_schedule(
+    start_date, end_date, people_list_input, duties_per_day,
+    no_consecutive, extra_holidays, duty_roster, repair_radius=2, max_moves=None, changed_dates=None,
+    solver_options=None, holiday_region=None
+):
+    """가용성/인원 변경 후 기존 당직표를 최소한으로 수정합니다.
+
+    배정이 불가능해진 날짜(당직자가 불가일로 바뀌었거나 인원 목록에서 빠진 날짜)와 changed_dates를
+    영향 날짜로 보고, 그 앞뒤 repair_radius일만 다시 풉니다. 나머지 배정은 그대로 유지됩니다.
+    인원이 추가되거나 빠졌으면 새 인원에게도 당직이 돌아가도록 전체 기간을 다시 풀되, 바뀌는 배정 수를 최소화합니다.
+    빠진 인원의 기존 배정은 movedAssignments와 changes에 포함되지만, 어차피 바뀌어야 하므로 max_moves에는 세지 않습니다.
+    """
+    people_names = [p['name'] for p in people_list_input]
+    allow_consecutive = not no_consecutive
+    day_calendar = build_day_calendar(start_date, end_date, extra_holidays, holiday_region)
+    if not len(day_calendar):
+        return None, "선택된 기간에 날짜가 없습니다."
+
+    available, is_off = build_availability_arrays(day_calendar, people_list_input)
+    _, min_duties, max_duties = build_capacity_arrays(people_list_input, len(day_calendar))
+    roster_people = _roster_people(duty_roster)
+    added_people = [pn for pn in people_names if pn not in roster_people]
+    removed_people = sorted(roster_people - set(people_names))
+    # 빠진 인원은 people_names 뒤의 행으로 두어 변경 내역에만 쓰고, LP에는 현재 인원 행만 넘김
+    roster_names = people_names + removed_people
+    original = _roster_to_matrix(duty_roster, roster_names, day_calendar)
+    # 불가일로 바뀐 배정은 제거한 뒤, 하루 인원이 모자라는 날을 영향 날짜로 봄
+    prior = original[:len(people_names)] * available
+    affected = prior.sum(axis=0) != duties_per_day
+    for ds in changed_dates or []:
+        if ds in day_calendar.date_index:
+            affected[day_calendar.date_index[ds]] = True
+    affected_days = np.flatnonzero(affected)
+
+    if len(affected_days) == 0 and not added_people and not removed_people:
+        result = render_assignment_matrix(people_names, day_calendar, original)
+        result["repair"] = {"affectedDates": [], "freedDates": [], "movedAssignments": 0, "changes": [],
+                            "addedPeople": [], "removedPeople": []}
+        return result, "Unchanged"
+
+    num_days = len(day_calendar)
+    repaired = None
+    # 주어진 반경으로 풀리지 않으면 반경을 넓혀 한 번 더 시도 (인원 변경 시에는 전체 기간을 한 번에 풂)
+    radii = (None,) if added_people or removed_people else (repair_radius, max(1, repair_radius) * 2)
+    for radius in radii:
+        free_mask = np.zeros(num_days, dtype=bool)
+        if radius is None:
+            free_mask[:] = True
+        for d_idx in affected_days:
+            free_mask[max(0, d_idx - (radius or 0)):min(num_days, d_idx + (radius or 0) + 1)] = True
+        free_days = [int(d_idx) for d_idx in np.flatnonzero(free_mask)]
+        repaired = _solve_repair_lp(prior, available, is_off, free_days, duties_per_day, allow_consecutive, max_moves,
+                                    solver_options or solvers.resolve_solver_options(), min_duties, max_duties)
+        if repaired is not None:
+            break
+        app.logger.warning(f"부분 재스케줄링 실패 (반경 {radius}일)")
+
+    if repaired is None:
+        return None, "변경된 범위 안에서 당직표를 수정할 수 없습니다. 이동 허용 수(maxMoves)를 늘리거나 전체 스케줄을 다시 생성해주세요."
+
+    result = render_assignment_matrix(people_names, day_calendar, repaired)
+    repaired = np.vstack([repaired, np.zeros((len(removed_people), num_days), dtype=repaired.dtype)])
+    changes = []
+    for d_idx in np.flatnonzero((repaired != original).any(axis=0)):
+        changes.append({
+            "date": day_calendar.dates[d_idx],
+            "removed": [roster_names[p_idx] for p_idx in np.flatnonzero(original[:, d_idx] & ~repaired[:, d_idx])],
+            "added": [roster_names[p_idx] for p_idx in np.flatnonzero(repaired[:, d_idx] & ~original[:, d_idx])],
+        })
+
+    result["repair"] = {
+        "affectedDates": [day_calendar.dates[d_idx] for d_idx in affected_days],
+        "freedDates": [day_calendar.dates[d_idx] for d_idx in free_days],
+        "radius": radius, # 인원 변경으로 전체 기간을 다시 풀었으면 None
+        "movedAssignments": int((original & ~repaired).sum()),
+        "changes": changes,
+        "addedPeople": added_people,
+        "removedPeople": removed_people,
+    }
+    return result, "Repaired"
+
+
+# --- 결과 캐시 ---
+schedule_result_cache = ScheduleResultCache(
+    max_entries=int(os.environ.get('FAIRDUTY_CACHE_MAX_ENTRIES', 256)), # 0이면 캐시 비활성화
+    ttl_seconds=int(os.environ.get('FAIRDUTY_CACHE_TTL_SECONDS', 3600)),
+    disk_dir=os.environ.get('FAIRDUTY_CACHE_DIR') or None # 지정 시 워커 재시작 후에도 유지
+)
+
+# 결과에 영향을 주는 요청 파라미터 (parallelism은 결과와 무관하므로 제외)
+_CACHE_KEY_PARAMS = (
+    'startDate', 'endDate', 'people', 'noConsecutive', 'dutyPerDay', 'extraHolidays', 'holidayRegion',
+    'seed', 'optimizationMode', 'compareWithSampling', 'latencyBudgetMs',
+    'horizonWindowDays', 'horizonOverlapDays', 'solver', 'maxAttempts', 'stallAttempts', 'samplingBudgetMs', 'dutyWeights',
+    'carryIn'
+)
+
+# --- 게시된 당직표 이력 (팀별 누적 공정성) ---
+# SQLite 파일 경로 (지정하지 않으면 이력 기능 비활성화)
+HISTORY_DB_PATH = os.environ.get('FAIRDUTY_HISTORY_DB') or None
+roster_history_store = RosterHistoryStore(HISTORY_DB_PATH) if HISTORY_DB_PATH else None
+
+
+def history_carry_in(team_id, start_date, people_names, relative=True):
+    """팀 이력에서 start_date 이전 누적을 읽어 현재 인원의 carry_in으로 만듭니다.
+
+    relative이면 누적 횟수를 유형별로 현재 인원 중 최솟값을 뺀 차이로 바꿉니다. sampling/exact 모드의 목적(총 당직일 차이,
+    분산)은 모든 사람에게 같은 값을 더해도 달라지지 않으므로 결과는 같고, 이력이 없는 새 인원은 기존 인원 중 가장 적게
+    선 사람과 같은 위치에서 시작합니다. 가중 목표 모드는 누적 부담을 FTE 비율로 나눈 목표와 비교하므로 이 이동에 따라
+    결과가 달라지며, relative=False로 이력의 누적 횟수를 그대로 씁니다 (이력이 없는 사람은 0).
+    """
+    history = roster_history_store.carry_in(str(team_id), start_date)
+    carry_in = {pn: {"weekdayDuties": 0, "weekendOrHolidayDuties": 0, "lastDutyDate": history.get(pn, {}).get("lastDutyDate")}
+                for pn in people_names}
+    for key in ("weekdayDuties", "weekendOrHolidayDuties"):
+        floor = min((history[pn][key] for pn in people_names if pn in history), default=0) if relative else 0
+        for pn in people_names:
+            if pn in history:
+                carry_in[pn][key] = history[pn][key] - floor
+    return carry_in
+
+
+# 인원별 용량/목표 필드 (가중 목표 모드와 최소/최대 당직 수)
+_CAPACITY_PERSON_FIELDS = ('fte', 'minDuties', 'maxDuties')
+
+
+def _reorder_summary(result, people_names):
+    """캐시 키는 인원 순서와 무관하므로, 반환 전에 summary를 요청한 인원 순서로 맞춥니다."""
+    order = {pn: i for i, pn in enumerate(people_names)}
+    return dict(result, summary=sorted(result['summary'], key=lambda item: order.get(item['person'], len(order))))
+
+
+# --- 요청 파싱 및 실행 ---
+def _uses_capacity_targets(params):
+    """가중 목표 모드이거나 인원에 fte/minDuties/maxDuties가 지정된 요청인지 여부."""
+    return params['optimizationMode'] == 'weighted' or any(
+        p_data.get(field) is not None for p_data in params['people'] for field in _CAPACITY_PERSON_FIELDS
+    )
+
+
+def _validate_capacity_fields(params):
+    """dutyWeights와 인원별 fte/minDuties/maxDuties를 검증해 오류 메시지 또는 None을 반환합니다."""
+    duty_weights = params['dutyWeights']
+    if duty_weights is not None:
+        if not isinstance(duty_weights, dict) or set(duty_weights) - set(DEFAULT_DUTY_WEIGHTS):
+            return "dutyWeights는 weekday, weekendOrHoliday 가중치를 담은 객체여야 합니다."
+        if any(isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0 for weight in duty_weights.values()):
+            return "dutyWeights의 가중치는 0보다 큰 숫자여야 합니다."
+        params['dutyWeights'] = dict(DEFAULT_DUTY_WEIGHTS, **duty_weights)
+
+    for p_data in params['people']:
+        fte, min_duties, max_duties = (p_data.get(field) for field in _CAPACITY_PERSON_FIELDS)
+        if fte is not None and (isinstance(fte, bool) or not isinstance(fte, (int, float)) or not 0 < fte <= 1):
+            return f"{p_data.get('name')}: fte는 0보다 크고 1 이하인 숫자여야 합니다."
+        for field, bound in (('minDuties', min_duties), ('maxDuties', max_duties)):
+            if bound is not None and (isinstance(bound, bool) or not isinstance(bound, int) or bound < 0):
+                return f"{p_data.get('name')}: {field}는 0 이상의 정수여야 합니다."
+        if min_duties is not None and max_duties is not None and min_duties > max_duties:
+            return f"{p_data.get('name')}: minDuties가 maxDuties보다 큽니다."
+
+    if params['optimizationMode'] != 'weighted':
+        # dutyWeights와 fte는 가중 목표 모드에서만 반영되므로, 모드를 명시하지 않고 보낸 값이 조용히 무시되지 않게 함
+        if duty_weights is not None:
+            return "dutyWeights는 optimizationMode가 'weighted'일 때만 사용할 수 있습니다."
+        for p_data in params['people']:
+            if p_data.get('fte') not in (None, 1):
+                return f"{p_data.get('name')}: fte는 optimizationMode가 'weighted'일 때만 사용할 수 있습니다."
+
+    if _uses_capacity_targets(params):
+        if params['latencyBudgetMs'] is not None or params['horizonWindowDays'] is not None:
+            return "가중 목표 모드와 fte/minDuties/maxDuties는 latencyBudgetMs, horizonWindowDays와 함께 사용할 수 없습니다."
+        if params['optimizationMode'] == 'weighted' and params['solver']['backend'] == 'cpsat':
+            return "가중 목표 모드(weighted)는 실수 계수를 쓰므로 cpsat 백엔드를 지원하지 않습니다."
+    return None
+
+
+def _validate_carry_in(params):
+    """useHistory/teamId와 carryIn을 검증해 오류 메시지 또는 None을 반환합니다."""
+    carry_in = params['carryIn']
+    if params['useHistory']:
+        if roster_history_store is None:
+            return "이력 저장소가 설정되지 않아 useHistory를 사용할 수 없습니다 (FAIRDUTY_HISTORY_DB)."
+        if params['teamId'] is None or isinstance(params['teamId'], bool) or not isinstance(params['teamId'], (str, int)):
+            return "useHistory를 사용하려면 teamId(문자열 또는 정수)가 필요합니다."
+        if carry_in is not None:
+            return "useHistory와 carryIn은 함께 사용할 수 없습니다."
+    if carry_in is not None:
+        if not isinstance(carry_in, dict):
+            return "carryIn은 인원 이름별 객체여야 합니다."
+        for name, counts in carry_in.items():
+            if not isinstance(counts, dict):
+                return f"{name}: carryIn 값은 객체여야 합니다."
+            for key in ("weekdayDuties", "weekendOrHolidayDuties"):
+                count = counts.get(key, 0)
+                if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+                    return f"{name}: carryIn의 {key}는 0 이상의 정수여야 합니다."
+            last_date = counts.get('lastDutyDate')
+            if last_date is not None:
+                try:
+                    datetime.strptime(last_date, "%Y-%m-%d")
+                except (TypeError, ValueError):
+                    return f"{name}: carryIn의 lastDutyDate는 YYYY-MM-DD 형식이어야 합니다."
+    if (params['useHistory'] or carry_in is not None) and params['latencyBudgetMs'] is not None:
+        return "useHistory와 carryIn은 latencyBudgetMs와 함께 사용할 수 없습니다."
+    return None
+
+
+def parse_schedule_request(data):
+    """/api/schedule 요청 본문을 검증해 (params, error_message)를 반환합니다."""
+    if not isinstance(data, dict):
+        return None, "요청 본문이 올바른 JSON 객체가 아닙니다."
+
+    params = {
+        'startDate': data.get('startDate'),
+        'endDate': data.get('endDate'),
+        'people': data.get('people', []),
+        'noConsecutive': data.get('noConsecutive', True), # 프론트엔드: true=연속당직금지
+        'dutyPerDay': data.get('dutyPerDay', 1),
+        'extraHolidays': data.get('extraHolidays', []),
+        'holidayRegion': data.get('holidayRegion', DEFAULT_HOLIDAY_REGION), # 공휴일 지역 (null이면 주말과 extraHolidays만 휴일)
+        'seed': data.get('seed'), # 지정 시 같은 입력에 대해 항상 같은 스케줄 생성
+        'parallelism': data.get('parallelism'), # 2단계 후보 병렬도 (서버 상한 FAIRDUTY_MAX_WORKERS 적용)
+        'optimizationMode': data.get('optimizationMode', 'sampling'), # 'sampling', 'exact' 또는 'weighted' (명시해야 가중 목표 모드)
+        'dutyWeights': data.get('dutyWeights'), # 가중 목표 모드의 당직 유형별 부담 가중치 (예: {"weekendOrHoliday": 1.5})
+        'compareWithSampling': bool(data.get('compareWithSampling', False)), # exact 모드에서 샘플링 결과와 품질 비교
+        'latencyBudgetMs': data.get('latencyBudgetMs'), # 지정 시 이 시간(ms) 안에 찾은 최선의 스케줄 반환
+        'horizonWindowDays': data.get('horizonWindowDays'), # 지정 시 이 일수 단위 구간으로 나눠 순차 풀이 (긴 기간용)
+        'horizonOverlapDays': data.get('horizonOverlapDays', HORIZON_DEFAULT_OVERLAP_DAYS),
+        'maxAttempts': data.get('maxAttempts', SAMPLING_DEFAULT_MAX_ATTEMPTS), # 샘플링 모드 2단계 최대 시도 수
+        'stallAttempts': data.get('stallAttempts', SAMPLING_DEFAULT_STALL_ATTEMPTS), # 최선 후보가 이 횟수만큼 개선되지 않으면 조기 종료 (null이면 사용 안 함)
+        'samplingBudgetMs': data.get('samplingBudgetMs'), # 지정 시 2단계 샘플링을 이 시간(ms) 안에 끝냄
+        'useCache': data.get('useCache', True),
+        'teamId': data.get('teamId'),
+        'useHistory': bool(data.get('useHistory', False)), # teamId의 게시 이력으로 이전 기간 누적 횟수와 마지막 당직일을 이어받음
+        'carryIn': data.get('carryIn'), # 이전 기간 누적을 직접 지정 {이름: {weekdayDuties, weekendOrHolidayDuties, lastDutyDate}}
+    }
+
+    try:
+        # 풀이 백엔드/시간 제한/gap/스레드 (배포 기본값에 요청별 설정을 덮어씀)
+        params['solver'] = solvers.resolve_solver_options(data.get('solver'))
+    except ValueError as exc:
+        return None, str(exc)
+
+    if not params['startDate'] or not params['endDate'] or not params['people'] or params['dutyPerDay'] < 0:
+        return None, "필수 정보가 부족합니다. 시작일, 종료일, 인원 목록, 일일 당직자 수를 확인해주세요."
+
+    if (params['seed'] is not None and not isinstance(params['seed'], int)) or (params['parallelism'] is not None and not isinstance(params['parallelism'], int)):
+        return None, "seed와 parallelism은 정수여야 합니다."
+
+    if params['holidayRegion'] is not None and params['holidayRegion'] not in holiday_calendar.SUPPORTED_REGIONS:
+        return None, f"holidayRegion은 {', '.join(holiday_calendar.SUPPORTED_REGIONS)} 중 하나 또는 null이어야 합니다."
+
+    if params['optimizationMode'] not in ('sampling', 'exact', 'weighted'):
+        return None, "optimizationMode는 'sampling', 'exact', 'weighted' 중 하나여야 합니다."
+
+    latency_budget_ms = params['latencyBudgetMs']
+    if latency_budget_ms is not None and (not isinstance(latency_budget_ms, (int, float)) or latency_budget_ms <= 0):
+        return None, "latencyBudgetMs는 0보다 큰 숫자여야 합니다."
+
+    window_days, overlap_days = params['horizonWindowDays'], params['horizonOverlapDays']
+    if window_days is not None:
+        if not isinstance(window_days, int) or window_days <= 0 or not isinstance(overlap_days, int) or overlap_days < 0:
+            return None, "horizonWindowDays는 1 이상, horizonOverlapDays는 0 이상의 정수여야 합니다."
+        if latency_budget_ms is not None:
+            return None, "latencyBudgetMs와 horizonWindowDays는 함께 사용할 수 없습니다."
+
+    max_attempts = params['maxAttempts']
+    if isinstance(max_attempts, bool) or not isinstance(max_attempts, int) or not 1 <= max_attempts <= SAMPLING_MAX_ATTEMPTS_LIMIT:
+        return None, f"maxAttempts는 1 이상 {SAMPLING_MAX_ATTEMPTS_LIMIT} 이하의 정수여야 합니다."
+
+    stall_attempts = params['stallAttempts']
+    if stall_attempts is not None and (isinstance(stall_attempts, bool) or not isinstance(stall_attempts, int) or stall_attempts <= 0):
+        return None, "stallAttempts는 1 이상의 정수여야 합니다."
+
+    sampling_budget_ms = params['samplingBudgetMs']
+    if sampling_budget_ms is not None and (isinstance(sampling_budget_ms, bool) or not isinstance(sampling_budget_ms, (int, float)) or sampling_budget_ms <= 0):
+        return None, "samplingBudgetMs는 0보다 큰 숫자여야 합니다."
+
+    if len(params['people']) < params['dutyPerDay']:
+        return None, f"전체 인원({len(params['people'])}명)이 하루 당직자 수({params['dutyPerDay']}명)보다 적습니다."
+
+    capacity_error = _validate_capacity_fields(params)
+    if capacity_error is not None:
+        return None, capacity_error
+
+    carry_in_error = _validate_carry_in(params)
+    if carry_in_error is not None:
+        return None, carry_in_error
+
+    return params, None
+
+
+def run_schedule(params, progress_callback=None, should_stop=None, on_new_best=None):
+    """검증된 요청 파라미터로 스케줄을 생성해 (응답 본문, HTTP 상태 코드)를 반환합니다.
+
+    on_new_best는 다단계 최적화에서 최선 후보가 바뀔 때마다 호출됩니다 (SSE 스트리밍용).
+    """
+    people_data_input = params['people']
+    people_names = [p['name'] for p in people_data_input]
 
     # 하루 당직자 수가 0인 경우, 이전 로직대로 간단히 처리 (LP 불필요)
-    if duty_per_day == 0:
-        temp_extra_holidays_set = set()
-        for d_str in extra_holidays_list_input:
-            try: temp_extra_holidays_set.add(datetime.strptime(d_str, "%Y-%m-%d").date())
-            except ValueError: pass
-        
-        date_list_for_empty = generate_dates_revised(start_date, end_date, temp_extra_holidays_set)
-        empty_roster = [{"date": d["date"], "weekday": ["월","화","수","목","금","토","일"][d["weekday"]], "duty": ""} for d in date_list_for_empty]
+    if params['dutyPerDay'] == 0:
+        day_calendar = build_day_calendar(params['startDate'], params['endDate'], params['extraHolidays'], params['holidayRegion'])
+        empty_roster = [{"date": date_str, "weekday": ["월","화","수","목","금","토","일"][day_calendar.weekdays[d_idx]], "duty": ""}
+                        for d_idx, date_str in enumerate(day_calendar.dates)]
         empty_summary = [{"person": p['name'], "weekdayDuties": 0, "weekendOrHolidayDuties": 0} for p in people_data_input]
-        return jsonify({"dutyRoster": empty_roster, "summary": empty_summary})
-
-    # 다단계 최적화 함수 호출
-    final_schedule_data, status_message = generate_schedule_multi_stage(
-        start_date,
-        end_date,
-        people_data_input,
-        duty_per_day,
-        no_consecutive_frontend, # 프론트엔드 값 그대로 전달 (함수 내부에서 allow_consecutive로 변환)
-        extra_holidays_list_input,
-        num_attempts=50 # 필요시 이 값을 조절하거나 요청 파라미터로 받을 수 있습니다.
-    )
+        return with_holiday_coverage({"dutyRoster": empty_roster, "summary": empty_summary}, params), 200
+
+    if params['useHistory']:
+        # 팀 이력의 누적을 이번 요청의 carryIn으로 고정 (캐시 키에도 포함되어 이력이 바뀌면 다시 풂)
+        params = dict(params, carryIn=history_carry_in(params['teamId'], params['startDate'], people_names,
+                                                        relative=params['optimizationMode'] != 'weighted'))
+
+    use_cache = params['useCache'] and schedule_result_cache.enabled
+    if use_cache:
+        cache_key = canonical_schedule_key({name: params[name] for name in _CACHE_KEY_PARAMS})
+        cached = schedule_result_cache.get(cache_key)
+        if cached is not None:
+            app.logger.info("캐시된 스케줄 반환")
+            return _reorder_summary(cached, people_names), 200
+
+    if params['latencyBudgetMs'] is not None:
+        final_schedule_data, status_message = generate_schedule_within_budget(
+            params['startDate'], params['endDate'], people_data_input, params['dutyPerDay'],
+            params['noConsecutive'], params['extraHolidays'],
+            params['latencyBudgetMs'], seed=params['seed'], solver_options=params['solver'],
+            holiday_region=params['holidayRegion']
+        )
+    elif params['horizonWindowDays'] is not None:
+        final_schedule_data, status_message = generate_schedule_rolling_horizon(
+            params['startDate'], params['endDate'], people_data_input, params['dutyPerDay'],
+            params['noConsecutive'], params['extraHolidays'],
+            params['horizonWindowDays'], params['horizonOverlapDays'],
+            progress_callback=progress_callback, should_stop=should_stop, solver_options=params['solver'],
+            holiday_region=params['holidayRegion'], carry_in=params['carryIn']
+        )
+    else:
+        # 다단계 최적화 함수 호출
+        final_schedule_data, status_message = generate_schedule_multi_stage(
+            params['startDate'],
+            params['endDate'],
+            people_data_input,
+            params['dutyPerDay'],
+            params['noConsecutive'], # 프론트엔드 값 그대로 전달 (함수 내부에서 allow_consecutive로 변환)
+            params['extraHolidays'],
+            num_attempts=params['maxAttempts'],
+            parallelism=params['parallelism'],
+            seed=params['seed'],
+            optimization_mode=params['optimizationMode'],
+            compare_with_sampling=params['compareWithSampling'],
+            progress_callback=progress_callback,
+            should_stop=should_stop,
+            solver_options=params['solver'],
+            on_new_best=on_new_best,
+            stall_attempts=params['stallAttempts'],
+            sampling_budget_seconds=params['samplingBudgetMs'] / 1000.0 if params['samplingBudgetMs'] is not None else None,
+            holiday_region=params['holidayRegion'],
+            duty_weights=params['dutyWeights'],
+            carry_in=params['carryIn']
+        )
 
     if final_schedule_data:
         app.logger.info(f"최종 스케줄 생성 성공: {status_message}")
-        return jsonify(final_schedule_data)
+        if params['carryIn'] is not None:
+            final_schedule_data = dict(final_schedule_data, carryIn=params['carryIn'])
+        final_schedule_data = with_holiday_coverage(final_schedule_data, params)
+        # 취소되어 일부 후보만 본 결과는 캐시하지 않음
+        if use_cache and final_schedule_data.get('stats', {}).get('stopReason') != 'cancelled':
+            schedule_result_cache.set(cache_key, final_schedule_data)
+        return final_schedule_data, 200
+
+    app.logger.error(f"최종 스케줄 생성 실패: {status_message}")
+    # status_message에 이미 사용자 친화적인 메시지가 포함되어 있을 수 있음
+    return {"error": status_message}, 500
+
+
+# --- 여러 팀 일괄 생성 ---
+# 배치 요청의 팀들을 동시에 푸는 스레드 수 (모든 배치 요청이 공유). CBC 프로세스 수는 풀 상한(FAIRDUTY_MAX_WORKERS)이 따로 제한
+BATCH_MAX_CONCURRENCY = max(1, int(os.environ.get('FAIRDUTY_BATCH_MAX_CONCURRENCY', 4)))
+BATCH_MAX_TEAMS = int(os.environ.get('FAIRDUTY_BATCH_MAX_TEAMS', 100))
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_CONCURRENCY, thread_name_prefix="schedule-batch")
+
+
+def _parse_batch_body(data):
+    """배치/합동 요청 본문 {teams: [...], defaults: {...}}을 검증해 (teams, defaults, error_message)를 반환합니다."""
+    teams = data.get('teams') if isinstance(data, dict) else None
+    defaults = data.get('defaults', {}) if isinstance(data, dict) else {} # 모든 팀에 공통인 값 (기간, 공휴일 등)
+    if not isinstance(teams, list) or not teams or not isinstance(defaults, dict):
+        return None, None, "teams는 비어 있지 않은 스케줄 요청 목록이어야 합니다."
+    if len(teams) > BATCH_MAX_TEAMS:
+        return None, None, f"한 번에 최대 {BATCH_MAX_TEAMS}개 팀까지 요청할 수 있습니다."
+    return teams, defaults, None
+
+
+def _parse_batch_teams(teams, defaults):
+    """팀별 요청에 defaults를 합쳐 검증합니다.
+
+    ([(index, teamId, params), ...], 입력 오류가 있는 팀의 결과 줄 목록)을 반환합니다.
+    """
+    parsed_teams, error_lines = [], []
+    for index, team in enumerate(teams):
+        team_spec = dict(defaults, **team) if isinstance(team, dict) else team
+        team_id = team_spec.get('teamId', index) if isinstance(team_spec, dict) else index
+        params, error_message = parse_schedule_request(team_spec)
+        if error_message:
+            error_lines.append({"index": index, "teamId": team_id, "status": 400, "error": error_message})
+            continue
+        parsed_teams.append((index, team_id, params))
+    return parsed_teams, error_lines
+
+
+def _run_batch_team(index, team_id, params, submitted_at):
+    started = time.monotonic()
+    try:
+        body, status_code = run_schedule(params)
+    except Exception as exc: # 한 팀의 오류가 배치 전체를 멈추지 않도록 결과 줄로 기록
+        app.logger.exception(f"배치 팀 {team_id} 스케줄 생성 중 오류")
+        body, status_code = {"error": f"스케줄 생성 중 오류가 발생했습니다: {exc}"}, 500
+    line = {
+        "index": index,
+        "teamId": team_id,
+        "status": status_code,
+        "queuedMs": round((started - submitted_at) * 1000, 1),
+        "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+    }
+    if status_code == 200:
+        line["result"] = body
     else:
-        app.logger.error(f"최종 스케줄 생성 실패: {status_message}")
-        # status_message에 이미 사용자 친화적인 메시지가 포함되어 있을 수 있음
-        return jsonify({"error": status_message}), 500
+        line["error"] = body.get("error")
+    return line
 
 
-import os
+def stream_schedule_batch(teams, defaults):
+    """팀별 스케줄을 동시에 풀고, 끝나는 순서대로 NDJSON 한 줄씩 내보내는 제너레이터.
+
+    입력 오류나 실패한 팀은 해당 팀의 줄에만 status/error로 표시되고, 마지막 줄에 전체 요약을 씁니다.
+    """
+    batch_started = time.monotonic()
+    parsed_teams, lines = _parse_batch_teams(teams, defaults)
+    futures = [_batch_executor.submit(_run_batch_team, index, team_id, params, time.monotonic())
+               for index, team_id, params in parsed_teams]
+
+    succeeded = 0
+    try:
+        for line in lines:
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+        for future in as_completed(futures):
+            line = future.result()
+            succeeded += line["status"] == 200
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    finally:
+        # 클라이언트가 연결을 끊으면 아직 시작하지 않은 팀은 취소
+        for future in futures:
+            future.cancel()
+
+    yield json.dumps({
+        "done": True,
+        "teams": len(teams),
+        "succeeded": succeeded,
+        "failed": len(teams) - succeeded,
+        "elapsedMs": round((time.monotonic() - batch_started) * 1000, 1),
+    }, ensure_ascii=False) + "\n"
+
+
+# --- 인원을 공유하는 여러 팀의 합동 스케줄 ---
+class JointDutyScheduleModel:
+    """여러 팀에 속한 인원이 있을 때, 팀들을 하나로 묶어 푸는 스케줄 LP 모델.
+
+    팀별 변수와 제약(하루 당직 인원, 팀 안의 총 당직일 차이)은 DutyScheduleModel과 같은 블록이고,
+    공유 인원에 대해서만 블록 사이를 잇는 제약을 추가합니다.
+      - 같은 날 두 팀 이상에서 당직을 서지 않음
+      - 소속 팀 중 하나라도 연속 당직을 금지하면, 어느 팀 당직이든 이틀 연속으로 서지 않음
+    공정성(총 당직일 차이, 주중/주말·공휴일 분산)은 팀마다 그 팀의 당직 횟수로 계산합니다.
+    """
+
+    def __init__(self, start_date_str, end_date_str, teams, extra_holidays_str_list, solver_options=None, holiday_region=None):
+        # teams: [{"teamId", "people", "dutyPerDay", "noConsecutive"}, ...]
+        self.team_ids = [team['teamId'] for team in teams]
+        self.team_people_names = [[p['name'] for p in team['people']] for team in teams]
+        self.team_duty_per_day = [team['dutyPerDay'] for team in teams]
+        self.solver_options = solver_options or solvers.resolve_solver_options()
+        self.day_calendar = build_day_calendar(start_date_str, end_date_str, extra_holidays_str_list, holiday_region)
+
+        self.prob = None
+        self.shared_people = []
+        self._enforce_range_constraints = None
+        self._squared_count_vars = None
+        self._count_var_groups = [] # 팀별 [(day_mask, count_vars, square_vars), ...]
+        self.last_matrices = None # 마지막 최적해의 팀별 (인원 x 날짜) 배정 행렬
+        self.presolve_error = None
+        if not len(self.day_calendar):
+            return
+
+        # 같은 사람은 어느 팀 목록에 적힌 불가일이든 모두 불가
+        unavailable_by_person = {}
+        person_teams = {}
+        for t_idx, team in enumerate(teams):
+            for p_data in team['people']:
+                unavailable_by_person.setdefault(p_data['name'], set()).update(p_data.get('unavailable', []))
+                person_teams.setdefault(p_data['name'], []).append(t_idx)
+        self.shared_people = [pn for pn, t_idxs in person_teams.items() if len(t_idxs) > 1]
+        self.size_labels = metrics.problem_size_labels(len(person_teams), len(self.day_calendar), sum(self.team_duty_per_day))
+        strict_people = [pn for pn, t_idxs in person_teams.items() if any(teams[t_idx]['noConsecutive'] for t_idx in t_idxs)]
+
+        # 사전 처리: 팀별 가용성 검사 후, 날짜별로 서로 다른 가용 인원이 전체 팀의 당직자 수 합 이상인지 확인
+        team_available, team_upper_bounds = [], []
+        for t_idx, team in enumerate(teams):
+            people_data = [{"name": pn, "unavailable": unavailable_by_person[pn]} for pn in self.team_people_names[t_idx]]
+            available, self.is_off = build_availability_arrays(self.day_calendar, people_data)
+            person_upper_bounds, presolve_error = presolve_availability(
+                available, team['dutyPerDay'], not team['noConsecutive'], self.day_calendar
+            )
+            if presolve_error is not None:
+                self.presolve_error = f"{team['teamId']}: {presolve_error}"
+                return
+            team_available.append(available)
+            team_upper_bounds.append(person_upper_bounds)
+
+        person_index = {pn: i for i, pn in enumerate(person_teams)}
+        union_available = np.zeros((len(person_index), len(self.day_calendar)), dtype=bool)
+        for names, available in zip(self.team_people_names, team_available):
+            union_available[[person_index[pn] for pn in names]] |= available
+        required_per_day = sum(self.team_duty_per_day)
+        short_days = np.flatnonzero(union_available.sum(axis=0) < required_per_day)
+        if len(short_days):
+            d_idx = short_days[0]
+            self.presolve_error = (f"{self.day_calendar.dates[d_idx]}: 팀들의 하루 당직자 수 합({required_per_day}명)보다 "
+                                   f"당직 가능한 인원({int(union_available[:, d_idx].sum())}명)이 적습니다. 공유 인원의 당직 불가일을 확인해주세요.")
+            return
+
+        self._build(team_available, team_upper_bounds, strict_people)
+
+    def _build(self, team_available, team_upper_bounds, strict_people):
+        num_days = len(self.day_calendar)
+        prob = LpProblem("JointDutyScheduling", LpMinimize)
+
+        self.team_duty_vars = []
+        self.team_total_vars = []
+        self.team_max_vars, self.team_min_vars = [], []
+        self._duty_var_lists, self._duty_var_indices = [], []
+        person_day_vars = {} # (이름, 날짜 인덱스) -> 모든 팀의 해당 칸 변수
+        for t_idx, (names, available, person_upper_bounds) in enumerate(zip(self.team_people_names, team_available, team_upper_bounds)):
+            duty_per_day = self.team_duty_per_day[t_idx]
+            # 팀 블록: 당직 가능한 (인원, 날짜) 칸에만 변수 생성
+            var_rows, var_cols = np.nonzero(available)
+            duty_vars = {(p_idx, d_idx): LpVariable(f"duty_{t_idx}_{p_idx}_{d_idx}", 0, 1, LpInteger)
+                         for p_idx, d_idx in zip(var_rows.tolist(), var_cols.tolist())}
+            self._duty_var_lists.append(list(duty_vars.values()))
+            self._duty_var_indices.append((var_rows, var_cols))
+            person_vars = [[] for _ in names]
+            day_vars = [[] for _ in range(num_days)]
+            for (p_idx, d_idx), var in duty_vars.items():
+                person_vars[p_idx].append(var)
+                day_vars[d_idx].append(var)
+                person_day_vars.setdefault((names[p_idx], d_idx), []).append(var)
+
+            for d_idx in range(num_days):
+                prob += lpSum(day_vars[d_idx]) == duty_per_day, f"DutyPerDay_{t_idx}_{d_idx}"
+
+            total_duties = num_days * duty_per_day
+            total_vars = [LpVariable(f"person_total_duties_{t_idx}_{p_idx}", 0, int(person_upper_bounds[p_idx]), LpInteger)
+                          for p_idx in range(len(names))]
+            max_var = LpVariable(f"max_duties_{t_idx}", -(-total_duties // len(names)), cat=LpInteger)
+            min_var = LpVariable(f"min_duties_{t_idx}", 0, min(total_duties // len(names), int(person_upper_bounds.min())), LpInteger)
+            for p_idx, total_var in enumerate(total_vars):
+                prob += total_var == lpSum(person_vars[p_idx])
+                prob += max_var >= total_var
+                prob += min_var <= total_var
+
+            self.team_duty_vars.append(duty_vars)
+            self.team_total_vars.append(total_vars)
+            self.team_max_vars.append(max_var)
+            self.team_min_vars.append(min_var)
+
+        # 블록 사이 제약: 공유 인원은 같은 날 한 팀에서만 당직
+        for pn in self.shared_people:
+            for d_idx in range(num_days):
+                cell_vars = person_day_vars.get((pn, d_idx), [])
+                if len(cell_vars) > 1:
+                    prob += lpSum(cell_vars) <= 1
+
+        # 연속 당직 금지: 팀에 상관없이 그 사람의 이틀 연속 당직을 막음
+        for pn in strict_people:
+            for d_idx in range(num_days - 1):
+                today, tomorrow = person_day_vars.get((pn, d_idx)), person_day_vars.get((pn, d_idx + 1))
+                if today and tomorrow:
+                    prob += lpSum(today) + lpSum(tomorrow) <= 1
+
+        self.prob = prob
+
+    def _unsolvable_status(self):
+        if self.presolve_error is not None:
+            return "PresolveInfeasible"
+        if self.prob is None:
+            return "EmptyDateRange"
+        return None
+
+    def solve_primary_fairness(self):
+        """1단계: 팀별 총 당직 횟수 최대-최소 차이의 합을 최소화합니다. (팀별 배정 행렬, status, 팀별 차이)를 반환합니다."""
+        unsolvable_status = self._unsolvable_status()
+        if unsolvable_status:
+            return None, unsolvable_status, None
+
+        self.prob.objective = lpSum(max_var - min_var for max_var, min_var in zip(self.team_max_vars, self.team_min_vars))
+        matrices, status = self._solve()
+        if status != "Optimal":
+            return None, status, None
+        ranges = [int(round(max_var.varValue - min_var.varValue)) for max_var, min_var in zip(self.team_max_vars, self.team_min_vars)]
+        return matrices, status, ranges
+
+    def solve_exact_variance(self, target_ranges, mip_start=None):
+        """2단계: 팀별 총 당직일 차이를 target_ranges로 고정한 채 팀별 주중/주말·공휴일 횟수 제곱합의 합을 최소화합니다."""
+        unsolvable_status = self._unsolvable_status()
+        if unsolvable_status:
+            return None, unsolvable_status, None
+
+        if self._enforce_range_constraints is None:
+            self._enforce_range_constraints = []
+            for t_idx, (max_var, min_var) in enumerate(zip(self.team_max_vars, self.team_min_vars)):
+                self.prob += max_var - min_var == target_ranges[t_idx], f"EnforcePrimaryFairness_{t_idx}"
+                self._enforce_range_constraints.append(self.prob.constraints[f"EnforcePrimaryFairness_{t_idx}"])
+        else:
+            for constraint, target_range in zip(self._enforce_range_constraints, target_ranges):
+                constraint.constant = -target_range
+        if self._squared_count_vars is None:
+            self._add_squared_count_vars()
+
+        self.prob.objective = lpSum(self._squared_count_vars)
+        matrices, status = self._solve(mip_start)
+        return matrices, status, None
+
+    def _add_squared_count_vars(self):
+        # DutyScheduleModel.solve_exact_variance와 같은 접선 선형화를 팀마다 적용
+        squared_vars = []
+        for t_idx, (names, duty_vars) in enumerate(zip(self.team_people_names, self.team_duty_vars)):
+            team_groups = []
+            for label, day_mask in (("weekday", ~self.is_off), ("weekend_holiday", self.is_off)):
+                day_indices = set(np.flatnonzero(day_mask).tolist())
+                if not day_indices:
+                    continue
+                count_vars = [LpVariable(f"{label}_duties_{t_idx}_{p_idx}", 0, len(day_indices), LpInteger) for p_idx in range(len(names))]
+                square_vars = [LpVariable(f"{label}_duties_sq_{t_idx}_{p_idx}", 0) for p_idx in range(len(names))]
+                person_vars = [[] for _ in names]
+                for (p_idx, d_idx), var in duty_vars.items():
+                    if d_idx in day_indices:
+                        person_vars[p_idx].append(var)
+                for p_idx in range(len(names)):
+                    self.prob += count_vars[p_idx] == lpSum(person_vars[p_idx])
+                    for k in range(len(day_indices)):
+                        self.prob += square_vars[p_idx] >= (2 * k + 1) * count_vars[p_idx] - k * (k + 1)
+                    squared_vars.append(square_vars[p_idx])
+                team_groups.append((day_mask, count_vars, square_vars))
+            self._count_var_groups.append(team_groups)
+        self._squared_count_vars = squared_vars
+
+    def _apply_mip_start(self, matrices):
+        for t_idx, matrix in enumerate(matrices):
+            var_rows, var_cols = self._duty_var_indices[t_idx]
+            for var, assigned in zip(self._duty_var_lists[t_idx], matrix[var_rows, var_cols].tolist()):
+                var.setInitialValue(assigned)
+            totals = matrix.sum(axis=1).tolist()
+            for total_var, total in zip(self.team_total_vars[t_idx], totals):
+                total_var.setInitialValue(total)
+            self.team_max_vars[t_idx].setInitialValue(max(totals))
+            self.team_min_vars[t_idx].setInitialValue(min(totals))
+            if t_idx < len(self._count_var_groups):
+                for day_mask, count_vars, square_vars in self._count_var_groups[t_idx]:
+                    for count_var, square_var, count in zip(count_vars, square_vars, matrix[:, day_mask].sum(axis=1).tolist()):
+                        count_var.setInitialValue(count)
+                        square_var.setInitialValue(count ** 2)
+
+    def _solve(self, mip_start=None):
+        warm_start = MIP_WARM_START and mip_start is not None
+        if warm_start:
+            self._apply_mip_start(mip_start)
+        with metrics.span("solve", self.size_labels):
+            solve_info = solvers.solve_problem(self.prob, self.solver_options, warm_start=warm_start)
+        app.logger.info(f"  합동 모델({len(self.team_ids)}개 팀) {solve_info['backend']} 풀이 {solve_info['seconds']:.2f}s")
+        if self.prob.status != LpStatusOptimal:
+            status_map = {LpStatusInfeasible: "Infeasible"}
+            return None, status_map.get(self.prob.status, f"SolverError_{LpStatus[self.prob.status]}")
+
+        matrices = []
+        for t_idx, names in enumerate(self.team_people_names):
+            var_rows, var_cols = self._duty_var_indices[t_idx]
+            duty_var_list = self._duty_var_lists[t_idx]
+            values = np.fromiter((var.varValue or 0.0 for var in duty_var_list), dtype=float, count=len(duty_var_list))
+            matrix = np.zeros((len(names), len(self.day_calendar)), dtype=np.int8)
+            matrix[var_rows, var_cols] = values > 0.5
+            matrices.append(matrix)
+        self.last_matrices = matrices
+        return matrices, "Optimal"
+
+
+def generate_schedule_joint(start_date, end_date, teams, extra_holidays, solver_options=None, holiday_region=None):
+    """공유 인원으로 묶인 팀들을 합동 모델로 풀어 (팀별 결과 리스트, 오류 메시지)를 반환합니다.
+
+    1단계(팀별 총 당직일 차이의 합) → 정확 모드 2단계(팀별 분산)를 한 모델에서 차례로 풉니다.
+    """
+    model = JointDutyScheduleModel(start_date, end_date, teams, extra_holidays, solver_options=solver_options,
+                                   holiday_region=holiday_region)
+    matrices, status, team_ranges = model.solve_primary_fairness()
+    if status == "Optimal":
+        matrices, status, _ = model.solve_exact_variance(team_ranges, mip_start=matrices)
+    if status != "Optimal":
+        app.logger.error(f"합동 스케줄 실패: {status}")
+        error_message_map = {
+            "Infeasible": "공유 인원 조건으로 스케줄 생성이 불가능합니다. 팀 간 당직 불가일과 하루 당직자 수를 확인해주세요.",
+            "EmptyDateRange": "선택된 기간에 날짜가 없습니다.",
+            "PresolveInfeasible": model.presolve_error,
+        }
+        return None, error_message_map.get(status, f"합동 스케줄 생성 실패: {status}")
+
+    results = []
+    for t_idx, (names, matrix) in enumerate(zip(model.team_people_names, matrices)):
+        result = render_assignment_matrix(names, model.day_calendar, matrix)
+        var_weekday, var_weekend_holiday = calculate_matrix_variances(matrix, model.is_off)
+        result["stats"] = {
+            "mode": "joint",
+            "jointTeams": model.team_ids,
+            "sharedPeople": [pn for pn in model.shared_people if pn in names],
+            "solverCalls": 2,
+            "totalDutyRange": team_ranges[t_idx],
+            "varWeekday": float(var_weekday),
+            "varWeekendHoliday": float(var_weekend_holiday),
+            "combinedVariance": float(var_weekday + var_weekend_holiday),
+        }
+        results.append(result)
+    return results, None
+
+
+def _team_components(parsed_teams):
+    """인원 이름을 공유하는 팀끼리 묶은 연결 요소 목록을 반환합니다 (union-find)."""
+    parent = list(range(len(parsed_teams)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    first_team_of_person = {}
+    for i, (_, _, params) in enumerate(parsed_teams):
+        for p_data in params['people']:
+            j = first_team_of_person.setdefault(p_data['name'], i)
+            parent[find(i)] = find(j)
+
+    components = {}
+    for i in range(len(parsed_teams)):
+        components.setdefault(find(i), []).append(parsed_teams[i])
+    return list(components.values())
+
+
+def _run_joint_component(component, submitted_at):
+    """공유 인원으로 묶인 팀들을 함께 풀어 팀별 결과 줄 목록을 반환합니다."""
+    started = time.monotonic()
+    first_params = component[0][2]
+    def calendar_of(params):
+        return params['startDate'], params['endDate'], sorted(set(params['extraHolidays'])), params['holidayRegion']
+
+    period = calendar_of(first_params)
+    status_code, results = 500, None
+    if any(calendar_of(params) != period for _, _, params in component):
+        status_code, error_message = 400, "인원을 공유하는 팀은 기간(startDate, endDate), 추가 공휴일, 공휴일 지역(holidayRegion)이 같아야 합니다."
+    elif any(params['useHistory'] or params['carryIn'] is not None for _, _, params in component):
+        status_code, error_message = 400, "인원을 공유하는 팀의 합동 스케줄은 useHistory와 carryIn을 지원하지 않습니다."
+    elif any(_uses_capacity_targets(params) for _, _, params in component):
+        status_code, error_message = 400, "인원을 공유하는 팀의 합동 스케줄은 가중 목표 모드와 fte/minDuties/maxDuties를 지원하지 않습니다."
+    else:
+        teams = [{"teamId": team_id, "people": params['people'], "dutyPerDay": params['dutyPerDay'],
+                  "noConsecutive": params['noConsecutive']} for _, team_id, params in component]
+        try:
+            results, error_message = generate_schedule_joint(period[0], period[1], teams, period[2], solver_options=first_params['solver'],
+                                                             holiday_region=period[3])
+        except Exception as exc: # 한 묶음의 오류가 다른 팀 결과를 막지 않도록 결과 줄로 기록
+            app.logger.exception("합동 스케줄 생성 중 오류")
+            error_message = f"스케줄 생성 중 오류가 발생했습니다: {exc}"
+
+    lines = []
+    for t_idx, (index, team_id, _) in enumerate(component):
+        line = {
+            "index": index,
+            "teamId": team_id,
+            "status": 200 if results is not None else status_code,
+            "queuedMs": round((started - submitted_at) * 1000, 1),
+            "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+        }
+        if results is not None:
+            line["result"] = with_holiday_coverage(results[t_idx], first_params)
+        else:
+            line["error"] = error_message
+        lines.append(line)
+    return lines
+
+
+def run_joint_schedule(teams, defaults):
+    """팀 목록을 공유 인원 기준 연결 요소로 나눠 풉니다.
+
+    공유 인원이 없는 팀은 일반 스케줄(run_schedule)로, 공유 인원으로 묶인 팀들은 합동 모델로 풀며
+    서로 독립인 묶음은 배치 스레드 풀에서 동시에 실행합니다.
+    """
+    started = time.monotonic()
+    parsed_teams, lines = _parse_batch_teams(teams, defaults)
+    components = _team_components(parsed_teams)
+
+    futures = []
+    for component in components:
+        if len(component) == 1:
+            index, team_id, params = component[0]
+            futures.append(_batch_executor.submit(_run_batch_team, index, team_id, params, time.monotonic()))
+        else:
+            futures.append(_batch_executor.submit(_run_joint_component, component, time.monotonic()))
+    for future in futures:
+        result = future.result()
+        lines.extend(result if isinstance(result, list) else [result])
+
+    return {
+        "teams": sorted(lines, key=lambda line: line["index"]),
+        "jointGroups": [[team_id for _, team_id, _ in component] for component in components if len(component) > 1],
+        "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+# --- 진행 상황 / 중간 결과 스트리밍 (Server-Sent Events) ---
+# 스트리밍 요청에서 stallAttempts를 지정하지 않았을 때의 기본값 (쉬운 입력에서 남은 후보 시도를 아낌)
+STREAM_DEFAULT_STALL_ATTEMPTS = int(os.environ.get('FAIRDUTY_STREAM_STALL_ATTEMPTS', 10))
+# 이 시간 동안 보낼 이벤트가 없으면 프록시가 연결을 끊지 않도록 주석 줄을 보냄
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_schedule_events(params):
+    """스케줄 생성을 백그라운드 스레드에서 실행하며 SSE 이벤트를 내보내는 제너레이터.
+
+    이벤트: stage(단계 전환), candidate(최선 후보가 바뀔 때마다 분산과 간단한 당직표),
+    result(최종 결과) 또는 error. 클라이언트가 연결을 끊으면 남은 후보 시도를 중단합니다.
+    """
+    events = queue.Queue()
+    stop_event = threading.Event()
+    last_stage = None
+
+    def on_progress(progress):
+        nonlocal last_stage
+        stage = (progress.get('stage'), progress.get('window'))
+        if stage != last_stage:
+            last_stage = stage
+            events.put(("stage", progress))
+
+    def run():
+        try:
+            body, status_code = run_schedule(params, progress_callback=on_progress, should_stop=stop_event.is_set,
+                                             on_new_best=lambda candidate: events.put(("candidate", candidate)))
+        except Exception as exc: # 스트림이 끝나지 않고 멈추지 않도록 오류 이벤트로 전달
+            app.logger.exception("스트리밍 스케줄 생성 중 오류")
+            body, status_code = {"error": f"스케줄 생성 중 오류가 발생했습니다: {exc}"}, 500
+        if status_code == 200:
+            events.put(("result", body))
+        else:
+            events.put(("error", dict(body, status=status_code)))
+        events.put(None)
+
+    threading.Thread(target=run, name="schedule-stream", daemon=True).start()
+    try:
+        while True:
+            try:
+                item = events.get(timeout=STREAM_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                break
+            yield _sse_event(*item)
+    finally:
+        stop_event.set()
+
+
+# --- 요청별 프로파일링 ---
+# 켜져 있으면 "X-Fairduty-Profile: 1" 헤더가 있는 요청을 cProfile로 측정해 PROFILE_DIR에 .prof 파일로 저장
+PROFILING_ENABLED = os.environ.get('FAIRDUTY_PROFILING_ENABLED', '0') == '1'
+PROFILE_DIR = os.environ.get('FAIRDUTY_PROFILE_DIR') or tempfile.gettempdir()
+PROFILE_REQUEST_HEADER = "X-Fairduty-Profile"
+if PROFILING_ENABLED:
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+    except OSError as e:
+        app.logger.warning(f"프로파일 디렉터리를 만들 수 없습니다 ({PROFILE_DIR}): {e}")
+
+
+@app.before_request
+def _start_request_profile():
+    if not PROFILING_ENABLED or request.headers.get(PROFILE_REQUEST_HEADER) != "1":
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError: # 다른 요청이 이미 프로파일링 중 (프로세스당 프로파일러는 하나만 켤 수 있음)
+        app.logger.warning("다른 요청을 프로파일링 중이므로 이번 요청은 프로파일링하지 않습니다.")
+        return
+    g.profiler = profiler
+
+
+@app.after_request
+def _dump_request_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    try:
+        fd, profile_path = tempfile.mkstemp(prefix="fairduty-", suffix=".prof", dir=PROFILE_DIR)
+        os.close(fd)
+    except OSError as e:
+        # 프로파일 저장 실패로 요청 자체가 실패하지 않도록 기록만 함
+        profiler.disable()
+        app.logger.error(f"요청 프로파일 파일을 만들 수 없습니다 ({PROFILE_DIR}): {e}")
+        return response
+    request_path = request.path
+
+    def dump_profile():
+        profiler.disable()
+        try:
+            profiler.dump_stats(profile_path)
+        except OSError as e:
+            app.logger.error(f"요청 프로파일을 저장할 수 없습니다 ({profile_path}): {e}")
+            return
+        app.logger.info(f"요청 프로파일 저장: {request_path} -> {profile_path}")
+
+    if response.is_streamed:
+        # SSE/NDJSON 본문은 after_request 이후 클라이언트가 읽는 동안 만들어지므로, 응답을 닫을 때 끄고 저장
+        response.call_on_close(dump_profile)
+    else:
+        dump_profile()
+    response.headers["X-Fairduty-Profile-File"] = profile_path
+    return response
+
+
+@app.teardown_request
+def _stop_request_profile(_exc):
+    # 처리 중 예외로 after_request가 호출되지 않은 경우에도 프로파일러를 끔
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+
+# --- Flask API 엔드포인트 ---
+@app.route('/api/schedule', methods=['POST'])
+def create_schedule_route():
+    params, error_message = parse_schedule_request(request.get_json())
+    if error_message:
+        return jsonify({"error": error_message}), 400
+
+    body, status_code = run_schedule(params)
+    return jsonify(body), status_code
+
+
+@app.route('/api/schedule/stream', methods=['POST'])
+def create_schedule_stream_route():
+    data = request.get_json()
+    params, error_message = parse_schedule_request(data)
+    if error_message:
+        return jsonify({"error": error_message}), 400
+    if 'stallAttempts' not in data:
+        params['stallAttempts'] = STREAM_DEFAULT_STALL_ATTEMPTS
+
+    return Response(stream_schedule_events(params), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route('/api/schedule/batch', methods=['POST'])
+def create_schedule_batch_route():
+    teams, defaults, error_message = _parse_batch_body(request.get_json())
+    if error_message:
+        return jsonify({"error": error_message}), 400
+
+    return Response(stream_schedule_batch(teams, defaults), mimetype="application/x-ndjson")
+
+
+@app.route('/api/schedule/joint', methods=['POST'])
+def create_schedule_joint_route():
+    teams, defaults, error_message = _parse_batch_body(request.get_json())
+    if error_message:
+        return jsonify({"error": error_message}), 400
+
+    return jsonify(run_joint_schedule(teams, defaults)), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    job_stats = schedule_job_manager.stats()
+    body = (metrics.registry.render()
+            + metrics.render_gauge("fairduty_schedule_jobs", "상태별 비동기 스케줄 작업 수 (보관 중인 끝난 작업 포함)",
+                                   [({"status": status}, count) for status, count in job_stats["jobs"].items()])
+            + metrics.render_gauge("fairduty_schedule_job_limit", "비동기 스케줄 작업 동시 실행/대기열 상한",
+                                   [({"kind": "concurrent"}, job_stats["maxConcurrentJobs"]),
+                                    ({"kind": "queued"}, job_stats["maxQueuedJobs"])]))
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+@app.route('/api/schedule/cache/stats', methods=['GET'])
+def schedule_cache_stats_route():
+    return jsonify(schedule_result_cache.stats())
+
+
+def _is_date_string(date_str):
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+@app.route('/api/schedule/repair', methods=['POST'])
+def repair_schedule_route():
+    data = request.get_json()
+    params, error_message = parse_schedule_request(data)
+    if error_message:
+        return jsonify({"error": error_message}), 400
+
+    duty_roster = data.get('dutyRoster')
+    repair_radius = data.get('repairRadius', 2) # 영향 날짜 앞뒤로 다시 풀 날짜 수
+    max_moves = data.get('maxMoves') # 기존 배정 중 바뀔 수 있는 최대 개수 (없으면 제한 없음)
+    changed_dates = data.get('changedDates') if data.get('changedDates') is not None else [] # 불가일 외에 명시적으로 다시 배정할 날짜
+    if not isinstance(duty_roster, list):
+        return jsonify({"error": "수정할 기존 당직표(dutyRoster)가 필요합니다."}), 400
+    if not isinstance(repair_radius, int) or repair_radius < 0 or (max_moves is not None and (not isinstance(max_moves, int) or max_moves < 0)):
+        return jsonify({"error": "repairRadius와 maxMoves는 0 이상의 정수여야 합니다."}), 400
+    if not isinstance(changed_dates, list) or not all(_is_date_string(ds) for ds in changed_dates):
+        return jsonify({"error": "changedDates는 YYYY-MM-DD 형식 날짜 문자열 목록이어야 합니다."}), 400
+    # 부분 재스케줄링은 현재 기간 안의 총 당직일/주말·공휴일 차이만 맞추므로, 이전 기간 누적과 가중 목표는 반영할 수 없음
+    if params['carryIn'] is not None or params['useHistory']:
+        return jsonify({"error": "부분 재스케줄링은 carryIn, useHistory를 지원하지 않습니다. 전체 스케줄을 다시 생성해주세요."}), 400
+    if params['optimizationMode'] == 'weighted':
+        return jsonify({"error": "부분 재스케줄링은 가중 목표 모드(weighted)를 지원하지 않습니다. 전체 스케줄을 다시 생성해주세요."}), 400
+    if params['dutyPerDay'] == 0:
+        return run_schedule(params)
+
+    result, status_message = repair_schedule(
+        params['startDate'], params['endDate'], params['people'], params['dutyPerDay'],
+        params['noConsecutive'], params['extraHolidays'], duty_roster,
+        repair_radius=repair_radius, max_moves=max_moves, changed_dates=changed_dates,
+        solver_options=params['solver'], holiday_region=params['holidayRegion']
+    )
+    if result is None:
+        return jsonify({"error": status_message}), 422
+    app.logger.info(f"부분 재스케줄링 완료: {status_message}")
+    return jsonify(with_holiday_coverage(result, params))
+
+
+# --- 비동기 작업 API ---
+schedule_job_manager = ScheduleJobManager(
+    max_concurrent_jobs=int(os.environ.get('FAIRDUTY_MAX_CONCURRENT_JOBS', 2)),
+    max_queued_jobs=int(os.environ.get('FAIRDUTY_MAX_QUEUED_JOBS', 16)),
+    result_ttl_seconds=int(os.environ.get('FAIRDUTY_JOB_RESULT_TTL_SECONDS', 3600))
+)
+
+
+@app.route('/api/schedule/jobs', methods=['POST'])
+def create_schedule_job_route():
+    params, error_message = parse_schedule_request(request.get_json())
+    if error_message:
+        return jsonify({"error": error_message}), 400
+
+    def run_job(job):
+        body, status_code = run_schedule(params, progress_callback=job.update_progress, should_stop=job.cancel_event.is_set)
+        if status_code == 200:
+            return body, None
+        return None, body.get("error")
+
+    try:
+        job = schedule_job_manager.submit(run_job)
+    except JobQueueFullError:
+        return jsonify({"error": "대기 중인 스케줄 작업이 너무 많습니다. 잠시 후 다시 시도해주세요."}), 503
+
+    return jsonify(job.to_dict(include_result=False)), 202
+
+
+@app.route('/api/schedule/jobs/<job_id>', methods=['GET'])
+def get_schedule_job_route(job_id):
+    job = schedule_job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "해당 작업을 찾을 수 없습니다."}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/schedule/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_schedule_job_route(job_id):
+    job = schedule_job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "해당 작업을 찾을 수 없습니다."}), 404
+    return jsonify(job.to_dict())
+
+
+
+# --- 게시된 당직표 이력 API ---
+def _parse_publish_body(data):
+    """게시 요청 본문을 검증해 오류 메시지 또는 None을 반환합니다."""
+    if not isinstance(data, dict):
+        return "게시할 당직표 정보가 필요합니다."
+    try:
+        start = datetime.strptime(data.get('startDate'), "%Y-%m-%d")
+        end = datetime.strptime(data.get('endDate'), "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return "startDate와 endDate는 YYYY-MM-DD 형식이어야 합니다."
+    if start > end:
+        return "시작일은 종료일보다 이전이어야 합니다."
+    duty_roster, summary = data.get('dutyRoster'), data.get('summary')
+    if not isinstance(duty_roster, list) or not all(isinstance(entry, dict) and isinstance(entry.get('date'), str)
+                                                    for entry in duty_roster):
+        return "dutyRoster는 날짜별 배정 목록이어야 합니다."
+    if not isinstance(summary, list):
+        return "summary는 인원별 당직 횟수 목록이어야 합니다."
+    for item in summary:
+        if not isinstance(item, dict) or not isinstance(item.get('person'), str):
+            return "summary 항목에는 person이 필요합니다."
+        for key in ("weekdayDuties", "weekendOrHolidayDuties"):
+            if isinstance(item.get(key), bool) or not isinstance(item.get(key), int) or item[key] < 0:
+                return f"{item['person']}: summary의 {key}는 0 이상의 정수여야 합니다."
+    return None
+
+
+@app.route('/api/history/<team_id>/publish', methods=['POST'])
+def publish_roster_route(team_id):
+    if roster_history_store is None:
+        return jsonify({"error": "이력 저장소가 설정되지 않았습니다 (FAIRDUTY_HISTORY_DB)."}), 503
+    data = request.get_json(silent=True)
+    error_message = _parse_publish_body(data)
+    if error_message is not None:
+        return jsonify({"error": error_message}), 400
+    try:
+        roster_id = roster_history_store.publish(team_id, data['startDate'], data['endDate'], data['dutyRoster'],
+                                                 data['summary'], replace=bool(data.get('replace', False)))
+    except PeriodOverlapError as e:
+        return jsonify({"error": "기간이 겹치는 당직표가 이미 게시되어 있습니다. 교체하려면 replace를 true로 지정하세요.",
+                        "overlappingIds": e.args[0]}), 409
+    return jsonify({"id": roster_id}), 201
+
+
+@app.route('/api/history/<team_id>', methods=['GET'])
+def roster_history_route(team_id):
+    """게시된 기간 목록과 개인별 누적 (?before=YYYY-MM-DD면 그 날짜 이전에 끝난 기간만 합산)."""
+    if roster_history_store is None:
+        return jsonify({"error": "이력 저장소가 설정되지 않았습니다 (FAIRDUTY_HISTORY_DB)."}), 503
+    before = request.args.get('before', '9999-12-31')
+    try:
+        datetime.strptime(before, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "before는 YYYY-MM-DD 형식이어야 합니다."}), 400
+    return jsonify({"periods": roster_history_store.periods(team_id), "totals": roster_history_store.carry_in(team_id, before)})
+
+
+@app.route('/api/history/<team_id>/rosters/<int:roster_id>', methods=['GET'])
+def get_published_roster_route(team_id, roster_id):
+    if roster_history_store is None:
+        return jsonify({"error": "이력 저장소가 설정되지 않았습니다 (FAIRDUTY_HISTORY_DB)."}), 503
+    roster = roster_history_store.roster(team_id, roster_id)
+    if roster is None:
+        return jsonify({"error": "해당 당직표를 찾을 수 없습니다."}), 404
+    return jsonify(roster)
+
 
 if __name__ == '__main__':
     # Heroku는 PORT 환경 변수를 사용
@@ -0,0 +1,425 @@
+"""FairDuty 스케줄러 벤치마크 스크립트.
+
+사용 예:
+    python benchmark.py model-reuse --people 40 --days 90 --candidates 10
+    python benchmark.py parallel --workers 1 2 4 8
+    python benchmark.py modes --people 40 --days 90
+    python benchmark.py warm-start --people 60 --days 182 --duty-per-day 3
+    python benchmark.py horizon --people 30 --months 3 6 12
+    python benchmark.py suite --output results.json --baseline baseline.json
+    python benchmark.py backends --backends cbc highs cpsat --time-limit 30
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import app as fairduty_app
+import solvers
+from app import DutyScheduleModel, _solve_single_schedule_lp, generate_schedule_multi_stage, generate_schedule_rolling_horizon
+
+
+# --- 합성 입력 생성 ---
+def make_synthetic_spec(num_people, num_days, duty_per_day=1, unavailable_density=0.05,
+                        no_consecutive=True, start_date="2025-01-01", seed=0):
+    """재현 가능한(시드 고정) 합성 스케줄 입력을 생성합니다."""
+    rng = random.Random(seed)
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
+    date_strings = [(start_dt + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(num_days)]
+    people = [
+        {"name": f"P{i:03d}", "unavailable": [ds for ds in date_strings if rng.random() < unavailable_density]}
+        for i in range(num_people)
+    ]
+    return {
+        "startDate": date_strings[0],
+        "endDate": date_strings[-1],
+        "people": people,
+        "noConsecutive": no_consecutive,
+        "dutyPerDay": duty_per_day,
+        "extraHolidays": [],
+    }
+
+
+def _model_args(spec):
+    return (spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+            not spec["noConsecutive"], spec["extraHolidays"])
+
+
+# --- 벤치마크: 후보 1개당 비용 (모델 재구성 vs 모델 재사용) ---
+def bench_model_reuse(args):
+    spec = make_synthetic_spec(args.people, args.days, args.duty_per_day, args.unavailable_density, seed=args.seed)
+    model_args = _model_args(spec)
+
+    _, status, target_range = _solve_single_schedule_lp(*model_args, objective_config={'type': 'PRIMARY_FAIRNESS'})
+    if status != "Optimal":
+        print(f"1단계 실패: {status}")
+        return
+
+    random.seed(args.seed)
+    started = time.perf_counter()
+    for _ in range(args.candidates):
+        _solve_single_schedule_lp(*model_args, objective_config={'type': 'RANDOMIZED_SECONDARY', 'target_range': target_range})
+    rebuild_per_candidate = (time.perf_counter() - started) / args.candidates
+
+    random.seed(args.seed)
+    started = time.perf_counter()
+    model = DutyScheduleModel(*model_args)
+    build_time = time.perf_counter() - started
+    for _ in range(args.candidates):
+        model.solve_randomized_secondary(target_range)
+    reuse_per_candidate = (time.perf_counter() - started - build_time) / args.candidates
+
+    print(f"입력: 인원 {args.people}명, {args.days}일, 하루 {args.duty_per_day}명, 후보 {args.candidates}개")
+    print(f"  모델 재구성 (이전): 후보당 {rebuild_per_candidate * 1000:.1f} ms")
+    print(f"  모델 재사용 (이후): 후보당 {reuse_per_candidate * 1000:.1f} ms (+ 최초 구성 {build_time * 1000:.1f} ms)")
+
+
+# --- 벤치마크: 2단계 병렬도별 전체 소요 시간 ---
+def bench_parallel(args):
+    spec = make_synthetic_spec(args.people, args.days, args.duty_per_day, args.unavailable_density, seed=args.seed)
+    # 프로세스 풀은 처음 사용할 때 상한으로 생성되므로 가장 큰 병렬도에 맞춰 둠
+    fairduty_app.MAX_SOLVER_WORKERS = max(args.workers)
+    # 풀 기동(spawn) 비용이 첫 측정에 섞이지 않도록 미리 워커를 띄움
+    pool = fairduty_app._get_solver_pool()
+    list(pool.map(abs, range(fairduty_app.MAX_SOLVER_WORKERS)))
+
+    print(f"입력: 인원 {args.people}명, {args.days}일, 하루 {args.duty_per_day}명, 후보 {args.candidates}개 (CPU {os.cpu_count()}개)")
+    baseline = None
+    reference = None
+    for workers in args.workers:
+        started = time.perf_counter()
+        data, status = generate_schedule_multi_stage(
+            spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+            spec["noConsecutive"], spec["extraHolidays"],
+            num_attempts=args.candidates, parallelism=workers, seed=args.seed
+        )
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        reference = reference or data
+        same = "동일" if data == reference else "다름"
+        print(f"  워커 {workers}개: {elapsed:.2f} s (x{baseline / elapsed:.2f}), 결과 {same} ({status})")
+
+
+# --- 벤치마크: 샘플링 모드 vs 정확 모드 ---
+def bench_modes(args):
+    spec = make_synthetic_spec(args.people, args.days, args.duty_per_day, args.unavailable_density, seed=args.seed)
+    print(f"입력: 인원 {args.people}명, {args.days}일, 하루 {args.duty_per_day}명")
+    for mode in ("sampling", "exact"):
+        started = time.perf_counter()
+        data, status = generate_schedule_multi_stage(
+            spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+            spec["noConsecutive"], spec["extraHolidays"],
+            num_attempts=args.candidates, parallelism=1, seed=args.seed, optimization_mode=mode
+        )
+        elapsed = time.perf_counter() - started
+        if not data:
+            print(f"  {mode}: 실패 ({status})")
+            continue
+        stats = data["stats"]
+        print(f"  {mode}: {elapsed:.2f} s, 솔버 호출 {stats['solverCalls']}회, "
+              f"주중분산 {stats['varWeekday']:.4f}, 주말분산 {stats['varWeekendHoliday']:.4f}, 합 {stats['combinedVariance']:.4f}")
+
+
+# --- 벤치마크: MIP start(웜 스타트) 사용 여부 비교 ---
+def bench_warm_start(args):
+    spec = make_synthetic_spec(args.people, args.days, args.duty_per_day, args.unavailable_density, seed=args.seed)
+    print(f"입력: 인원 {args.people}명, {args.days}일, 하루 {args.duty_per_day}명, 후보 {args.candidates}개, 모드 {args.mode}")
+    for warm_start in (False, True):
+        fairduty_app.MIP_WARM_START = warm_start
+        started = time.perf_counter()
+        data, status = generate_schedule_multi_stage(
+            spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+            spec["noConsecutive"], spec["extraHolidays"],
+            num_attempts=args.candidates, parallelism=1, seed=args.seed, optimization_mode=args.mode
+        )
+        elapsed = time.perf_counter() - started
+        variance = f"{data['stats']['combinedVariance']:.4f}" if data else "-"
+        print(f"  MIP start {'사용' if warm_start else '없음'}: {elapsed:.2f} s, 분산 합 {variance} ({status})")
+
+
+# --- 벤치마크: 단일 모델 vs 롤링 호라이즌 (기간 길이별) ---
+def bench_horizon(args):
+    print(f"입력: 인원 {args.people}명, 하루 {args.duty_per_day}명, 구간 {args.window_days}일 + 겹침 {args.overlap_days}일")
+    for months in args.months:
+        spec = make_synthetic_spec(args.people, round(months * 365 / 12), args.duty_per_day, args.unavailable_density, seed=args.seed)
+        runs = [("horizon", lambda: generate_schedule_rolling_horizon(
+            spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+            spec["noConsecutive"], spec["extraHolidays"], args.window_days, args.overlap_days
+        ))]
+        if not args.skip_monolithic:
+            runs.insert(0, ("단일 모델", lambda: generate_schedule_multi_stage(
+                spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+                spec["noConsecutive"], spec["extraHolidays"], parallelism=1, seed=args.seed, optimization_mode="exact"
+            )))
+        for label, run in runs:
+            started = time.perf_counter()
+            data, status = run()
+            elapsed = time.perf_counter() - started
+            if not data:
+                print(f"  {months}개월 {label}: 실패 ({status})")
+                continue
+            totals = [item["weekdayDuties"] + item["weekendOrHolidayDuties"] for item in data["summary"]]
+            print(f"  {months}개월 {label}: {elapsed:.2f} s, 총 당직일 차이 {max(totals) - min(totals)}, "
+                  f"분산 합 {data['stats']['combinedVariance']:.4f}")
+
+
+# --- 벤치마크: 풀이 백엔드별 소요 시간/분산 비교 (같은 시드의 입력) ---
+def bench_backends(args):
+    spec = make_synthetic_spec(args.people, args.days, args.duty_per_day, args.unavailable_density, seed=args.seed)
+    print(f"입력: 인원 {args.people}명, {args.days}일, 하루 {args.duty_per_day}명, 후보 {args.candidates}개")
+    for backend in args.backends:
+        if not solvers.backend_available(backend):
+            print(f"  {backend}: 설치되지 않음 (건너뜀)")
+            continue
+        solver_options = solvers.resolve_solver_options({
+            "backend": backend, "timeLimit": args.time_limit, "gapRel": args.gap_rel, "threads": args.threads, "inMemory": args.in_memory
+        })
+        for mode in args.modes:
+            started = time.perf_counter()
+            data, status = generate_schedule_multi_stage(
+                spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+                spec["noConsecutive"], spec["extraHolidays"],
+                num_attempts=args.candidates, parallelism=1, seed=args.seed, optimization_mode=mode,
+                solver_options=solver_options
+            )
+            elapsed = time.perf_counter() - started
+            variance = f"{data['stats']['combinedVariance']:.4f}" if data else "-"
+            print(f"  {backend} / {mode}: {elapsed:.2f} s, 분산 합 {variance} ({status})")
+
+
+# --- 벤치마크 모음: 합성 입력 격자 x 엔진, JSON 기록 및 기준선 비교 ---
+SUITE_ENGINES = ("prototype", "single-lp", "multi-stage")
+
+
+def _run_prototype(spec, args):
+    # app_prototype는 holidays/pandas가 필요하므로 설치된 경우에만 측정
+    import app_prototype
+    started = time.perf_counter()
+    data = app_prototype.generate_duty_roster(*_model_args(spec))
+    return {"solveSeconds": time.perf_counter() - started}, data
+
+
+def _run_single_lp(spec, args):
+    started = time.perf_counter()
+    model = DutyScheduleModel(*_model_args(spec))
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    assignment_matrix, status, _ = model.solve_primary_fairness()
+    metrics = {"buildSeconds": build_seconds, "solveSeconds": time.perf_counter() - started}
+    if assignment_matrix is None:
+        return metrics, None
+    return metrics, fairduty_app.render_assignment_matrix(model.people_names, model.day_calendar, assignment_matrix)
+
+
+def _run_multi_stage(spec, args):
+    started = time.perf_counter()
+    data, status = generate_schedule_multi_stage(
+        spec["startDate"], spec["endDate"], spec["people"], spec["dutyPerDay"],
+        spec["noConsecutive"], spec["extraHolidays"],
+        num_attempts=args.candidates, parallelism=1, seed=args.seed
+    )
+    elapsed = time.perf_counter() - started
+    metrics = {"solveSeconds": elapsed}
+    if data:
+        metrics["candidatesPerSecond"] = data["stats"]["solverCalls"] / elapsed
+    return metrics, data
+
+
+_SUITE_RUNNERS = {"prototype": _run_prototype, "single-lp": _run_single_lp, "multi-stage": _run_multi_stage}
+
+
+def _suite_scenarios(args):
+    for num_people, num_days, duty_per_day, density, no_consecutive in itertools.product(
+            args.people, args.days, args.duty_per_day, args.unavailable_density, args.no_consecutive):
+        if num_people < duty_per_day:
+            continue
+        yield {"people": num_people, "days": num_days, "dutyPerDay": duty_per_day,
+               "unavailableDensity": density, "noConsecutive": no_consecutive == "true", "seed": args.seed}
+
+
+def _result_key(result):
+    scenario = result["scenario"]
+    return (result["engine"], scenario["people"], scenario["days"], scenario["dutyPerDay"],
+            scenario["unavailableDensity"], scenario["noConsecutive"], scenario["seed"])
+
+
+def _compare_with_baseline(results, baseline, time_tolerance, min_time_delta, variance_tolerance):
+    """기준선보다 (허용 비율 + 최소 차이 이상) 느려졌거나 분산이 나빠진 항목 목록을 반환합니다."""
+    baseline_by_key = {_result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline_by_key.get(_result_key(result))
+        if previous is None or "error" in result or "error" in previous:
+            continue
+        current_metrics, previous_metrics = result["metrics"], previous["metrics"]
+        now, before = current_metrics["solveSeconds"], previous_metrics["solveSeconds"]
+        if now > before * (1 + time_tolerance) and now - before > min_time_delta:
+            regressions.append((result, f"solveSeconds {before:.3f} -> {now:.3f}"))
+        now, before = current_metrics.get("combinedVariance"), previous_metrics.get("combinedVariance")
+        if now is not None and before is not None and now > before + variance_tolerance:
+            regressions.append((result, f"combinedVariance {before:.4f} -> {now:.4f}"))
+    return regressions
+
+
+def bench_suite(args):
+    results = []
+    for scenario in _suite_scenarios(args):
+        spec = make_synthetic_spec(scenario["people"], scenario["days"], scenario["dutyPerDay"],
+                                   scenario["unavailableDensity"], scenario["noConsecutive"], seed=scenario["seed"])
+        people_names = [p["name"] for p in spec["people"]]
+        for engine in args.engines:
+            result = {"engine": engine, "scenario": scenario}
+            tracemalloc.start()
+            try:
+                metrics, data = _SUITE_RUNNERS[engine](spec, args)
+            except ImportError as exc:
+                result["error"] = f"건너뜀: {exc}"
+                data = None
+            else:
+                result["metrics"] = metrics
+                metrics["peakPythonMemoryKiB"] = tracemalloc.get_traced_memory()[1] // 1024
+            finally:
+                tracemalloc.stop()
+
+            if "error" not in result:
+                if data:
+                    var_weekday, var_weekend_holiday = fairduty_app.calculate_variances(data["summary"], people_names)
+                    totals = [item["weekdayDuties"] + item["weekendOrHolidayDuties"] for item in data["summary"]]
+                    metrics["combinedVariance"] = float(var_weekday + var_weekend_holiday)
+                    metrics["totalDutyRange"] = max(totals) - min(totals)
+                else:
+                    result["error"] = "해를 찾지 못함"
+            results.append(result)
+
+            label = (f"{engine:<12} 인원 {scenario['people']:>3} / {scenario['days']:>3}일 / 하루 {scenario['dutyPerDay']} / "
+                     f"불가 {scenario['unavailableDensity']:.2f} / 연속금지 {'O' if scenario['noConsecutive'] else 'X'}")
+            if "error" in result:
+                print(f"  {label}: {result['error']}")
+            else:
+                print(f"  {label}: {metrics['solveSeconds']:.3f} s, 분산 합 {metrics.get('combinedVariance', float('nan')):.4f}, "
+                      f"메모리 {metrics['peakPythonMemoryKiB']} KiB")
+
+    report = {
+        "meta": {
+            "createdAt": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "candidates": args.candidates,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = _compare_with_baseline(results, baseline, args.time_tolerance, args.min_time_delta, args.variance_tolerance)
+        if regressions:
+            print(f"기준선 대비 성능 저하 {len(regressions)}건:")
+            for result, detail in regressions:
+                scenario = result["scenario"]
+                print(f"  {result['engine']} 인원 {scenario['people']} / {scenario['days']}일 / 하루 {scenario['dutyPerDay']}: {detail}")
+            sys.exit(1)
+        print("기준선 대비 성능 저하 없음")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FairDuty 스케줄러 벤치마크")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reuse_parser = subparsers.add_parser("model-reuse", help="후보 1개당 모델 재구성/재사용 비용 비교")
+    reuse_parser.add_argument("--people", type=int, default=40)
+    reuse_parser.add_argument("--days", type=int, default=90)
+    reuse_parser.add_argument("--duty-per-day", type=int, default=1)
+    reuse_parser.add_argument("--unavailable-density", type=float, default=0.05)
+    reuse_parser.add_argument("--candidates", type=int, default=10)
+    reuse_parser.add_argument("--seed", type=int, default=0)
+    reuse_parser.set_defaults(func=bench_model_reuse)
+
+    parallel_parser = subparsers.add_parser("parallel", help="2단계 병렬도(워커 수)별 전체 소요 시간 비교")
+    parallel_parser.add_argument("--people", type=int, default=40)
+    parallel_parser.add_argument("--days", type=int, default=90)
+    parallel_parser.add_argument("--duty-per-day", type=int, default=1)
+    parallel_parser.add_argument("--unavailable-density", type=float, default=0.05)
+    parallel_parser.add_argument("--candidates", type=int, default=16)
+    parallel_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parallel_parser.add_argument("--seed", type=int, default=0)
+    parallel_parser.set_defaults(func=bench_parallel)
+
+    modes_parser = subparsers.add_parser("modes", help="샘플링 모드와 정확 모드의 소요 시간/분산 비교")
+    modes_parser.add_argument("--people", type=int, default=40)
+    modes_parser.add_argument("--days", type=int, default=90)
+    modes_parser.add_argument("--duty-per-day", type=int, default=1)
+    modes_parser.add_argument("--unavailable-density", type=float, default=0.05)
+    modes_parser.add_argument("--candidates", type=int, default=50)
+    modes_parser.add_argument("--seed", type=int, default=0)
+    modes_parser.set_defaults(func=bench_modes)
+
+    warm_parser = subparsers.add_parser("warm-start", help="MIP start 사용/미사용 시 전체 소요 시간 비교")
+    warm_parser.add_argument("--people", type=int, default=60)
+    warm_parser.add_argument("--days", type=int, default=182)
+    warm_parser.add_argument("--duty-per-day", type=int, default=3)
+    warm_parser.add_argument("--unavailable-density", type=float, default=0.05)
+    warm_parser.add_argument("--candidates", type=int, default=10)
+    warm_parser.add_argument("--mode", choices=["sampling", "exact"], default="sampling")
+    warm_parser.add_argument("--seed", type=int, default=0)
+    warm_parser.set_defaults(func=bench_warm_start)
+
+    horizon_parser = subparsers.add_parser("horizon", help="기간 길이별 단일 모델과 롤링 호라이즌의 소요 시간/공정성 비교")
+    horizon_parser.add_argument("--people", type=int, default=30)
+    horizon_parser.add_argument("--months", type=int, nargs="+", default=[3, 6, 12])
+    horizon_parser.add_argument("--duty-per-day", type=int, default=1)
+    horizon_parser.add_argument("--unavailable-density", type=float, default=0.05)
+    horizon_parser.add_argument("--window-days", type=int, default=31)
+    horizon_parser.add_argument("--overlap-days", type=int, default=7)
+    horizon_parser.add_argument("--skip-monolithic", action="store_true", help="단일 모델 풀이를 건너뜀 (긴 기간에서 오래 걸림)")
+    horizon_parser.add_argument("--seed", type=int, default=0)
+    horizon_parser.set_defaults(func=bench_horizon)
+
+    backends_parser = subparsers.add_parser("backends", help="풀이 백엔드(cbc/highs/cpsat)별 소요 시간/분산 비교")
+    backends_parser.add_argument("--backends", nargs="+", choices=solvers.SOLVER_BACKENDS, default=list(solvers.SOLVER_BACKENDS))
+    backends_parser.add_argument("--modes", nargs="+", choices=["sampling", "exact"], default=["sampling", "exact"])
+    backends_parser.add_argument("--people", type=int, default=40)
+    backends_parser.add_argument("--days", type=int, default=90)
+    backends_parser.add_argument("--duty-per-day", type=int, default=1)
+    backends_parser.add_argument("--unavailable-density", type=float, default=0.05)
+    backends_parser.add_argument("--candidates", type=int, default=10)
+    backends_parser.add_argument("--time-limit", type=float, default=None, help="풀이 1회당 시간 제한 (초)")
+    backends_parser.add_argument("--gap-rel", type=float, default=None)
+    backends_parser.add_argument("--threads", type=int, default=None)
+    backends_parser.add_argument("--in-memory", action="store_true", help="CBC 임시 파일을 /dev/shm에 씀")
+    backends_parser.add_argument("--seed", type=int, default=0)
+    backends_parser.set_defaults(func=bench_backends)
+
+    suite_parser = subparsers.add_parser("suite", help="합성 입력 격자에 대해 엔진별 시간/메모리/분산을 JSON으로 기록하고 기준선과 비교")
+    suite_parser.add_argument("--engines", nargs="+", choices=SUITE_ENGINES, default=list(SUITE_ENGINES))
+    suite_parser.add_argument("--people", type=int, nargs="+", default=[10, 30])
+    suite_parser.add_argument("--days", type=int, nargs="+", default=[31, 90])
+    suite_parser.add_argument("--duty-per-day", type=int, nargs="+", default=[1, 2])
+    suite_parser.add_argument("--unavailable-density", type=float, nargs="+", default=[0.05])
+    suite_parser.add_argument("--no-consecutive", choices=["true", "false"], nargs="+", default=["true"])
+    suite_parser.add_argument("--candidates", type=int, default=10, help="multi-stage 엔진의 2단계 후보 수")
+    suite_parser.add_argument("--seed", type=int, default=0)
+    suite_parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    suite_parser.add_argument("--baseline", help="비교할 기준선 JSON 파일 (이전 --output 결과)")
+    suite_parser.add_argument("--time-tolerance", type=float, default=0.25, help="허용하는 소요 시간 증가 비율")
+    suite_parser.add_argument("--min-time-delta", type=float, default=0.05, help="이보다 작은 시간 차이(초)는 무시")
+    suite_parser.add_argument("--variance-tolerance", type=float, default=1e-6, help="허용하는 분산 합 증가량")
+    suite_parser.set_defaults(func=bench_suite)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""대규모 당직표용 휴리스틱 풀이기.
+
+app_prototype.py의 generate_duty_roster 탐욕 배정(총 당직 횟수가 적은 사람 우선)을
+인원 축으로 벡터화하고, 이동(move)/교환(swap) 지역 탐색으로 공정성을 개선합니다.
+
+배정 결과는 (인원 x 날짜) 0/1 행렬이며, 평가 기준은 LP 모델과 같습니다.
+  1순위: 개인별 총 당직 횟수의 최대-최소 차이 (1단계 목적 함수)
+  2순위: 주중 / 주말·공휴일 횟수의 제곱합 (총합이 고정이므로 분산 합과 같은 순서)
+"""
+import time
+
+import numpy as np
+
+
+def total_range_lower_bound(num_people, num_days, duty_per_day):
+    """총 당직 횟수 최대-최소 차이의 자명한 하한 (균등 분배가 가능하면 0, 아니면 1)."""
+    return 0 if (num_days * duty_per_day) % num_people == 0 else 1
+
+
+def evaluate(assignment, is_off):
+    """배정 행렬의 (총 당직일 차이, 주중/주말 횟수 제곱합)을 반환합니다."""
+    totals = assignment.sum(axis=1)
+    off_counts = assignment[:, is_off].sum(axis=1)
+    work_counts = totals - off_counts
+    return int(totals.max() - totals.min()), int((work_counts ** 2).sum() + (off_counts ** 2).sum())
+
+
+def greedy_assign(available, is_off, duty_per_day, allow_consecutive, rng):
+    """날짜 순서대로, 총 횟수 → 같은 유형(주중/주말) 횟수 → 무작위 순으로 적은 사람을 배정합니다.
+
+    어떤 날짜에 배정 가능한 인원이 duty_per_day보다 적으면 None을 반환합니다.
+    """
+    num_people, num_days = available.shape
+    assignment = np.zeros((num_people, num_days), dtype=np.int8)
+    totals = np.zeros(num_people, dtype=np.int64)
+    type_counts = np.zeros((2, num_people), dtype=np.int64) # [0]: 주중, [1]: 주말·공휴일
+
+    for d in range(num_days):
+        candidates = available[:, d].copy()
+        if not allow_consecutive and d > 0:
+            candidates &= assignment[:, d - 1] == 0
+        candidate_idx = np.flatnonzero(candidates)
+        if len(candidate_idx) < duty_per_day:
+            return None
+
+        day_type = int(is_off[d])
+        order = np.lexsort((
+            rng.random(len(candidate_idx)),
+            type_counts[day_type, candidate_idx],
+            totals[candidate_idx],
+        ))
+        chosen = candidate_idx[order[:duty_per_day]]
+        assignment[chosen, d] = 1
+        totals[chosen] += 1
+        type_counts[day_type, chosen] += 1
+    return assignment
+
+
+def _can_take(assignment, available, allow_consecutive, person, day, leaving_day=None):
+    """person이 day에 새로 배정될 수 있는지 확인합니다 (leaving_day의 배정은 빠진다고 가정)."""
+    if not available[person, day] or assignment[person, day]:
+        return False
+    if allow_consecutive:
+        return True
+    num_days = assignment.shape[1]
+    for neighbour in (day - 1, day + 1):
+        if 0 <= neighbour < num_days and neighbour != leaving_day and assignment[person, neighbour]:
+            return False
+    return True
+
+
+def _move_targets(assignment, available, allow_consecutive, day):
+    """day에 새로 배정될 수 있는 인원 마스크 (벡터화)."""
+    targets = available[:, day] & (assignment[:, day] == 0)
+    if not allow_consecutive:
+        if day > 0:
+            targets &= assignment[:, day - 1] == 0
+        if day + 1 < assignment.shape[1]:
+            targets &= assignment[:, day + 1] == 0
+    return targets
+
+
+def local_search(assignment, available, is_off, allow_consecutive, rng, deadline, range_lower_bound=0):
+    """이동/교환 연산으로 (총 당직일 차이, 제곱합)을 개선합니다. 개선이 없거나 deadline이 지나면 종료."""
+    num_people, num_days = assignment.shape
+    day_types = is_off.astype(np.int64)
+    totals = assignment.sum(axis=1).astype(np.int64)
+    type_counts = np.stack([assignment[:, ~is_off].sum(axis=1), assignment[:, is_off].sum(axis=1)]).astype(np.int64)
+
+    def score():
+        return int(totals.max() - totals.min()), int((type_counts ** 2).sum())
+
+    current = score()
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+
+        # 이동: day의 당직자 a를 배정 가능한 b로 교체 (a의 총 횟수 -1, b의 총 횟수 +1)
+        for day in rng.permutation(num_days):
+            if time.monotonic() >= deadline:
+                break
+            t = day_types[day]
+            targets = np.flatnonzero(_move_targets(assignment, available, allow_consecutive, day))
+            if len(targets) == 0:
+                continue
+            for a in np.flatnonzero(assignment[:, day]):
+                new_totals = np.repeat(totals[None, :], len(targets), axis=0)
+                new_totals[:, a] -= 1
+                new_totals[np.arange(len(targets)), targets] += 1
+                new_ranges = new_totals.max(axis=1) - new_totals.min(axis=1)
+                sq_delta = 2 * (type_counts[t, targets] - type_counts[t, a]) + 2
+                keys = new_ranges * (4 * num_days * num_days + 1) + sq_delta
+                best = int(np.argmin(keys))
+                new_score = (int(new_ranges[best]), current[1] + int(sq_delta[best]))
+                if new_score < current:
+                    b = targets[best]
+                    assignment[a, day], assignment[b, day] = 0, 1
+                    totals[a] -= 1
+                    totals[b] += 1
+                    type_counts[t, a] -= 1
+                    type_counts[t, b] += 1
+                    current = new_score
+                    improved = True
+                    targets = np.flatnonzero(_move_targets(assignment, available, allow_consecutive, day))
+                    if len(targets) == 0:
+                        break
+
+        # 교환: 유형 t 횟수가 많은 a와 적은 b가 (a의 t 유형 날짜) <-> (b의 다른 유형 날짜)를 맞바꿈
+        # 총 횟수는 그대로이고 주중/주말 균형만 개선됨
+        for t in (1, 0):
+            if time.monotonic() >= deadline:
+                break
+            order = np.argsort(type_counts[t])
+            for a in order[::-1][:max(1, num_people // 4)]:
+                for b in order[:max(1, num_people // 4)]:
+                    # 제곱합 변화량 = 4 - 2 * gain 이므로 gain > 2 일 때만 개선
+                    gain = (type_counts[t, a] - type_counts[t, b]) + (type_counts[1 - t, b] - type_counts[1 - t, a])
+                    if gain <= 2:
+                        continue
+                    swapped = _try_swap(assignment, available, allow_consecutive, day_types, a, b, t)
+                    if swapped:
+                        type_counts[t, a] -= 1
+                        type_counts[t, b] += 1
+                        type_counts[1 - t, a] += 1
+                        type_counts[1 - t, b] -= 1
+                        current = score()
+                        improved = True
+
+        if current[0] <= range_lower_bound and not improved:
+            break
+    return assignment
+
+
+def _try_swap(assignment, available, allow_consecutive, day_types, a, b, t):
+    a_days = np.flatnonzero((assignment[a] == 1) & (assignment[b] == 0) & (day_types == t))
+    b_days = np.flatnonzero((assignment[b] == 1) & (assignment[a] == 0) & (day_types != t))
+    for d1 in a_days:
+        if not available[b, d1]:
+            continue
+        for d2 in b_days:
+            if (_can_take(assignment, available, allow_consecutive, a, d2, leaving_day=d1)
+                    and _can_take(assignment, available, allow_consecutive, b, d1, leaving_day=d2)):
+                assignment[a, d1], assignment[b, d1] = 0, 1
+                assignment[b, d2], assignment[a, d2] = 0, 1
+                return True
+    return False
+
+
+def solve_heuristic(available, is_off, duty_per_day, allow_consecutive, deadline, seed=None, max_restarts=20):
+    """탐욕 배정 + 지역 탐색으로 deadline(time.monotonic 기준)까지 찾은 최선의 배정 행렬을 반환합니다.
+
+    재시작마다 먼저 deadline을 확인하므로, 가능한 배정을 하나도 찾지 못한 채 deadline이 지나면 None을 반환합니다.
+    """
+    rng = np.random.default_rng(seed)
+    num_people, num_days = available.shape
+    range_lower_bound = total_range_lower_bound(num_people, num_days, duty_per_day)
+
+    best_assignment, best_score = None, None
+    for _ in range(max_restarts):
+        if time.monotonic() >= deadline:
+            break
+        assignment = greedy_assign(available, is_off, duty_per_day, allow_consecutive, rng)
+        if assignment is None:
+            continue
+        assignment = local_search(assignment, available, is_off, allow_consecutive, rng, deadline, range_lower_bound)
+        current = evaluate(assignment, is_off)
+        if best_score is None or current < best_score:
+            best_assignment, best_score = assignment, current
+        if best_score[0] <= range_lower_bound or time.monotonic() >= deadline:
+            break
+    return best_assignment
@@ -0,0 +1,116 @@
+"""공휴일/요일 달력 인덱스.
+
+연도별 날짜 유형(주말, 공휴일) 비트마스크 배열을 (지역, 연도) 단위로 한 번만 계산해 메모리에 캐시하고,
+요청 기간의 달력은 그 배열을 잘라 사용자 지정 추가 공휴일을 합쳐 만듭니다.
+공휴일 데이터는 holiday_data/<지역>.json으로 함께 배포되므로 외부 라이브러리나 네트워크 없이 동작합니다.
+"""
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+HOLIDAY_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "holiday_data")
+SUPPORTED_REGIONS = ("KR",)
+
+# 날짜 유형 비트
+DAY_WEEKEND = 1
+DAY_PUBLIC_HOLIDAY = 2
+DAY_EXTRA_HOLIDAY = 4 # 요청의 extraHolidays
+
+# numpy datetime64[D]의 0일(1970-01-01)은 목요일
+_EPOCH_WEEKDAY = 3
+
+
+@lru_cache(maxsize=None)
+def load_region_holidays(region):
+    """번들된 공휴일 데이터를 {연도: {"YYYY-MM-DD": 공휴일 이름}}으로 읽습니다."""
+    with open(os.path.join(HOLIDAY_DATA_DIR, f"{region.lower()}.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    return {int(year): holidays for year, holidays in data["holidays"].items()}
+
+
+def _weekdays(days):
+    """datetime64[D] 배열의 요일 (월=0 ... 일=6)."""
+    return ((days.astype(np.int64) + _EPOCH_WEEKDAY) % 7).astype(np.int8)
+
+
+@lru_cache(maxsize=128)
+def year_day_types(region, year):
+    """year의 1월 1일부터 12월 31일까지 날짜 유형 비트마스크 (uint8, 읽기 전용).
+
+    region이 None이거나 데이터에 없는 연도면 주말 비트만 채워집니다.
+    """
+    first_day = np.datetime64(f"{year:04d}-01-01", "D")
+    days = np.arange(first_day, np.datetime64(f"{year + 1:04d}-01-01", "D"))
+    day_types = np.where(_weekdays(days) >= 5, DAY_WEEKEND, 0).astype(np.uint8)
+    if region is not None:
+        for date_str in load_region_holidays(region).get(year, {}):
+            day_types[int((np.datetime64(date_str, "D") - first_day).astype(np.int64))] |= DAY_PUBLIC_HOLIDAY
+    day_types.flags.writeable = False
+    return day_types
+
+
+class DayCalendar:
+    """기간의 날짜별 정보를 배열로 담은 달력.
+
+    dates: "YYYY-MM-DD" 문자열 목록, weekdays: 요일 배열 (월=0), day_types: 날짜 유형 비트마스크 배열,
+    is_off: 주말 또는 공휴일(공공/추가) 여부 배열. 여러 요청이 공유하므로 배열은 읽기 전용입니다.
+    """
+
+    def __init__(self, dates, weekdays, day_types, missing_holiday_years=(), ignored_extra_holidays=()):
+        self.dates = dates
+        self.weekdays = weekdays
+        self.day_types = day_types
+        self.is_off = day_types != 0
+        self.date_index = {date_str: i for i, date_str in enumerate(dates)}
+        self.missing_holiday_years = missing_holiday_years # 공휴일 데이터가 없어 주말만 반영된 연도
+        self.ignored_extra_holidays = ignored_extra_holidays # 형식이 잘못되어 무시된 추가 공휴일
+        for array in (weekdays, day_types, self.is_off):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def _parse_date(date_str):
+    return np.datetime64(datetime.strptime(date_str, "%Y-%m-%d").date(), "D")
+
+
+@lru_cache(maxsize=256)
+def _cached_day_calendar(start_str, end_str, region, extra_holidays_key):
+    start_day, end_day = _parse_date(start_str), _parse_date(end_str)
+    days = np.arange(start_day, end_day + 1)
+    if len(days) == 0:
+        empty = np.zeros(0, dtype=np.uint8)
+        return DayCalendar([], empty.astype(np.int8), empty)
+
+    first_year, last_year = start_day.astype(object).year, end_day.astype(object).year
+    offset = int((start_day - np.datetime64(f"{first_year:04d}-01-01", "D")).astype(np.int64))
+    day_types = np.concatenate([year_day_types(region, year) for year in range(first_year, last_year + 1)])
+    day_types = day_types[offset:offset + len(days)].copy()
+
+    ignored = []
+    for date_str in extra_holidays_key:
+        try:
+            d_idx = int((_parse_date(date_str) - start_day).astype(np.int64))
+        except ValueError:
+            ignored.append(date_str)
+            continue
+        if 0 <= d_idx < len(days):
+            day_types[d_idx] |= DAY_EXTRA_HOLIDAY
+
+    missing_years = ()
+    if region is not None:
+        covered = load_region_holidays(region)
+        missing_years = tuple(year for year in range(first_year, last_year + 1) if year not in covered)
+    return DayCalendar(np.datetime_as_string(days).tolist(), _weekdays(days), day_types, missing_years, tuple(ignored))
+
+
+def build_day_calendar(start_str, end_str, extra_holidays=(), region=None):
+    """start_str ~ end_str 기간의 달력을 (기간, 지역, 추가 공휴일) 단위로 캐시해 반환합니다.
+
+    region(예: "KR")의 공휴일과 extra_holidays를 합쳐 공휴일로 표시합니다.
+    """
+    return _cached_day_calendar(start_str, end_str, region, tuple(sorted({str(d_str) for d_str in extra_holidays})))
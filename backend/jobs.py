@@ -0,0 +1,138 @@
+"""오래 걸리는 스케줄 생성을 위한 비동기 작업 관리자.
+
+POST 요청은 작업 ID만 즉시 돌려받고, 실제 풀이는 백그라운드 스레드에서 실행됩니다.
+동시에 실행되는 작업 수와 대기열 길이를 제한해 많은 팀이 한꺼번에 요청해도
+Flask 워커와 CPU가 고갈되지 않도록 합니다.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 작업 상태 (queued → running → succeeded / failed / cancelled)
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+
+class JobQueueFullError(Exception):
+    """대기 중 + 실행 중인 작업 수가 상한에 도달했을 때 발생합니다."""
+
+
+class ScheduleJob:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "queued" # queued → running → succeeded / failed / cancelled
+        self.progress = {"stage": 0}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_finished(self):
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def update_progress(self, progress):
+        with self._lock:
+            self.progress = dict(self.progress, **progress)
+
+    def to_dict(self, include_result=True):
+        with self._lock:
+            job_dict = {
+                "jobId": self.id,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "createdAt": self.created_at,
+                "startedAt": self.started_at,
+                "finishedAt": self.finished_at,
+            }
+            if self.error is not None:
+                job_dict["error"] = self.error
+            if include_result and self.result is not None:
+                job_dict["result"] = self.result
+            return job_dict
+
+
+class ScheduleJobManager:
+    """제한된 스레드 풀과 대기열로 스케줄 작업을 실행하고, 끝난 작업은 result_ttl_seconds 동안 보관합니다."""
+
+    def __init__(self, max_concurrent_jobs=2, max_queued_jobs=16, result_ttl_seconds=3600):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.result_ttl_seconds = result_ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="schedule-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, run_job):
+        """run_job(job)을 백그라운드에서 실행할 작업을 만듭니다.
+
+        run_job은 (결과 dict, 오류 메시지) 튜플을 반환해야 합니다.
+        """
+        with self._lock:
+            self._purge_expired()
+            active = sum(1 for job in self._jobs.values() if not job.is_finished)
+            if active >= self.max_concurrent_jobs + self.max_queued_jobs:
+                raise JobQueueFullError()
+            job = ScheduleJob(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, run_job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """작업 취소를 요청합니다. 대기 중이면 바로 취소되고, 실행 중이면 남은 후보 시도가 중단됩니다."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        with job._lock:
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+        return job
+
+    def stats(self):
+        """상태별 작업 수(보관 중인 끝난 작업 포함)와 동시 실행/대기열 상한. /metrics에 게이지로 내보냅니다."""
+        with self._lock:
+            self._purge_expired()
+            counts = dict.fromkeys(JOB_STATUSES, 0)
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {
+            "maxConcurrentJobs": self.max_concurrent_jobs,
+            "maxQueuedJobs": self.max_queued_jobs,
+            "jobs": counts,
+        }
+
+    def _run(self, job, run_job):
+        with job._lock:
+            if job.status == "cancelled":
+                return
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            result, error = run_job(job)
+        except Exception as exc: # 작업 스레드의 예외가 조용히 사라지지 않도록 상태에 기록
+            result, error = None, f"스케줄 생성 중 오류가 발생했습니다: {exc}"
+        with job._lock:
+            job.result = result
+            job.error = error
+            if job.cancel_event.is_set():
+                job.status = "cancelled"
+            else:
+                job.status = "succeeded" if result is not None else "failed"
+            job.finished_at = time.time()
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.is_finished and job.finished_at is not None and now - job.finished_at > self.result_ttl_seconds]
+        for job_id in expired:
+            del self._jobs[job_id]
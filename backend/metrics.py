@@ -0,0 +1,186 @@
+"""스케줄러 핫패스 계측과 Prometheus 텍스트 형식 내보내기.
+
+외부 의존성 없이 카운터/히스토그램과 요청 시점에 값을 읽는 게이지만 구현합니다. 값은 프로세스별로 쌓이므로
+gunicorn 워커가 여럿이면 /metrics는 요청을 받은 워커의 값만 보여줍니다.
+후보 풀이 프로세스 풀의 워커에서 기록한 값은 collect()로 모아 요청 프로세스에서 replay()합니다.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# 구간 소요 시간 히스토그램 버킷 (초)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 문제 크기 라벨 구간: 값 그대로 쓰면 라벨 조합이 끝없이 늘어나므로 상한 구간으로 묶음
+PEOPLE_SIZE_CLASSES = (10, 25, 50, 100, 200)
+DAYS_SIZE_CLASSES = (31, 92, 184, 366)
+
+
+def _size_class(value, upper_bounds):
+    for upper_bound in upper_bounds:
+        if value <= upper_bound:
+            return f"le{upper_bound}"
+    return f"gt{upper_bounds[-1]}"
+
+
+def problem_size_labels(num_people, num_days, duty_per_day):
+    """계측 구간에 붙이는 문제 크기 라벨 (인원 수, 날짜 수는 구간으로 묶음)."""
+    return {
+        "people": _size_class(num_people, PEOPLE_SIZE_CLASSES),
+        "days": _size_class(num_days, DAYS_SIZE_CLASSES),
+        "duty_per_day": str(duty_per_day),
+    }
+
+
+def _escape_label_value(val):
+    return str(val).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_items):
+    if not label_items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(val)}"' for name, val in label_items) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {} # 정렬된 라벨 튜플 -> 값
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, val in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {val}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {} # 정렬된 라벨 튜플 -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, val, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, upper_bound in enumerate(self.buckets):
+                if val <= upper_bound:
+                    series[i] += 1
+            series[-2] += val
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for upper_bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', repr(float(upper_bound))),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        return self._register(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(name, lambda: Histogram(name, help_text, buckets))
+
+    def _register(self, name, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def get(self, name):
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def render_gauge(name, help_text, samples):
+    """요청 시점에 읽은 값을 게이지로 렌더링합니다. samples는 (라벨 dict, 값) 목록입니다."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, val in samples:
+        lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {val}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+SPAN_SECONDS = registry.histogram(
+    "fairduty_span_seconds", "스케줄러 핫패스 구간별 소요 시간 (날짜 생성, 모델 구성, 풀이, 해 추출, 분산 계산)")
+SOLVER_STATUS_TOTAL = registry.counter(
+    "fairduty_solver_status_total", "솔버 호출 결과 상태별 횟수 (Optimal / Infeasible / error)")
+
+# collect() 중인 스레드에서 기록된 값을 모으는 목록 (워커 프로세스 → 요청 프로세스 전달용)
+_collector = threading.local()
+
+
+def _record(metric_name, kind, val, labels):
+    if kind == "observe":
+        registry.get(metric_name).observe(val, **labels)
+    else:
+        registry.get(metric_name).inc(val, **labels)
+    events = getattr(_collector, "events", None)
+    if events is not None:
+        events.append((metric_name, kind, val, labels))
+
+
+def observe_span(span_name, seconds, size_labels):
+    _record(SPAN_SECONDS.name, "observe", seconds, dict(size_labels, span=span_name))
+
+
+def count_solver_status(backend, status):
+    _record(SOLVER_STATUS_TOTAL.name, "inc", 1, {"backend": backend, "status": status})
+
+
+@contextmanager
+def span(span_name, size_labels):
+    """with 블록의 소요 시간을 span_name 구간으로 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_span(span_name, time.perf_counter() - started, size_labels)
+
+
+@contextmanager
+def collect():
+    """블록 안에서 현재 스레드가 기록한 값을 목록으로 모읍니다 (다른 프로세스에서 replay()로 다시 기록)."""
+    previous = getattr(_collector, "events", None)
+    _collector.events = events = []
+    try:
+        yield events
+    finally:
+        _collector.events = previous
+
+
+def replay(events):
+    for metric_name, kind, val, labels in events:
+        _record(metric_name, kind, val, labels)
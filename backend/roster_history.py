@@ -0,0 +1,177 @@
+"""팀별 게시된 당직표 이력 저장소 (SQLite).
+
+게시(publish)된 당직표의 dutyRoster와 summary를 팀별로 기록하고, 개인별 누적 주중/주말·공휴일 횟수와
+마지막 당직일을 (팀, 인원) 기본 키로 된 집계 테이블에 함께 갱신합니다.
+새 기간을 스케줄링할 때는 이 집계만 읽으므로 이력이 몇 년치 쌓여도 조회 비용은 인원 수에만 비례합니다.
+새 기간이 마지막으로 게시된 기간보다 앞서거나 겹치면, (팀, 종료일) 인덱스로 시작일 이전에 끝난 기간만 합산합니다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rosters (
+    id INTEGER PRIMARY KEY,
+    team_id TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    published_at REAL NOT NULL,
+    duty_roster TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rosters_team_period ON rosters (team_id, start_date, end_date);
+
+-- 게시된 당직표별 개인 횟수 (기간 이전 이력 합산과 집계 재계산용)
+CREATE TABLE IF NOT EXISTS roster_people (
+    roster_id INTEGER NOT NULL REFERENCES rosters (id) ON DELETE CASCADE,
+    team_id TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    person TEXT NOT NULL,
+    weekday_duties INTEGER NOT NULL,
+    weekend_holiday_duties INTEGER NOT NULL,
+    last_duty_date TEXT,
+    PRIMARY KEY (roster_id, person)
+);
+CREATE INDEX IF NOT EXISTS roster_people_team_end ON roster_people (team_id, end_date);
+
+-- 팀별 개인 누적 집계 (새 기간 스케줄링 시 이 테이블만 읽음)
+CREATE TABLE IF NOT EXISTS person_totals (
+    team_id TEXT NOT NULL,
+    person TEXT NOT NULL,
+    weekday_duties INTEGER NOT NULL,
+    weekend_holiday_duties INTEGER NOT NULL,
+    last_duty_date TEXT,
+    PRIMARY KEY (team_id, person)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS teams (
+    team_id TEXT PRIMARY KEY,
+    last_end_date TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class PeriodOverlapError(Exception):
+    """같은 팀에 기간이 겹치는 당직표가 이미 게시되어 있을 때 발생합니다 (replace=True면 교체)."""
+
+
+def last_duty_dates(duty_roster):
+    """dutyRoster에서 개인별 마지막 당직일을 찾습니다."""
+    last_dates = {}
+    for entry in duty_roster:
+        for person in (name.strip() for name in (entry.get('duty') or '').split(',')):
+            if person and entry['date'] > last_dates.get(person, ''):
+                last_dates[person] = entry['date']
+    return last_dates
+
+
+class RosterHistoryStore:
+    """스레드 안전 SQLite 이력 저장소. 연결 하나를 잠금으로 공유하고 WAL 모드로 여러 워커 프로세스의 동시 읽기를 허용합니다."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def publish(self, team_id, start_date, end_date, duty_roster, summary, replace=False):
+        """당직표를 게시하고 누적 집계를 갱신합니다. 게시된 당직표의 id를 반환합니다.
+
+        기간이 겹치는 이전 게시본이 있으면 replace=True일 때 지우고 집계를 다시 계산하며,
+        아니면 PeriodOverlapError를 발생시킵니다.
+        """
+        last_dates = last_duty_dates(duty_roster)
+        people_rows = [(item['person'], int(item['weekdayDuties']), int(item['weekendOrHolidayDuties']),
+                        last_dates.get(item['person'])) for item in summary]
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                overlapping = [row[0] for row in conn.execute(
+                    "SELECT id FROM rosters WHERE team_id = ? AND start_date <= ? AND end_date >= ?",
+                    (team_id, end_date, start_date))]
+                if overlapping and not replace:
+                    raise PeriodOverlapError(overlapping)
+                conn.executemany("DELETE FROM rosters WHERE id = ?", [(roster_id,) for roster_id in overlapping])
+
+                roster_id = conn.execute(
+                    "INSERT INTO rosters (team_id, start_date, end_date, published_at, duty_roster, summary) VALUES (?, ?, ?, ?, ?, ?)",
+                    (team_id, start_date, end_date, time.time(),
+                     json.dumps(duty_roster, ensure_ascii=False), json.dumps(summary, ensure_ascii=False))).lastrowid
+                conn.executemany(
+                    "INSERT INTO roster_people (roster_id, team_id, end_date, person, weekday_duties, weekend_holiday_duties, last_duty_date) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(roster_id, team_id, end_date) + row for row in people_rows])
+
+                if overlapping:
+                    # 교체된 게시본의 횟수를 빼기 위해 이 팀의 집계만 처음부터 다시 계산
+                    conn.execute("DELETE FROM person_totals WHERE team_id = ?", (team_id,))
+                    conn.execute(
+                        "INSERT INTO person_totals SELECT team_id, person, SUM(weekday_duties), SUM(weekend_holiday_duties), "
+                        "MAX(last_duty_date) FROM roster_people WHERE team_id = ? GROUP BY person", (team_id,))
+                else:
+                    conn.executemany(
+                        "INSERT INTO person_totals VALUES (?, ?, ?, ?, ?) ON CONFLICT (team_id, person) DO UPDATE SET "
+                        "weekday_duties = weekday_duties + excluded.weekday_duties, "
+                        "weekend_holiday_duties = weekend_holiday_duties + excluded.weekend_holiday_duties, "
+                        "last_duty_date = MAX(COALESCE(last_duty_date, excluded.last_duty_date), "
+                        "COALESCE(excluded.last_duty_date, last_duty_date))", # 한쪽이 NULL이면 다른 쪽
+                        [(team_id,) + row for row in people_rows])
+                conn.execute(
+                    "INSERT INTO teams VALUES (?, ?) ON CONFLICT (team_id) DO UPDATE SET last_end_date = "
+                    "(SELECT MAX(end_date) FROM rosters WHERE team_id = excluded.team_id)", (team_id, end_date))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return roster_id
+
+    def carry_in(self, team_id, start_date):
+        """start_date 이전에 끝난 게시본의 개인별 누적을 carry_in 형식으로 반환합니다.
+
+        {이름: {"weekdayDuties", "weekendOrHolidayDuties", "lastDutyDate"}}
+        """
+        with self._lock:
+            team_row = self._conn.execute("SELECT last_end_date FROM teams WHERE team_id = ?", (team_id,)).fetchone()
+            if team_row is None:
+                return {}
+            if team_row[0] < start_date:
+                rows = self._conn.execute(
+                    "SELECT person, weekday_duties, weekend_holiday_duties, last_duty_date FROM person_totals WHERE team_id = ?",
+                    (team_id,)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT person, SUM(weekday_duties), SUM(weekend_holiday_duties), MAX(last_duty_date) FROM roster_people "
+                    "WHERE team_id = ? AND end_date < ? GROUP BY person", (team_id, start_date)).fetchall()
+        return {person: {"weekdayDuties": weekday, "weekendOrHolidayDuties": weekend_holiday, "lastDutyDate": last_date}
+                for person, weekday, weekend_holiday, last_date in rows}
+
+    def periods(self, team_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, start_date, end_date, published_at FROM rosters WHERE team_id = ? ORDER BY start_date",
+                (team_id,)).fetchall()
+        return [{"id": roster_id, "startDate": start, "endDate": end, "publishedAt": published_at}
+                for roster_id, start, end, published_at in rows]
+
+    def roster(self, team_id, roster_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_date, end_date, published_at, duty_roster, summary FROM rosters WHERE team_id = ? AND id = ?",
+                (team_id, roster_id)).fetchone()
+        if row is None:
+            return None
+        start, end, published_at, duty_roster, summary = row
+        return {"id": roster_id, "startDate": start, "endDate": end, "publishedAt": published_at,
+                "dutyRoster": json.loads(duty_roster), "summary": json.loads(summary)}
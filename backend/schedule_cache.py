@@ -0,0 +1,182 @@
+"""/api/schedule 결과 캐시.
+
+같은 입력(인원, 기간, 공휴일, dutyPerDay, seed 등)으로 반복 요청하면 LP를 다시 풀지 않고
+이전 결과를 돌려줍니다. 메모리(LRU + TTL)를 기본으로 하고, 디렉터리를 지정하면 디스크에도
+저장해 워커 재시작 후에도 재사용합니다.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_schedule_key(params):
+    """요청 파라미터를 정규화한 뒤 SHA-256 해시로 캐시 키를 만듭니다.
+
+    인원은 이름순으로, 당직 불가일과 추가 공휴일은 중복 제거 후 정렬하므로
+    입력 순서만 다른 요청은 같은 키를 갖습니다.
+    """
+    canonical = dict(params)
+    canonical['people'] = sorted(
+        ({**p, 'unavailable': sorted(set(p.get('unavailable', [])))} for p in params.get('people', [])),
+        key=lambda p: p['name']
+    )
+    canonical['extraHolidays'] = sorted(set(params.get('extraHolidays', [])))
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ScheduleResultCache:
+    """크기(LRU)와 TTL로 만료되는 스레드 안전 결과 캐시. disk_dir가 있으면 디스크에도 저장합니다."""
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict() # key -> (만료 시각, 결과)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_write_errors = 0
+        if disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+            except OSError:
+                # 디스크 캐시를 쓸 수 없어도 서버는 메모리 캐시만으로 동작
+                logger.exception(f"캐시 디렉터리를 만들 수 없어 메모리 캐시만 사용합니다: {disk_dir}")
+                self.disk_dir = None
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_memory(key, value, now)
+        return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._store_memory(key, value, now)
+        self._write_disk(key, value, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl_seconds,
+                "diskBacked": bool(self.disk_dir),
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "diskWriteErrors": self.disk_write_errors,
+                "hitRatio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _store_memory(self, key, value, now):
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expiresAt", 0) <= now:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def _write_disk(self, key, value, now):
+        if not self.disk_dir:
+            return
+        # 임시 파일에 쓴 뒤 교체하여, 동시에 읽는 워커가 반쯤 쓰인 파일을 보지 않도록 함
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expiresAt": now + self.ttl_seconds, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            # 디스크가 가득 찼거나 읽기 전용이어도 결과는 메모리 캐시에 이미 있으므로 요청은 성공으로 처리
+            logger.exception("결과 캐시를 디스크에 쓰지 못했습니다 (메모리 캐시만 사용)")
+            with self._lock:
+                self.disk_write_errors += 1
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        try:
+            names = [name for name in os.listdir(self.disk_dir) if name.endswith(".json")]
+        except OSError:
+            return
+        if len(names) <= self.max_entries:
+            return
+        aged_paths = []
+        for name in names:
+            path = os.path.join(self.disk_dir, name)
+            try:
+                aged_paths.append((os.path.getmtime(path), path))
+            except OSError: # 다른 워커가 먼저 지운 경우
+                pass
+        aged_paths.sort()
+        for _, path in aged_paths[:len(aged_paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
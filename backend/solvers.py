@@ -0,0 +1,199 @@
+"""LP/MIP 풀이 백엔드 선택 및 설정.
+
+모든 모델은 PuLP LpProblem으로 구성하고, 실제 풀이만 백엔드별로 나눕니다.
+  cbc   : PuLP에 포함된 CBC (기본값, 추가 설치 불필요)
+  highs : HiGHS (pip install highspy, 프로세스 내 풀이라 임시 파일이 없음)
+  cpsat : OR-Tools CP-SAT (pip install ortools, LpProblem을 CP-SAT 모델로 변환해 풀이)
+
+배포 기본값은 환경 변수로, 요청별 설정은 /api/schedule의 "solver" 객체로 지정합니다.
+"""
+import importlib.util
+import os
+import re
+import tempfile
+import time
+
+from pulp import (HiGHS, LpConstraintEQ, LpConstraintGE, LpConstraintLE, LpMaximize, LpSolutionIntegerFeasible,
+                  LpSolutionNoSolutionFound, LpSolutionOptimal, LpStatusInfeasible, LpStatusNotSolved, LpStatusOptimal,
+                  PULP_CBC_CMD)
+
+import metrics
+
+SOLVER_BACKENDS = ("cbc", "highs", "cpsat")
+
+# 메모리 기반 파일 시스템 (CBC가 주고받는 MPS/해 파일을 디스크 대신 여기에 씀)
+IN_MEMORY_TMP_DIR = "/dev/shm"
+
+# CP-SAT은 정수 계수만 다루므로 실수 목적 함수 계수(무작위 2단계 목적 함수 등)를 이 배율로 반올림
+CPSAT_OBJECTIVE_SCALE = 10 ** 6
+# 상한이 없는 변수(제곱 근사 변수 등)에 쓰는 CP-SAT 정수 도메인 상한
+CPSAT_DEFAULT_UPPER_BOUND = 10 ** 9
+
+# CBC 로그에서 첫 정수해(incumbent)를 찾은 시각을 추출하기 위한 패턴
+# 예: "Cbc0012I Integer solution of 0 found by Reduced search after 0 iterations and 0 nodes (0.07 seconds)"
+_CBC_INCUMBENT_PATTERN = re.compile(r"Integer solution of .*?\(([\d.]+) seconds\)")
+
+
+def _first_incumbent_seconds(cbc_log_text):
+    match = _CBC_INCUMBENT_PATTERN.search(cbc_log_text)
+    return float(match.group(1)) if match else None
+
+
+def _env_float(name):
+    raw = os.environ.get(name)
+    return float(raw) if raw else None
+
+
+def default_solver_options():
+    """환경 변수로 지정한 배포 기본 설정."""
+    threads = os.environ.get('FAIRDUTY_SOLVER_THREADS')
+    return {
+        "backend": os.environ.get('FAIRDUTY_SOLVER_BACKEND', 'cbc'),
+        "timeLimit": _env_float('FAIRDUTY_SOLVER_TIME_LIMIT_SECONDS'), # 풀이 1회당 시간 제한 (초)
+        "gapRel": _env_float('FAIRDUTY_SOLVER_GAP_REL'), # 상대 MIP gap (예: 0.01)
+        "threads": int(threads) if threads else None,
+        "inMemory": os.environ.get('FAIRDUTY_SOLVER_IN_MEMORY', '0') == '1', # 임시 파일을 /dev/shm에 씀
+    }
+
+
+def backend_available(backend):
+    if backend == "cbc":
+        return True
+    if backend == "highs":
+        return HiGHS().available()
+    if backend == "cpsat":
+        return importlib.util.find_spec("ortools") is not None
+    return False
+
+
+def resolve_solver_options(overrides=None):
+    """배포 기본값에 요청별 설정(overrides)을 덮어쓴 뒤 검증한 dict를 반환합니다.
+
+    잘못된 값이거나 설치되지 않은 백엔드면 ValueError를 발생시킵니다.
+    """
+    if overrides is not None and not isinstance(overrides, dict):
+        raise ValueError("solver는 객체여야 합니다.")
+    options = default_solver_options()
+    unknown = set(overrides or {}) - set(options)
+    if unknown:
+        raise ValueError(f"알 수 없는 solver 설정입니다: {', '.join(sorted(unknown))}")
+    options.update(overrides or {})
+
+    if options["backend"] not in SOLVER_BACKENDS:
+        raise ValueError(f"solver.backend는 {', '.join(SOLVER_BACKENDS)} 중 하나여야 합니다.")
+    if not backend_available(options["backend"]):
+        raise ValueError(f"'{options['backend']}' 솔버가 서버에 설치되어 있지 않습니다.")
+    time_limit, gap_rel, threads = options["timeLimit"], options["gapRel"], options["threads"]
+    if time_limit is not None and (not isinstance(time_limit, (int, float)) or time_limit <= 0):
+        raise ValueError("solver.timeLimit은 0보다 큰 숫자여야 합니다.")
+    if gap_rel is not None and (not isinstance(gap_rel, (int, float)) or not 0 <= gap_rel < 1):
+        raise ValueError("solver.gapRel은 0 이상 1 미만의 숫자여야 합니다.")
+    if threads is not None and (not isinstance(threads, int) or threads <= 0):
+        raise ValueError("solver.threads는 1 이상의 정수여야 합니다.")
+    if not isinstance(options["inMemory"], bool):
+        raise ValueError("solver.inMemory는 true 또는 false여야 합니다.")
+    return options
+
+
+# 솔버 상태 집계 라벨 (최적/불가능 외의 상태는 모두 error)
+_STATUS_METRIC_LABELS = {LpStatusOptimal: "Optimal", LpStatusInfeasible: "Infeasible"}
+
+
+def _effective_time_limit(options, time_limit):
+    limits = [limit for limit in (options["timeLimit"], time_limit) if limit is not None]
+    return min(limits) if limits else None
+
+
+def solve_problem(prob, options, warm_start=False, time_limit=None):
+    """options(resolve_solver_options 결과)의 백엔드로 prob을 풉니다.
+
+    time_limit은 호출별 제한(예: 지연 시간 예산의 남은 시간)이며, 설정의 timeLimit과 더 짧은 쪽이 적용됩니다.
+    결과는 PuLP와 같이 prob.status / prob.sol_status / 변수 varValue에 기록되고,
+    {"backend", "seconds", "firstIncumbentSeconds"} 풀이 정보를 반환합니다. 결과 상태는 metrics에 집계됩니다.
+    """
+    backend = options["backend"]
+    time_limit = _effective_time_limit(options, time_limit)
+    first_incumbent = None
+    started = time.perf_counter()
+    if backend == "cpsat":
+        _solve_cpsat(prob, options, warm_start, time_limit)
+    elif backend == "highs":
+        # HiGHS는 프로세스 내에서 풀므로 inMemory 설정과 무관하게 임시 파일이 없음 (MIP start는 지원하지 않음)
+        prob.solve(HiGHS(msg=False, timeLimit=time_limit, gapRel=options["gapRel"], threads=options["threads"]))
+    else:
+        tmp_dir = IN_MEMORY_TMP_DIR if options["inMemory"] and os.path.isdir(IN_MEMORY_TMP_DIR) else None
+        log_fd, log_path = tempfile.mkstemp(prefix="fairduty-cbc-", suffix=".log", dir=tmp_dir)
+        os.close(log_fd)
+        try:
+            solver = PULP_CBC_CMD(msg=False, warmStart=warm_start, logPath=log_path, timeLimit=time_limit,
+                                  gapRel=options["gapRel"], threads=options["threads"])
+            if tmp_dir is not None:
+                solver.tmpDir = tmp_dir
+            prob.solve(solver)
+            with open(log_path, encoding="utf-8", errors="replace") as log_file:
+                first_incumbent = _first_incumbent_seconds(log_file.read())
+        finally:
+            os.remove(log_path)
+    metrics.count_solver_status(backend, _STATUS_METRIC_LABELS.get(prob.status, "error"))
+    return {"backend": backend, "seconds": time.perf_counter() - started, "firstIncumbentSeconds": first_incumbent}
+
+
+def _integral(number, what):
+    if not float(number).is_integer():
+        raise ValueError(f"CP-SAT 백엔드는 정수 계수만 지원합니다 ({what}: {number})")
+    return int(number)
+
+
+def _solve_cpsat(prob, options, warm_start, time_limit):
+    """LpProblem을 CP-SAT 모델로 옮겨 풀고, 결과를 PuLP 변수/상태에 되돌려 씁니다.
+
+    당직 모델의 제약은 모두 정수 계수이고, 연속 변수(제곱 근사 변수)도 최적해에서 정수값을 가지므로
+    모든 변수를 정수 변수로 옮깁니다. 목적 함수의 실수 계수는 CPSAT_OBJECTIVE_SCALE배 후 반올림합니다.
+    """
+    from ortools.sat.python import cp_model # 선택 의존성: cpsat 백엔드를 쓸 때만 필요
+
+    model = cp_model.CpModel()
+    cp_vars = {}
+    for var in prob.variables():
+        low = 0 if var.lowBound is None else int(var.lowBound)
+        up = CPSAT_DEFAULT_UPPER_BOUND if var.upBound is None else int(var.upBound)
+        cp_vars[var.name] = model.NewIntVar(low, up, var.name)
+        if warm_start and var.varValue is not None:
+            model.AddHint(cp_vars[var.name], int(round(var.varValue)))
+
+    for name, constraint in prob.constraints.items():
+        expr = sum(_integral(coef, name) * cp_vars[var.name] for var, coef in constraint.items())
+        rhs = -_integral(constraint.constant, name)
+        if constraint.sense == LpConstraintEQ:
+            model.Add(expr == rhs)
+        elif constraint.sense == LpConstraintLE:
+            model.Add(expr <= rhs)
+        elif constraint.sense == LpConstraintGE:
+            model.Add(expr >= rhs)
+
+    if prob.objective is not None:
+        objective = sum(int(round(coef * CPSAT_OBJECTIVE_SCALE)) * cp_vars[var.name] for var, coef in prob.objective.items())
+        if prob.sense == LpMaximize:
+            model.Maximize(objective)
+        else:
+            model.Minimize(objective)
+
+    solver = cp_model.CpSolver()
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = float(time_limit)
+    if options["gapRel"] is not None:
+        solver.parameters.relative_gap_limit = float(options["gapRel"])
+    if options["threads"] is not None:
+        solver.parameters.num_workers = options["threads"]
+    cp_status = solver.Solve(model)
+
+    if cp_status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        for var in prob.variables():
+            var.varValue = solver.Value(cp_vars[var.name])
+        # CBC와 같이, 시간 제한으로 중단되어도 정수해가 있으면 status는 Optimal이고 sol_status로 구분
+        sol_status = LpSolutionOptimal if cp_status == cp_model.OPTIMAL else LpSolutionIntegerFeasible
+        prob.assignStatus(LpStatusOptimal, sol_status)
+    elif cp_status == cp_model.INFEASIBLE:
+        prob.assignStatus(LpStatusInfeasible, LpSolutionNoSolutionFound)
+    else:
+        prob.assignStatus(LpStatusNotSolved, LpSolutionNoSolutionFound)
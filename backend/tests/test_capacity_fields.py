@@ -0,0 +1,55 @@
+"""인원별 fte/minDuties/maxDuties 입력 처리 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+class NullCapacityFieldsTest(unittest.TestCase):
+    """fte/minDuties/maxDuties가 null이면 지정하지 않은 것과 같게 처리되어야 합니다."""
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.request_body = {
+            "startDate": "2025-02-01",
+            "endDate": "2025-02-14",
+            "people": [{"name": name, "fte": None, "minDuties": None, "maxDuties": None} for name in "ABCD"],
+            "dutyPerDay": 1,
+            "noConsecutive": True,
+            "seed": 1,
+            "maxAttempts": 3,
+            "parallelism": 1,
+            "useCache": False,
+        }
+
+    def test_all_modes_accept_null_fields(self):
+        for mode in ("sampling", "exact", "weighted"):
+            with self.subTest(mode=mode):
+                response = self.client.post('/api/schedule', json=dict(self.request_body, optimizationMode=mode))
+                self.assertEqual(response.status_code, 200, response.get_json())
+                summary = response.get_json()['summary']
+                totals = [item['weekdayDuties'] + item['weekendOrHolidayDuties'] for item in summary]
+                self.assertEqual(sum(totals), 14)
+                self.assertLessEqual(max(totals) - min(totals), 1)
+
+    def test_null_fte_does_not_select_weighted_mode(self):
+        response = self.client.post('/api/schedule', json=self.request_body)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['stats']['mode'], 'sampling')
+
+    def test_build_capacity_arrays_defaults(self):
+        fte, min_duties, max_duties = app.build_capacity_arrays(
+            [{"name": "A", "fte": None, "minDuties": None, "maxDuties": None}, {"name": "B", "fte": 0.5}], 10)
+        self.assertEqual(fte.tolist(), [1.0, 0.5])
+        self.assertEqual(min_duties.tolist(), [0, 0])
+        self.assertEqual(max_duties.tolist(), [10, 10])
+
+
+if __name__ == '__main__':
+    unittest.main()
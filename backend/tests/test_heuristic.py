@@ -0,0 +1,82 @@
+"""휴리스틱 풀이기(heuristic.py)와 지연 시간 예산(latencyBudgetMs) 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import heuristic  # noqa: E402
+
+
+def _calendar(num_people, num_days, off_every=7):
+    available = np.ones((num_people, num_days), dtype=bool)
+    is_off = np.zeros(num_days, dtype=bool)
+    is_off[5::off_every] = True
+    is_off[6::off_every] = True
+    return available, is_off
+
+
+class HeuristicTest(unittest.TestCase):
+
+    def test_total_range_lower_bound(self):
+        self.assertEqual(heuristic.total_range_lower_bound(4, 28, 1), 0)
+        self.assertEqual(heuristic.total_range_lower_bound(4, 30, 1), 1)
+
+    def test_greedy_assign_returns_none_when_a_day_is_short(self):
+        available, is_off = _calendar(3, 10)
+        available[:, 4] = [True, False, False]
+        self.assertIsNone(heuristic.greedy_assign(available, is_off, 2, True, np.random.default_rng(0)))
+
+    def test_solution_respects_constraints_and_reaches_lower_bound(self):
+        available, is_off = _calendar(12, 90)
+        available[0, :30] = False
+        assignment = heuristic.solve_heuristic(available, is_off, 2, False, time.monotonic() + 5, seed=1)
+        self.assertIsNotNone(assignment)
+        self.assertTrue((assignment.sum(axis=0) == 2).all())
+        self.assertFalse((assignment.astype(bool) & ~available).any())
+        self.assertFalse((assignment[:, 1:] & assignment[:, :-1]).any())
+        total_range, _ = heuristic.evaluate(assignment, is_off)
+        self.assertEqual(total_range, heuristic.total_range_lower_bound(12, 90, 2))
+
+    def test_same_seed_gives_same_assignment(self):
+        available, is_off = _calendar(8, 31)
+        first = heuristic.solve_heuristic(available, is_off, 1, False, time.monotonic() + 5, seed=7)
+        second = heuristic.solve_heuristic(available, is_off, 1, False, time.monotonic() + 5, seed=7)
+        np.testing.assert_array_equal(first, second)
+
+    def test_expired_deadline_returns_none(self):
+        available, is_off = _calendar(8, 31)
+        self.assertIsNone(heuristic.solve_heuristic(available, is_off, 1, False, time.monotonic() - 1, seed=1))
+
+    def test_stops_at_deadline_when_greedy_keeps_failing(self):
+        # 마지막 날 가능 인원이 모자라 매번 끝까지 배정한 뒤 실패하는 경우에도 재시작을 deadline에서 멈춰야 함
+        available, is_off = _calendar(4, 400)
+        available[1:, -1] = False
+        started = time.monotonic()
+        result = heuristic.solve_heuristic(available, is_off, 2, True, started + 0.2, seed=1, max_restarts=10 ** 6)
+        self.assertIsNone(result)
+        self.assertLess(time.monotonic() - started, 5)
+
+
+class LatencyBudgetTest(unittest.TestCase):
+
+    def test_budget_request_returns_heuristic_schedule(self):
+        response = app.app.test_client().post('/api/schedule', json={
+            "startDate": "2025-03-01", "endDate": "2025-03-28", "people": [{"name": name} for name in "ABCD"],
+            "dutyPerDay": 1, "seed": 1, "latencyBudgetMs": 2000, "useCache": False})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        result = response.get_json()
+        self.assertTrue(result['stats']['mode'].startswith('heuristic'))
+        totals = [item['weekdayDuties'] + item['weekendOrHolidayDuties'] for item in result['summary']]
+        self.assertEqual(totals, [7, 7, 7, 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""공휴일/요일 달력(holiday_calendar.py)과 holidayRegion 요청 처리 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import holiday_calendar  # noqa: E402
+
+
+class DayCalendarTest(unittest.TestCase):
+
+    def test_weekdays_match_datetime(self):
+        calendar = holiday_calendar.build_day_calendar("2024-02-25", "2024-03-05")
+        expected = [date(2024, 2, 25) + timedelta(days=i) for i in range(10)]
+        self.assertEqual(calendar.dates, [d.isoformat() for d in expected])
+        self.assertEqual(calendar.weekdays.tolist(), [d.weekday() for d in expected])
+        self.assertEqual(calendar.is_off.tolist(), [d.weekday() >= 5 for d in expected])
+
+    def test_region_holidays_and_extra_holidays(self):
+        calendar = holiday_calendar.build_day_calendar("2025-03-01", "2025-03-07", ["2025-03-05", "bad-date", "2025-04-01"], "KR")
+        day_types = dict(zip(calendar.dates, calendar.day_types.tolist()))
+        self.assertEqual(day_types["2025-03-01"], holiday_calendar.DAY_WEEKEND | holiday_calendar.DAY_PUBLIC_HOLIDAY)
+        self.assertEqual(day_types["2025-03-03"], holiday_calendar.DAY_PUBLIC_HOLIDAY) # 대체공휴일(삼일절)
+        self.assertEqual(day_types["2025-03-04"], 0)
+        self.assertEqual(day_types["2025-03-05"], holiday_calendar.DAY_EXTRA_HOLIDAY)
+        self.assertEqual(calendar.ignored_extra_holidays, ("bad-date",))
+        self.assertEqual(calendar.missing_holiday_years, ())
+
+    def test_without_region_only_weekends_are_off(self):
+        calendar = holiday_calendar.build_day_calendar("2025-03-03", "2025-03-03")
+        self.assertEqual(calendar.is_off.tolist(), [False])
+
+    def test_range_across_years_and_missing_years(self):
+        calendar = holiday_calendar.build_day_calendar("2027-12-30", "2028-01-03", (), "KR")
+        self.assertEqual(len(calendar), 5)
+        self.assertEqual(calendar.missing_holiday_years, (2028,))
+        # 2028년 데이터가 없어도 주말은 휴일 (2028-01-01은 토요일)
+        self.assertTrue(calendar.is_off[calendar.date_index["2028-01-01"]])
+
+    def test_calendar_is_cached_and_read_only(self):
+        first = holiday_calendar.build_day_calendar("2025-01-01", "2025-01-31", ["2025-01-02", "2025-01-02"], "KR")
+        second = holiday_calendar.build_day_calendar("2025-01-01", "2025-01-31", ["2025-01-02"], "KR")
+        self.assertIs(first, second)
+        with self.assertRaises(ValueError):
+            first.is_off[0] = False
+
+    def test_empty_range(self):
+        self.assertEqual(len(holiday_calendar.build_day_calendar("2025-01-02", "2025-01-01")), 0)
+
+    def test_bundled_data_is_consistent(self):
+        for year, holidays in holiday_calendar.load_region_holidays("KR").items():
+            self.assertTrue(all(date_str.startswith(f"{year}-") for date_str in holidays), year)
+            self.assertEqual(len(holiday_calendar.year_day_types("KR", year)), (date(year + 1, 1, 1) - date(year, 1, 1)).days)
+
+
+class HolidayRegionRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.request_body = {"startDate": "2025-03-01", "endDate": "2025-03-07", "people": [{"name": name} for name in "ABC"],
+                             "dutyPerDay": 1, "seed": 1, "maxAttempts": 2, "parallelism": 1, "useCache": False}
+
+    def _off_duty_total(self, **overrides):
+        response = self.client.post('/api/schedule', json=dict(self.request_body, **overrides))
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json(), sum(item['weekendOrHolidayDuties'] for item in response.get_json()['summary'])
+
+    def test_region_controls_public_holidays(self):
+        _, with_region = self._off_duty_total()
+        _, without_region = self._off_duty_total(holidayRegion=None)
+        self.assertEqual(with_region, 3) # 3/1(토·삼일절), 3/2(일), 3/3(대체공휴일)
+        self.assertEqual(without_region, 2)
+
+    def test_missing_holiday_years_are_reported(self):
+        result, _ = self._off_duty_total(startDate="2028-03-01", endDate="2028-03-07")
+        self.assertEqual(result['stats']['missingHolidayYears'], [2028])
+        result, _ = self._off_duty_total()
+        self.assertNotIn('missingHolidayYears', result['stats'])
+
+    def test_unknown_region_is_rejected(self):
+        response = self.client.post('/api/schedule', json=dict(self.request_body, holidayRegion="US"))
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""비동기 스케줄 작업 관리자(jobs.py)와 작업 API 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from jobs import JobQueueFullError, ScheduleJobManager  # noqa: E402
+
+
+def _wait_finished(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not job.is_finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.is_finished
+
+
+class ScheduleJobManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ScheduleJobManager(max_concurrent_jobs=1, max_queued_jobs=1, result_ttl_seconds=60)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def _blocking_job(self, job):
+        self.release.wait(10)
+        return {"ok": True}, None
+
+    def test_job_succeeds_with_progress(self):
+        def run_job(job):
+            job.update_progress({"stage": 2, "completed": 1})
+            return {"value": 1}, None
+
+        job = self.manager.submit(run_job)
+        self.assertTrue(_wait_finished(job))
+        job_dict = job.to_dict()
+        self.assertEqual(job_dict["status"], "succeeded")
+        self.assertEqual(job_dict["progress"], {"stage": 2, "completed": 1})
+        self.assertEqual(job_dict["result"], {"value": 1})
+        self.assertNotIn("result", job.to_dict(include_result=False))
+
+    def test_error_and_exception_mark_job_failed(self):
+        failed = self.manager.submit(lambda job: (None, "불가능"))
+        self.assertTrue(_wait_finished(failed))
+        crashed = self.manager.submit(lambda job: 1 / 0)
+        self.assertTrue(_wait_finished(crashed))
+        self.assertEqual((failed.status, failed.error), ("failed", "불가능"))
+        self.assertEqual(crashed.status, "failed")
+        self.assertIn("division by zero", crashed.error)
+
+    def test_queue_limit_and_cancel_queued_job(self):
+        running = self.manager.submit(self._blocking_job)
+        queued = self.manager.submit(self._blocking_job)
+        with self.assertRaises(JobQueueFullError):
+            self.manager.submit(self._blocking_job)
+        self.assertEqual(self.manager.cancel(queued.id).status, "cancelled")
+        self.assertIsNone(self.manager.cancel("missing"))
+        self.release.set()
+        self.assertTrue(_wait_finished(running))
+        self.assertEqual(running.status, "succeeded")
+        self.assertEqual(queued.status, "cancelled")
+
+    def test_stats_counts_jobs_by_status(self):
+        running = self.manager.submit(self._blocking_job)
+        while running.status != "running":
+            time.sleep(0.01)
+        self.manager.submit(self._blocking_job)
+        stats = self.manager.stats()
+        self.assertEqual(stats["maxConcurrentJobs"], 1)
+        self.assertEqual(stats["maxQueuedJobs"], 1)
+        self.assertEqual(stats["jobs"], {"queued": 1, "running": 1, "succeeded": 0, "failed": 0, "cancelled": 0})
+
+    def test_finished_jobs_expire_after_ttl(self):
+        job = self.manager.submit(lambda job: ({}, None))
+        self.assertTrue(_wait_finished(job))
+        with mock.patch("jobs.time.time", return_value=job.finished_at + 61):
+            self.assertEqual(sum(self.manager.stats()["jobs"].values()), 0)
+        self.assertIsNone(self.manager.get(job.id))
+
+
+class ScheduleJobApiTest(unittest.TestCase):
+
+    def test_job_api_round_trip_and_metrics(self):
+        client = app.app.test_client()
+        response = client.post('/api/schedule/jobs', json={
+            "startDate": "2025-03-01", "endDate": "2025-03-14", "people": [{"name": name} for name in "ABCD"],
+            "dutyPerDay": 1, "seed": 1, "maxAttempts": 3, "parallelism": 1, "useCache": False})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["jobId"]
+        self.assertTrue(_wait_finished(app.schedule_job_manager.get(job_id)))
+        job_dict = client.get(f'/api/schedule/jobs/{job_id}').get_json()
+        self.assertEqual(job_dict["status"], "succeeded")
+        self.assertEqual(len(job_dict["result"]["dutyRoster"]), 14)
+        self.assertEqual(client.get('/api/schedule/jobs/missing').status_code, 404)
+
+        text = client.get('/metrics').get_data(as_text=True)
+        succeeded = next(line for line in text.splitlines() if line.startswith('fairduty_schedule_jobs{status="succeeded"}'))
+        self.assertGreaterEqual(int(succeeded.split()[-1]), 1)
+        self.assertIn('fairduty_schedule_job_limit{kind="concurrent"} ', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
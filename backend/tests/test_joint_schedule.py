@@ -0,0 +1,78 @@
+"""인원을 공유하는 팀의 합동 스케줄(/api/schedule/joint) 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+DEFAULTS = {"startDate": "2025-03-01", "endDate": "2025-03-31", "extraHolidays": ["2025-03-03"], "useCache": False,
+            "optimizationMode": "exact"}
+
+
+def _team(team_id, names, **extra):
+    return dict({"teamId": team_id, "people": [{"name": name} for name in names]}, **extra)
+
+
+class JointScheduleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+
+    def _post(self, teams, defaults=DEFAULTS):
+        response = self.client.post('/api/schedule/joint', json={"defaults": defaults, "teams": teams})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def test_shared_people_never_double_booked(self):
+        teams = [
+            _team("A", ["a1", "a2", "a3", "s1", "s2"]),
+            _team("B", ["b1", "b2", "b3", "s1", "s2"], dutyPerDay=1),
+            _team("C", ["c1", "c2", "s2", "s3"]),
+            _team("D", ["d1", "d2", "d3"]),
+            _team("E", ["e1", "e2", "e3", "s3"]),
+        ]
+        body = self._post(teams)
+        self.assertEqual(body["jointGroups"], [["A", "B", "C", "E"]])
+
+        duty_dates = {}
+        for line in body["teams"]:
+            self.assertEqual(line["status"], 200, line.get("error"))
+            stats = line["result"]["stats"]
+            self.assertEqual(stats["mode"], "exact" if line["teamId"] == "D" else "joint")
+            roster = line["result"]["dutyRoster"]
+            self.assertEqual(len(roster), 31)
+            self.assertTrue(all(len(entry["duty"].split(", ")) == 1 for entry in roster))
+            for entry in roster:
+                duty_dates.setdefault(entry["duty"], []).append(date.fromisoformat(entry["date"]))
+
+        # 공유 인원도 팀을 합쳐 하루 한 번, 연속 당직 없이 배정되어야 함
+        for person, dates in duty_dates.items():
+            dates.sort()
+            self.assertEqual(len(set(dates)), len(dates), person)
+            self.assertFalse(any(later - earlier == timedelta(days=1) for earlier, later in zip(dates, dates[1:])), person)
+
+    def test_shared_people_are_reported_per_team(self):
+        body = self._post([_team("A", ["a1", "a2", "s1"]), _team("B", ["b1", "b2", "s1"])])
+        stats = {line["teamId"]: line["result"]["stats"] for line in body["teams"]}
+        self.assertEqual(stats["A"]["sharedPeople"], ["s1"])
+        self.assertEqual(stats["B"]["jointTeams"], ["A", "B"])
+
+    def test_invalid_team_is_reported_in_its_line(self):
+        body = self._post([_team("A", ["a1", "a2"]), _team("B", ["b1", "b2"], dutyPerDay=-1)])
+        lines = {line["teamId"]: line for line in body["teams"]}
+        self.assertEqual(lines["A"]["status"], 200)
+        self.assertEqual(lines["B"]["status"], 400)
+        self.assertIn("error", lines["B"])
+
+    def test_empty_team_list_is_rejected(self):
+        self.assertEqual(self.client.post('/api/schedule/joint', json={"teams": []}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""계측(/metrics)과 요청별 프로파일링 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import pstats
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import metrics  # noqa: E402
+
+SCHEDULE_BODY = {"startDate": "2025-03-01", "endDate": "2025-03-14", "people": [{"name": name} for name in "ABCD"],
+                 "dutyPerDay": 1, "seed": 1, "maxAttempts": 3, "parallelism": 1, "useCache": False}
+
+
+class MetricsRegistryTest(unittest.TestCase):
+
+    def test_counter_and_histogram_render(self):
+        registry = metrics.MetricsRegistry()
+        counter = registry.counter("test_total", "테스트 카운터")
+        histogram = registry.histogram("test_seconds", "테스트 히스토그램", buckets=(0.1, 1.0))
+        self.assertIs(registry.counter("test_total", "다시 등록"), counter)
+        counter.inc(status='a"b')
+        counter.inc(2, status='a"b')
+        histogram.observe(0.5, span="solve")
+        histogram.observe(3.0, span="solve")
+        lines = registry.render().splitlines()
+        self.assertIn('test_total{status="a\\"b"} 3', lines)
+        self.assertIn('test_seconds_bucket{span="solve",le="0.1"} 0', lines)
+        self.assertIn('test_seconds_bucket{span="solve",le="1.0"} 1', lines)
+        self.assertIn('test_seconds_bucket{span="solve",le="+Inf"} 2', lines)
+        self.assertIn('test_seconds_count{span="solve"} 2', lines)
+
+    def test_problem_size_labels_are_bucketed(self):
+        self.assertEqual(metrics.problem_size_labels(12, 400, 2), {"people": "le25", "days": "gt366", "duty_per_day": "2"})
+
+    def test_collect_and_replay(self):
+        with metrics.collect() as events:
+            metrics.count_solver_status("test-backend", "Optimal")
+        self.assertEqual(events, [(metrics.SOLVER_STATUS_TOTAL.name, "inc", 1, {"backend": "test-backend", "status": "Optimal"})])
+        metrics.replay(events)
+        self.assertIn('fairduty_solver_status_total{backend="test-backend",status="Optimal"} 2',
+                      metrics.registry.render().splitlines())
+
+
+class MetricsEndpointTest(unittest.TestCase):
+
+    def test_schedule_request_records_spans(self):
+        client = app.app.test_client()
+        self.assertEqual(client.post('/api/schedule', json=SCHEDULE_BODY).status_code, 200)
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.get_data(as_text=True)
+        for span_name in ("dates", "model_build", "solve", "extract", "score"):
+            self.assertIn(f'span="{span_name}"', text)
+        self.assertIn("fairduty_solver_status_total", text)
+
+
+class RequestProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = mock.patch.multiple(app, PROFILING_ENABLED=True, PROFILE_DIR=self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_profile_is_written_for_json_response(self):
+        response = self.client.post('/api/schedule', json=SCHEDULE_BODY, headers={app.PROFILE_REQUEST_HEADER: "1"})
+        self.assertEqual(response.status_code, 200)
+        profile_path = response.headers["X-Fairduty-Profile-File"]
+        self.assertEqual(os.path.dirname(profile_path), self.tmp_dir.name)
+        self.assertGreater(pstats.Stats(profile_path).total_calls, 0)
+
+    def test_streamed_profile_covers_the_body(self):
+        response = self.client.post('/api/schedule/stream', json=SCHEDULE_BODY, headers={app.PROFILE_REQUEST_HEADER: "1"},
+                                    buffered=False)
+        profile_path = response.headers["X-Fairduty-Profile-File"]
+        # 본문을 다 읽고 응답을 닫기 전에는 아직 저장하지 않음
+        self.assertEqual(os.path.getsize(profile_path), 0)
+        self.assertIn("event: result", response.get_data(as_text=True))
+        response.close()
+        functions = {func_name for _, _, func_name in pstats.Stats(profile_path).stats}
+        self.assertIn("stream_schedule_events", functions)
+
+    def test_unwritable_profile_dir_does_not_fail_request(self):
+        with mock.patch.object(app, "PROFILE_DIR", os.path.join(self.tmp_dir.name, "missing")), \
+                self.assertLogs(app.app.logger, level="ERROR"):
+            response = self.client.post('/api/schedule', json=SCHEDULE_BODY, headers={app.PROFILE_REQUEST_HEADER: "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Fairduty-Profile-File", response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
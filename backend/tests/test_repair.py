@@ -0,0 +1,82 @@
+"""부분 재스케줄링(/api/schedule/repair) 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def _assignments(roster):
+    return {(entry['date'], pn.strip()) for entry in roster for pn in entry['duty'].split(',') if pn.strip()}
+
+
+class RepairScheduleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.request_body = {"startDate": "2025-03-01", "endDate": "2025-03-28",
+                             "people": [{"name": name} for name in "ABCD"], "dutyPerDay": 1,
+                             "noConsecutive": False, "optimizationMode": "exact", "useCache": False}
+        response = self.client.post('/api/schedule', json=self.request_body)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.roster = response.get_json()['dutyRoster']
+
+    def _repair(self, **overrides):
+        return self.client.post('/api/schedule/repair', json=dict(self.request_body, dutyRoster=self.roster, **overrides))
+
+    def test_unchanged_roster(self):
+        response = self._repair()
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['repair']['movedAssignments'], 0)
+        self.assertEqual(response.get_json()['dutyRoster'], self.roster)
+
+    def test_new_unavailability_only_changes_nearby_days(self):
+        blocked = next(entry['date'] for entry in self.roster if entry['duty'] == 'A')
+        people = [dict(self.request_body['people'][0], unavailable=[blocked])] + self.request_body['people'][1:]
+        response = self._repair(people=people, repairRadius=1)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        result = response.get_json()
+        self.assertIn(blocked, result['repair']['affectedDates'])
+        self.assertNotIn((blocked, 'A'), _assignments(result['dutyRoster']))
+        changed = {change['date'] for change in result['repair']['changes']}
+        self.assertTrue(changed <= set(result['repair']['freedDates']))
+
+    def test_removed_person_assignments_are_reported(self):
+        removed_days = {entry['date'] for entry in self.roster if entry['duty'] == 'D'}
+        response = self._repair(people=self.request_body['people'][:3], maxMoves=0)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        result = response.get_json()
+        repair = result['repair']
+        self.assertEqual(repair['removedPeople'], ['D'])
+        # maxMoves=0이어도 빠진 인원의 배정은 옮겨야 하므로 예산에 세지 않고, 이동 수와 변경 내역에는 포함
+        self.assertEqual(repair['movedAssignments'], len(removed_days))
+        self.assertEqual({change['date'] for change in repair['changes'] if 'D' in change['removed']}, removed_days)
+        self.assertTrue(all(entry['duty'] and 'D' not in entry['duty'] for entry in result['dutyRoster']))
+        kept = {(ds, pn) for ds, pn in _assignments(self.roster) if pn != 'D'}
+        self.assertTrue(kept <= _assignments(result['dutyRoster']))
+
+    def test_added_person_receives_duties(self):
+        people = self.request_body['people'] + [{"name": "E"}]
+        response = self._repair(people=people)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        result = response.get_json()
+        self.assertEqual(result['repair']['addedPeople'], ['E'])
+        totals = {item['person']: item['weekdayDuties'] + item['weekendOrHolidayDuties'] for item in result['summary']}
+        self.assertLessEqual(max(totals.values()) - min(totals.values()), 1)
+
+    def test_unsupported_options_are_rejected(self):
+        for overrides in ({"carryIn": {"A": {"weekdayDuties": 3, "weekendOrHolidayDuties": 1}}},
+                          {"optimizationMode": "weighted"},
+                          {"changedDates": ["2025/03/01"]},
+                          {"maxMoves": -1}):
+            with self.subTest(overrides=overrides):
+                self.assertEqual(self._repair(**overrides).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""긴 기간용 구간 순차 풀이(horizonWindowDays) 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def _duty_sets(roster):
+    return [{pn.strip() for pn in entry['duty'].split(',') if pn.strip()} for entry in roster]
+
+
+class RollingHorizonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.request_body = {"startDate": "2025-01-01", "endDate": "2025-03-31",
+                             "people": [{"name": name, "unavailable": [f"2025-02-0{i}"]} for i, name in enumerate("ABCDEFG", 1)],
+                             "dutyPerDay": 2, "noConsecutive": True, "horizonWindowDays": 31, "horizonOverlapDays": 5,
+                             "useCache": False}
+
+    def test_windows_join_into_one_fair_roster(self):
+        response = self.client.post('/api/schedule', json=self.request_body)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        result = response.get_json()
+        self.assertEqual(result['stats']['mode'], 'horizon')
+        self.assertEqual(result['stats']['windows'], 3)
+        self.assertLessEqual(result['stats']['totalDutyRange'], 1)
+
+        duty_sets = _duty_sets(result['dutyRoster'])
+        self.assertEqual(len(duty_sets), 90)
+        self.assertTrue(all(len(duty) == 2 for duty in duty_sets))
+        # 구간 경계를 포함해 연속 당직이 없어야 함
+        self.assertFalse(any(today & tomorrow for today, tomorrow in zip(duty_sets, duty_sets[1:])))
+        for i, name in enumerate("ABCDEFG", 1):
+            self.assertNotIn(name, duty_sets[31 + i - 1])
+
+    def test_carry_in_is_threaded_into_the_first_window(self):
+        carry_in = {"A": {"weekdayDuties": 6, "weekendOrHolidayDuties": 2}}
+        response = self.client.post('/api/schedule', json=dict(self.request_body, carryIn=carry_in))
+        self.assertEqual(response.status_code, 200, response.get_json())
+        totals = {item['person']: item['weekdayDuties'] + item['weekendOrHolidayDuties'] for item in response.get_json()['summary']}
+        self.assertLess(totals["A"], min(count for name, count in totals.items() if name != "A"))
+
+    def test_progress_reports_each_window(self):
+        progress = []
+        result, _ = app.generate_schedule_rolling_horizon(
+            "2025-01-01", "2025-01-20", [{"name": name} for name in "ABCD"], 1, True, [], 7, 2,
+            progress_callback=progress.append)
+        self.assertEqual([item['window'] for item in progress], [1, 2, 3])
+        self.assertTrue(all(item['windows'] == 3 for item in progress))
+        self.assertEqual(len(result['dutyRoster']), 20)
+
+    def test_stop_request_cancels_between_windows(self):
+        result, message = app.generate_schedule_rolling_horizon(
+            "2025-01-01", "2025-01-20", [{"name": name} for name in "ABCD"], 1, True, [], 7, 2, should_stop=lambda: True)
+        self.assertIsNone(result)
+        self.assertIn("취소", message)
+
+    def test_invalid_window_options_are_rejected(self):
+        for overrides in ({"horizonWindowDays": 0}, {"horizonOverlapDays": -1}, {"latencyBudgetMs": 500}):
+            with self.subTest(overrides=overrides):
+                self.assertEqual(self.client.post('/api/schedule', json=dict(self.request_body, **overrides)).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
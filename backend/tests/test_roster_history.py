@@ -0,0 +1,74 @@
+"""팀별 게시 이력 저장소(SQLite)와 useHistory 이어받기 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from roster_history import PeriodOverlapError, RosterHistoryStore  # noqa: E402
+
+
+def _summary(**counts):
+    return [{"person": pn, "weekdayDuties": weekday, "weekendOrHolidayDuties": weekend_holiday}
+            for pn, (weekday, weekend_holiday) in counts.items()]
+
+
+class RosterHistoryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = RosterHistoryStore(os.path.join(self.tmp_dir.name, "history", "rosters.db"))
+        self.store.publish("t1", "2025-01-01", "2025-01-31", [{"date": "2025-01-30", "duty": "A"}, {"date": "2025-01-31", "duty": "B"}],
+                           _summary(A=(5, 2), B=(4, 3)))
+        self.store.publish("t1", "2025-02-01", "2025-02-28", [{"date": "2025-02-27", "duty": "A"}],
+                           _summary(A=(6, 1), B=(5, 2), C=(3, 1)))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_carry_in_sums_published_periods(self):
+        carry_in = self.store.carry_in("t1", "2025-03-01")
+        self.assertEqual(carry_in["A"], {"weekdayDuties": 11, "weekendOrHolidayDuties": 3, "lastDutyDate": "2025-02-27"})
+        self.assertEqual(carry_in["B"], {"weekdayDuties": 9, "weekendOrHolidayDuties": 5, "lastDutyDate": "2025-01-31"})
+        self.assertEqual(carry_in["C"]["lastDutyDate"], None)
+        self.assertEqual(self.store.carry_in("other", "2025-03-01"), {})
+
+    def test_carry_in_before_last_period_only_counts_earlier_periods(self):
+        carry_in = self.store.carry_in("t1", "2025-02-15")
+        self.assertEqual(carry_in["A"]["weekdayDuties"], 5)
+        self.assertNotIn("C", carry_in)
+
+    def test_overlapping_publish_requires_replace(self):
+        with self.assertRaises(PeriodOverlapError):
+            self.store.publish("t1", "2025-02-15", "2025-03-15", [], _summary(A=(1, 0)))
+        self.store.publish("t1", "2025-02-01", "2025-02-28", [], _summary(A=(1, 0)), replace=True)
+        carry_in = self.store.carry_in("t1", "2025-03-01")
+        self.assertEqual(carry_in["A"]["weekdayDuties"], 6)
+        self.assertNotIn("C", carry_in)
+        self.assertEqual(len(self.store.periods("t1")), 2)
+
+    def test_roster_round_trip(self):
+        roster_id = self.store.periods("t1")[0]["id"]
+        self.assertEqual(self.store.roster("t1", roster_id)["summary"], _summary(A=(5, 2), B=(4, 3)))
+        self.assertIsNone(self.store.roster("t2", roster_id))
+
+    def test_history_carry_in_shift_depends_on_mode(self):
+        with mock.patch.object(app, "roster_history_store", self.store):
+            relative = app.history_carry_in("t1", "2025-03-01", ["A", "B", "D"])
+            absolute = app.history_carry_in("t1", "2025-03-01", ["A", "B", "D"], relative=False)
+        # sampling/exact: 현재 인원 중 최솟값(B)을 빼서 새 인원 D가 가장 적게 선 사람과 같은 위치에서 시작
+        self.assertEqual((relative["A"]["weekdayDuties"], relative["B"]["weekdayDuties"], relative["D"]["weekdayDuties"]), (2, 0, 0))
+        self.assertEqual(relative["B"]["weekendOrHolidayDuties"], 2)
+        # 가중 목표 모드: 누적 부담을 FTE 목표와 비교하므로 이력 횟수 그대로
+        self.assertEqual((absolute["A"]["weekdayDuties"], absolute["B"]["weekdayDuties"], absolute["D"]["weekdayDuties"]), (11, 9, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
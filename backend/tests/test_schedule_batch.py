@@ -0,0 +1,62 @@
+"""여러 팀 배치 스케줄(/api/schedule/batch, NDJSON) 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+DEFAULTS = {"startDate": "2025-03-01", "endDate": "2025-03-31", "extraHolidays": ["2025-03-03"], "dutyPerDay": 1,
+            "useCache": False, "optimizationMode": "exact"}
+
+
+class ScheduleBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+
+    def _post(self, body):
+        response = self.client.post('/api/schedule/batch', json=body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_one_line_per_team_and_summary(self):
+        teams = [{"teamId": f"ward-{i}", "people": [{"name": f"W{i}-{j}"} for j in range(5 + i)]} for i in range(4)]
+        teams.insert(1, {"teamId": "short", "people": [{"name": "X", "unavailable": ["2025-03-04"]}]})
+        teams.insert(3, {"teamId": "invalid", "people": []})
+        lines = self._post({"defaults": DEFAULTS, "teams": teams})
+
+        summary = lines[-1]
+        self.assertEqual((summary["done"], summary["teams"], summary["succeeded"], summary["failed"]), (True, 6, 4, 2))
+        team_lines = {line["teamId"]: line for line in lines[:-1]}
+        self.assertEqual(sorted(line["index"] for line in team_lines.values()), list(range(6)))
+        self.assertEqual(team_lines["invalid"]["status"], 400)
+        self.assertEqual(team_lines["short"]["status"], 500)
+        self.assertIn("2025-03-04", team_lines["short"]["error"])
+        for i in range(4):
+            line = team_lines[f"ward-{i}"]
+            self.assertEqual(line["status"], 200, line.get("error"))
+            self.assertEqual(len(line["result"]["dutyRoster"]), 31)
+            self.assertGreaterEqual(line["queuedMs"], 0)
+
+    def test_team_values_override_defaults(self):
+        lines = self._post({"defaults": DEFAULTS, "teams": [
+            {"teamId": "two", "dutyPerDay": 2, "people": [{"name": name} for name in "ABCDE"]}]})
+        roster = lines[0]["result"]["dutyRoster"]
+        self.assertTrue(all(len(entry["duty"].split(", ")) == 2 for entry in roster))
+
+    def test_invalid_body_is_rejected(self):
+        for body in ({"teams": []}, {"teams": "x"}, {"teams": [{}], "defaults": []},
+                     {"teams": [{}] * (app.BATCH_MAX_TEAMS + 1)}):
+            with self.subTest(body=str(body)[:40]):
+                self.assertEqual(self.client.post('/api/schedule/batch', json=body).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
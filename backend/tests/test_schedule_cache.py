@@ -0,0 +1,119 @@
+"""결과 캐시(schedule_cache.py)와 /api/schedule 캐시 사용 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from schedule_cache import ScheduleResultCache, canonical_schedule_key  # noqa: E402
+
+
+class CanonicalKeyTest(unittest.TestCase):
+
+    def test_input_order_does_not_change_key(self):
+        first = {"people": [{"name": "A", "unavailable": ["2025-03-02", "2025-03-01"]}, {"name": "B"}],
+                 "extraHolidays": ["2025-03-05", "2025-03-04"], "seed": 1}
+        second = {"people": [{"name": "B", "unavailable": []}, {"name": "A", "unavailable": ["2025-03-01", "2025-03-02", "2025-03-01"]}],
+                  "extraHolidays": ["2025-03-04", "2025-03-05"], "seed": 1}
+        self.assertEqual(canonical_schedule_key(first), canonical_schedule_key(second))
+        self.assertNotEqual(canonical_schedule_key(first), canonical_schedule_key(dict(first, seed=2)))
+
+
+class ScheduleResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_lru_eviction(self):
+        cache = ScheduleResultCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1) # a가 최근 사용으로 바뀌어 b가 먼저 밀려남
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["entries"]), (3, 1, 1, 2))
+
+    def test_ttl_expiry(self):
+        cache = ScheduleResultCache(max_entries=4, ttl_seconds=10)
+        with mock.patch("schedule_cache.time.time", return_value=1000.0):
+            cache.set("a", {"x": 1})
+        with mock.patch("schedule_cache.time.time", return_value=1009.0):
+            self.assertEqual(cache.get("a"), {"x": 1})
+        with mock.patch("schedule_cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_disabled_cache(self):
+        cache = ScheduleResultCache(max_entries=0)
+        cache.set("a", 1)
+        self.assertFalse(cache.enabled)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_entries_survive_restart_and_expire(self):
+        disk_dir = os.path.join(self.tmp_dir.name, "cache")
+        with mock.patch("schedule_cache.time.time", return_value=1000.0):
+            ScheduleResultCache(max_entries=4, ttl_seconds=10, disk_dir=disk_dir).set("k", {"v": 1})
+        restarted = ScheduleResultCache(max_entries=4, ttl_seconds=10, disk_dir=disk_dir)
+        with mock.patch("schedule_cache.time.time", return_value=1005.0):
+            self.assertEqual(restarted.get("k"), {"v": 1})
+        self.assertEqual(restarted.stats()["diskHits"], 1)
+
+        expired = ScheduleResultCache(max_entries=4, ttl_seconds=10, disk_dir=disk_dir)
+        with mock.patch("schedule_cache.time.time", return_value=1011.0):
+            self.assertIsNone(expired.get("k"))
+        self.assertFalse(os.path.exists(os.path.join(disk_dir, "k.json")))
+
+    def test_disk_is_pruned_to_max_entries(self):
+        cache = ScheduleResultCache(max_entries=2, ttl_seconds=60, disk_dir=self.tmp_dir.name)
+        for key in "abc":
+            cache.set(key, key)
+        self.assertEqual(len([name for name in os.listdir(self.tmp_dir.name) if name.endswith(".json")]), 2)
+
+    def test_disk_write_error_keeps_memory_entry(self):
+        cache = ScheduleResultCache(max_entries=4, ttl_seconds=60, disk_dir=self.tmp_dir.name)
+        with mock.patch("schedule_cache.tempfile.mkstemp", side_effect=OSError(28, "No space left on device")), \
+                self.assertLogs("schedule_cache", level="ERROR"):
+            cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["diskWriteErrors"], 1)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_unusable_disk_dir_falls_back_to_memory(self):
+        blocker = os.path.join(self.tmp_dir.name, "file")
+        open(blocker, "w").close()
+        with self.assertLogs("schedule_cache", level="ERROR"):
+            cache = ScheduleResultCache(max_entries=4, disk_dir=os.path.join(blocker, "cache"))
+        self.assertFalse(cache.stats()["diskBacked"])
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+
+
+class ScheduleRouteCacheTest(unittest.TestCase):
+
+    def test_repeated_request_is_served_from_cache(self):
+        cache = ScheduleResultCache(max_entries=8, ttl_seconds=60)
+        client = app.app.test_client()
+        body = {"startDate": "2025-03-01", "endDate": "2025-03-14", "people": [{"name": name} for name in "ABCD"],
+                "dutyPerDay": 1, "seed": 3, "maxAttempts": 3, "parallelism": 1}
+        with mock.patch.object(app, "schedule_result_cache", cache):
+            first = client.post('/api/schedule', json=body).get_json()
+            reordered = client.post('/api/schedule', json=dict(body, people=body['people'][::-1])).get_json()
+            self.assertEqual(client.get('/api/schedule/cache/stats').get_json()["hits"], 1)
+            client.post('/api/schedule', json=dict(body, useCache=False))
+        self.assertEqual(reordered['dutyRoster'], first['dutyRoster'])
+        # summary는 요청한 인원 순서를 따름
+        self.assertEqual([item['person'] for item in reordered['summary']], list("DCBA"))
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""진행 상황 스트리밍(/api/schedule/stream, Server-Sent Events) 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def _parse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        if block.startswith(":"): # keepalive 주석
+            continue
+        event_line, data_line = block.split("\n", 1)
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+class ScheduleStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.request_body = {"startDate": "2025-03-01", "endDate": "2025-03-31", "people": [{"name": f"P{i}"} for i in range(8)],
+                             "dutyPerDay": 1, "useCache": False, "seed": 3, "parallelism": 1, "maxAttempts": 8}
+
+    def _stream(self, body):
+        response = self.client.post('/api/schedule/stream', json=body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        return _parse_events(response.get_data(as_text=True))
+
+    def test_stages_candidates_and_result(self):
+        events = self._stream(self.request_body)
+        names = [name for name, _ in events]
+        self.assertEqual(names[-1], "result")
+        stages = [data["stage"] for name, data in events if name == "stage"]
+        self.assertEqual(stages[0], 1)
+        self.assertEqual(stages, sorted(stages))
+
+        candidates = [data for name, data in events if name == "candidate"]
+        self.assertGreaterEqual(len(candidates), 1)
+        self.assertEqual(candidates[0]["source"], "stage1")
+        variances = [candidate["combinedVariance"] for candidate in candidates]
+        self.assertEqual(variances, sorted(variances, reverse=True))
+        self.assertTrue(all(len(candidate["duty"]) == 31 for candidate in candidates))
+
+        result = events[-1][1]
+        self.assertAlmostEqual(result["stats"]["combinedVariance"], variances[-1])
+        self.assertEqual(len(result["dutyRoster"]), 31)
+
+    def test_unsolvable_request_ends_with_error_event(self):
+        people = [{"name": "A", "unavailable": ["2025-03-04"]}]
+        events = self._stream(dict(self.request_body, people=people))
+        self.assertEqual(events[-1][0], "error")
+        self.assertIn("error", events[-1][1])
+        self.assertNotEqual(events[-1][1]["status"], 200)
+
+    def test_invalid_request_is_rejected_before_streaming(self):
+        response = self.client.post('/api/schedule/stream', json=dict(self.request_body, dutyPerDay=-1))
+        self.assertEqual(response.status_code, 400)
+
+    def test_closing_the_stream_stops_the_run(self):
+        stopped = threading.Event()
+
+        def slow_run_schedule(params, progress_callback, should_stop, on_new_best):
+            progress_callback({"stage": 2, "completed": 0, "total": 100})
+            while not should_stop():
+                time.sleep(0.01)
+            stopped.set()
+            return {"error": "스케줄 생성이 취소되었습니다."}, 409
+
+        with mock.patch.object(app, "run_schedule", slow_run_schedule):
+            stream = app.stream_schedule_events(app.parse_schedule_request(self.request_body)[0])
+            self.assertTrue(next(stream).startswith("event: stage"))
+            stream.close() # 클라이언트 연결 끊김
+            self.assertTrue(stopped.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
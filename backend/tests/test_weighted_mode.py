@@ -0,0 +1,94 @@
+"""가중 목표 모드(optimizationMode: "weighted") 테스트.
+
+backend 디렉터리에서 실행: python -m unittest discover -s tests
+"""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+def _people(count, part_time_every=None):
+    return [{"name": f"p{i}", **({"fte": 0.5} if part_time_every and i % part_time_every == 0 else {})} for i in range(count)]
+
+
+class WeightedModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.test_client()
+
+    def _post(self, **overrides):
+        body = {"startDate": "2025-03-01", "endDate": "2025-03-31", "people": _people(10), "dutyPerDay": 1,
+                "noConsecutive": True, "seed": 1, "parallelism": 1, "useCache": False, "optimizationMode": "weighted"}
+        body.update(overrides)
+        started = time.perf_counter()
+        response = self.client.post('/api/schedule', json=body)
+        return response, time.perf_counter() - started
+
+    def test_default_weights_match_exact_variance(self):
+        weighted, _ = self._post()
+        exact, _ = self._post(optimizationMode="exact")
+        self.assertEqual(weighted.status_code, 200, weighted.get_json())
+        self.assertEqual(exact.status_code, 200, exact.get_json())
+        self.assertAlmostEqual(weighted.get_json()['stats']['combinedVariance'], exact.get_json()['stats']['combinedVariance'])
+        self.assertTrue(weighted.get_json()['stats']['optimalityProven'])
+
+    def test_realistic_size_solves_within_time_bound(self):
+        # 40명 x 90일, 주말·공휴일 1.5배: 예전 0/1 편차 변수 모델은 900초를 넘겼음
+        response, elapsed = self._post(people=_people(40), endDate="2025-05-29",
+                                       dutyWeights={"weekday": 1, "weekendOrHoliday": 1.5})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertLess(elapsed, 60)
+        result = response.get_json()
+        self.assertTrue(result['stats']['optimalityProven'])
+        self.assertLess(result['stats']['maxWeightedDeviation'], 1.5)
+        self.assertEqual(sum(item['weekdayDuties'] + item['weekendOrHolidayDuties'] for item in result['summary']), 90)
+
+    def test_time_limit_returns_incumbent(self):
+        response, elapsed = self._post(people=_people(40, part_time_every=4), endDate="2025-05-29",
+                                       dutyWeights={"weekday": 1, "weekendOrHoliday": 1.5}, solver={"timeLimit": 5})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertLess(elapsed, 30)
+        result = response.get_json()
+        self.assertIn('optimalityProven', result['stats'])
+        self.assertEqual(sum(item['weekdayDuties'] + item['weekendOrHolidayDuties'] for item in result['summary']), 90)
+
+
+class WeightedModeSelectionTest(unittest.TestCase):
+    """가중 목표 모드는 optimizationMode: "weighted"를 명시해야만 쓰여야 합니다."""
+
+    def setUp(self):
+        self.client = app.app.test_client()
+        self.request_body = {"startDate": "2025-03-01", "endDate": "2025-03-14", "people": _people(4), "dutyPerDay": 1,
+                             "seed": 1, "maxAttempts": 3, "parallelism": 1, "useCache": False}
+
+    def test_full_time_fte_keeps_default_mode(self):
+        people = [dict(p_data, fte=1.0) for p_data in self.request_body['people']]
+        response = self.client.post('/api/schedule', json=dict(self.request_body, people=people))
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['stats']['mode'], 'sampling')
+
+    def test_weighted_fields_without_weighted_mode_are_rejected(self):
+        part_time = [dict(self.request_body['people'][0], fte=0.5)] + self.request_body['people'][1:]
+        for overrides in ({"dutyWeights": {"weekendOrHoliday": 1.5}},
+                          {"dutyWeights": {"weekendOrHoliday": 1.5}, "optimizationMode": "exact"},
+                          {"people": part_time},
+                          {"people": part_time, "optimizationMode": "sampling"}):
+            with self.subTest(overrides=overrides):
+                response = self.client.post('/api/schedule', json=dict(self.request_body, **overrides))
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("optimizationMode", response.get_json()['error'])
+
+    def test_explicit_weighted_mode_uses_fte(self):
+        part_time = [dict(self.request_body['people'][0], fte=0.5)] + self.request_body['people'][1:]
+        response = self.client.post('/api/schedule', json=dict(self.request_body, people=part_time, optimizationMode="weighted"))
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['stats']['mode'], 'weighted')
+
+
+if __name__ == '__main__':
+    unittest.main()